@@ -0,0 +1,259 @@
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+from langgraph.types import Command
+
+from app.application.tool.budget_query_normalizer import (
+    fold_text,
+    normalize_budget_query,
+)
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_NODE = "fast_path_router"
+
+CONFIRMATION_REPLY = (
+    "Perfeito! Um atendente dará sequência ao seu atendimento em instantes."
+)
+GREETING_REPLY = (
+    "Oi, eu sou a Yasmin, da Doutor Sofá! 😊 " "Qual item você gostaria de higienizar?"
+)
+
+# Frases do especialista de coleta ao pedir confirmação dos dados
+_CONFIRMATION_REQUEST_MARKERS = (
+    "confirme os dados",
+    "consegue me confirmar",
+)
+
+_CONFIRMATION_WORDS = {
+    "sim",
+    "ok",
+    "okay",
+    "confirmo",
+    "confirmado",
+    "confirmada",
+    "correto",
+    "correta",
+    "certo",
+    "certinho",
+    "isso",
+    "exato",
+    "perfeito",
+    "pode",
+    "seguir",
+    "prosseguir",
+    "esta",
+    "ta",
+    "tudo",
+    "todos",
+    "os",
+    "dados",
+    "estao",
+    "s",
+}
+_STRONG_CONFIRMATIONS = {
+    "sim",
+    "ok",
+    "okay",
+    "confirmo",
+    "confirmado",
+    "confirmada",
+    "correto",
+    "correta",
+    "certo",
+    "certinho",
+    "isso",
+    "exato",
+    "perfeito",
+}
+
+_GREETING_WORDS = {
+    "oi",
+    "ola",
+    "opa",
+    "bom",
+    "boa",
+    "dia",
+    "tarde",
+    "noite",
+    "tudo",
+    "bem",
+    "e",
+    "com",
+    "voce",
+    "vc",
+    "contigo",
+    "como",
+    "vai",
+    "td",
+    "blz",
+    "beleza",
+}
+_STRONG_GREETINGS = {"oi", "ola", "opa", "dia", "tarde", "noite"}
+
+_PRICE_RE = re.compile(
+    r"\b(quanto (custa|custaria|fica|ficaria|sai|seria|e)|valor|valores|preco|precos|"
+    r"orcamento|cotacao)\b"
+)
+# Assuntos que exigem o supervisor (agendamento, dados, empresa) mesmo com item/preço
+_OTHER_INTENT_RE = re.compile(
+    r"\b(quando|data|datas|horario|horarios|agenda\w*|marcar|endereco|cidade|"
+    r"pagamento|pix|cartao|credito|garantia|desconto|funciona|demora|tempo)\b"
+)
+_MAX_PRICE_ONLY_WORDS = 10
+_MAX_SERVICE_ITEM_WORDS = 15
+
+
+@dataclass(frozen=True)
+class FastPathDecision:
+    """
+    Resultado da pré-classificação: destino (nó ou END), resposta fixa e regra aplicada
+    """
+
+    goto: str
+    rule: str
+    reply: str | None = None
+
+
+class FastPathStats:
+    """
+    Contadores de decisões do roteador determinístico (por regra) e de fallbacks ao LLM
+    """
+
+    def __init__(self):
+        self.decisions: Counter[str] = Counter()
+
+    def record(self, rule: str) -> None:
+        self.decisions[rule] += 1
+
+    def snapshot(self) -> dict:
+        total = sum(self.decisions.values())
+        fallbacks = self.decisions.get("llm_fallback", 0)
+        return {
+            "total": total,
+            "hits": total - fallbacks,
+            "llm_fallbacks": fallbacks,
+            "hit_rate": round((total - fallbacks) / total, 4) if total else 0.0,
+            "rules": dict(self.decisions),
+        }
+
+
+fast_path_stats = FastPathStats()
+
+
+def _last_ai_text(messages: list[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            return str(message.content)
+    return ""
+
+
+def _is_confirmation(words: list[str]) -> bool:
+    return (
+        bool(words)
+        and set(words) <= _CONFIRMATION_WORDS
+        and bool(set(words) & _STRONG_CONFIRMATIONS)
+    )
+
+
+def _is_greeting(words: list[str]) -> bool:
+    return (
+        bool(words)
+        and set(words) <= _GREETING_WORDS
+        and bool(set(words) & _STRONG_GREETINGS)
+    )
+
+
+def classify(
+    messages: list[BaseMessage], supervisor_name: str = "supervisor"
+) -> FastPathDecision:
+    """
+    Aplica as regras lexicais do prompt do supervisor à última mensagem do usuário.
+    Retorna o supervisor como destino quando nenhuma regra se aplica com segurança.
+    """
+    fallback = FastPathDecision(goto=supervisor_name, rule="llm_fallback")
+    if not messages or not isinstance(messages[-1], HumanMessage):
+        return fallback
+
+    text = str(messages[-1].content)
+    folded = fold_text(text)
+    words = folded.split()
+    history = messages[:-1]
+    previous_ai = fold_text(_last_ai_text(history))
+
+    # Regra 5: confirmação dos dados pedida pelo especialista de coleta
+    if any(fold_text(m) in previous_ai for m in _CONFIRMATION_REQUEST_MARKERS):
+        if _is_confirmation(words):
+            return FastPathDecision(
+                goto=END, rule="data_confirmation", reply=CONFIRMATION_REPLY
+            )
+        return fallback
+
+    # Regra 1: primeiro contato composto apenas de saudação
+    if not any(isinstance(m, AIMessage) for m in history) and _is_greeting(words):
+        return FastPathDecision(
+            goto=END, rule="first_contact_greeting", reply=GREETING_REPLY
+        )
+
+    if _OTHER_INTENT_RE.search(folded):
+        return fallback
+
+    query = normalize_budget_query(text)
+
+    # Regra 2: serviço + item (e quantidade, se houver) explícitos na mensagem
+    if (
+        query.item is not None
+        and query.explicit_service
+        and len(words) <= _MAX_SERVICE_ITEM_WORDS
+    ):
+        return FastPathDecision(
+            goto="service_and_budget_specialist", rule="service_with_item"
+        )
+
+    # Regra 2.1: apenas preço/orçamento, sem item nem quantidade
+    if (
+        _PRICE_RE.search(folded)
+        and not query.mentions_item
+        and query.quantity is None
+        and not any(w.isdigit() for w in words)
+        and len(words) <= _MAX_PRICE_ONLY_WORDS
+    ):
+        return FastPathDecision(goto="budget_specialist", rule="price_only")
+
+    return fallback
+
+
+def add_fast_path_router(
+    workflow: StateGraph, agent_names: list[str], supervisor_name: str = "supervisor"
+) -> str:
+    """
+    Adiciona o pré-classificador a ser executado antes do supervisor: regras
+    determinísticas respondem ou delegam sem chamar o LLM; o restante segue para o
+    supervisor. Retorna o nó de entrada (quem monta o grafo liga START a ele).
+    """
+
+    def fast_path_router(state: dict) -> Command:
+        decision = classify(list(state["messages"]), supervisor_name)
+        if decision.goto not in (END, supervisor_name, *agent_names):
+            decision = FastPathDecision(goto=supervisor_name, rule="llm_fallback")
+        fast_path_stats.record(decision.rule)
+        if decision.rule != "llm_fallback":
+            logger.info(f"Fast path: regra {decision.rule} -> {decision.goto}")
+
+        update = {}
+        if decision.reply is not None:
+            update["messages"] = [
+                AIMessage(content=decision.reply, name=supervisor_name)
+            ]
+        return Command(goto=decision.goto, update=update)
+
+    workflow.add_node(
+        FAST_PATH_NODE,
+        fast_path_router,
+        destinations=(supervisor_name, *agent_names, END),
+    )
+    return FAST_PATH_NODE
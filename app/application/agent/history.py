@@ -0,0 +1,186 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langgraph.graph import StateGraph
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from app.application.agent.system_prompt import SUMMARY_MESSAGE_ID
+from app.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+HISTORY_NODE = "manage_history"
+
+SUMMARY_PROMPT = (
+    "Você mantém o resumo de um atendimento da Doutor Sofá pelo WhatsApp. "
+    "Atualize o resumo existente incorporando os novos trechos da conversa. "
+    "Preserve apenas fatos úteis para continuar o atendimento: itens e quantidades, "
+    "serviços e valores informados, cidade, dados do cliente já coletados, preferências "
+    "de data/horário e pendências. Responda somente com o resumo, em até 10 linhas."
+)
+
+_TOOL_CONTENT_LIMIT = 500
+
+
+@dataclass(frozen=True)
+class HistoryWindow:
+    """
+    Política de histórico: turnos mantidos na íntegra, limite que dispara o resumo
+    e orçamento de tokens do histórico enviado a cada chamada ao modelo (0 = desativado)
+    """
+
+    keep_turns: int = 6
+    summary_trigger_turns: int = 10
+    max_prompt_tokens: int = 4000
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "HistoryWindow":
+        return cls(
+            keep_turns=settings.history_keep_turns,
+            summary_trigger_turns=settings.history_summary_trigger_turns,
+            max_prompt_tokens=settings.history_max_prompt_tokens,
+        )
+
+
+def _is_summary(message: BaseMessage) -> bool:
+    return message.id == SUMMARY_MESSAGE_ID
+
+
+def count_turns(messages: list[BaseMessage]) -> int:
+    return sum(1 for m in messages if isinstance(m, HumanMessage))
+
+
+def split_history(
+    messages: list[BaseMessage], keep_turns: int
+) -> tuple[list[BaseMessage], list[BaseMessage]]:
+    """
+    Separa o histórico em (antigas, recentes); as recentes começam na HumanMessage
+    do N-ésimo turno mais recente, sem separar tool calls de suas respostas
+    """
+    seen = 0
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            seen += 1
+            if seen == keep_turns:
+                return list(messages[:index]), list(messages[index:])
+    return [], list(messages)
+
+
+def _format_transcript(messages: list[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        content = str(message.content or "").strip()
+        if not content:
+            continue
+        if isinstance(message, HumanMessage):
+            lines.append(f"Cliente: {content}")
+        elif isinstance(message, AIMessage) and not message.tool_calls:
+            lines.append(f"Atendente: {content}")
+        elif isinstance(message, ToolMessage) and not (message.name or "").startswith(
+            "transfer_"
+        ):
+            lines.append(f"Ferramenta {message.name}: {content[:_TOOL_CONTENT_LIMIT]}")
+    return "\n".join(lines)
+
+
+async def summarize(
+    model: BaseChatModel, previous_summary: str, messages: list[BaseMessage]
+) -> str:
+    """
+    Incorpora ao resumo anterior apenas os turnos que estão saindo da janela
+    """
+    transcript = _format_transcript(messages)
+    if not transcript:
+        return previous_summary
+    response = await model.ainvoke(
+        [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(
+                content=(
+                    f"Resumo atual:\n{previous_summary or '(vazio)'}\n\n"
+                    f"Novos trechos:\n{transcript}"
+                )
+            ),
+        ]
+    )
+    return str(response.content).strip()
+
+
+def add_history_manager(
+    workflow: StateGraph, model: BaseChatModel, window: HistoryWindow, next_node: str
+) -> str:
+    """
+    Adiciona, antes de next_node, o nó que resume os turnos mais antigos e os remove do
+    estado quando a conversa ultrapassa o limite (mantendo os últimos keep_turns).
+    Retorna o nó de entrada (quem monta o grafo liga START a ele).
+    """
+    if window.keep_turns <= 0:
+        return next_node
+
+    trigger_turns = max(window.summary_trigger_turns, window.keep_turns)
+
+    async def manage_history(state: dict) -> dict:
+        summaries = [m for m in state["messages"] if _is_summary(m)]
+        messages = [m for m in state["messages"] if not _is_summary(m)]
+        if count_turns(messages) <= trigger_turns:
+            return {}
+        older, recent = split_history(messages, window.keep_turns)
+        previous_summary = str(summaries[-1].content) if summaries else ""
+        try:
+            summary = await summarize(model, previous_summary, older)
+        except Exception as e:
+            # Sem resumo o turno segue com o histórico completo; nova tentativa no próximo
+            logger.error(f"Erro ao resumir o histórico: {e}")
+            return {}
+        logger.info(f"{len(older)} mensagens antigas incorporadas ao resumo")
+        # Reescreve o histórico como [resumo, turnos recentes]; o resumo substitui as
+        # mensagens antigas no checkpoint e é atualizado apenas com os novos trechos
+        return {
+            "messages": [
+                RemoveMessage(id=REMOVE_ALL_MESSAGES),
+                SystemMessage(content=summary, id=SUMMARY_MESSAGE_ID),
+                *recent,
+            ]
+        }
+
+    workflow.add_node(HISTORY_NODE, manage_history)
+    workflow.add_edge(HISTORY_NODE, next_node)
+    return HISTORY_NODE
+
+
+def build_pre_model_hook(max_tokens: int) -> Callable[[dict], dict] | None:
+    """
+    Limita o histórico enviado a cada chamada ao modelo ao orçamento de tokens,
+    preservando os turnos mais recentes completos (o estado não é alterado)
+    """
+    if max_tokens <= 0:
+        return None
+
+    def trim_history(state: dict) -> dict:
+        summaries = [m for m in state["messages"] if _is_summary(m)]
+        messages = [m for m in state["messages"] if not isinstance(m, SystemMessage)]
+        trimmed = trim_messages(
+            messages,
+            max_tokens=max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+            allow_partial=False,
+        )
+        if not trimmed:
+            # O turno atual sozinho excede o orçamento: envia ao menos o turno atual
+            _, trimmed = split_history(messages, 1)
+        return {"llm_input_messages": [*summaries, *trimmed]}
+
+    return trim_history
@@ -0,0 +1,138 @@
+import logging
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langchain_core.tools import BaseTool
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.prebuilt.chat_agent_executor import AgentState
+
+logger = logging.getLogger(__name__)
+
+PASSTHROUGH_METADATA_KEY = "passthrough"
+DELIVER_NODE = "deliver_passthrough"
+
+# Resposta ao cliente quando a ferramenta de um especialista passthrough falha (sem
+# o LLM para reformular, o texto de erro da ferramenta não pode ir ao usuário)
+TOOL_ERROR_REPLY = (
+    "Desculpe, não consegui consultar essa informação agora. "
+    "Pode me enviar a mensagem novamente em instantes?"
+)
+
+# Textos de erro retornados pelas ferramentas (status HTTP, timeout, conexão, exceção)
+_TOOL_ERROR_PREFIXES = ("Erro ", "Erro:", "Timeout:", "Error:")
+
+
+def _is_error_text(text: str) -> bool:
+    return text.lstrip().startswith(_TOOL_ERROR_PREFIXES)
+
+
+def customer_safe_reply(message: ToolMessage) -> str:
+    """
+    Texto da ferramenta a entregar ao cliente: uma falha da ferramenta, ou cada trecho
+    com texto de erro (ex.: o orçamento na resposta combinada com "como funciona"),
+    vira a resposta padrão
+    """
+    if message.status == "error":
+        logger.warning(
+            f"Erro da ferramenta {message.name} substituído: {message.content}"
+        )
+        return TOOL_ERROR_REPLY
+    parts = str(message.content).split("\n\n")
+    if not any(_is_error_text(part) for part in parts):
+        return str(message.content)
+    logger.warning(f"Erro da ferramenta {message.name} substituído: {message.content}")
+    return "\n\n".join(
+        TOOL_ERROR_REPLY if _is_error_text(part) else part for part in parts
+    )
+
+
+def as_return_direct(tool: BaseTool) -> BaseTool:
+    """
+    Cópia da ferramenta cujo resultado encerra o especialista sem nova chamada ao LLM
+    """
+    return tool.model_copy(update={"return_direct": True})
+
+
+def with_passthrough(agent: CompiledStateGraph, name: str) -> CompiledStateGraph:
+    """
+    Envolve um especialista cujas ferramentas são return_direct: a saída da ferramenta
+    vira a mensagem final do especialista (AIMessage marcada como passthrough). Erros
+    da ferramenta são trocados pela resposta padrão (TOOL_ERROR_REPLY).
+    """
+
+    def finalize(state: AgentState) -> dict:
+        last = state["messages"][-1]
+        if not isinstance(last, ToolMessage):
+            return {}
+        return {
+            "messages": [
+                AIMessage(
+                    content=customer_safe_reply(last),
+                    name=name,
+                    response_metadata={PASSTHROUGH_METADATA_KEY: True},
+                )
+            ]
+        }
+
+    wrapper = StateGraph(AgentState)
+    wrapper.add_node("specialist", agent)
+    wrapper.add_node("finalize", finalize)
+    wrapper.add_edge(START, "specialist")
+    wrapper.add_edge("specialist", "finalize")
+    wrapper.add_edge("finalize", END)
+    return wrapper.compile(name=name)
+
+
+def is_passthrough_message(message: BaseMessage) -> bool:
+    return isinstance(message, AIMessage) and bool(
+        message.response_metadata.get(PASSTHROUGH_METADATA_KEY)
+    )
+
+
+def _find_passthrough(messages: list[BaseMessage]) -> int | None:
+    """
+    Índice da resposta passthrough ao fim do histórico, ignorando as mensagens de
+    retorno ao supervisor (transfer_back_to_*) adicionadas pelo langgraph_supervisor
+    """
+    for index in range(len(messages) - 1, max(-1, len(messages) - 4), -1):
+        if is_passthrough_message(messages[index]):
+            return index
+        if isinstance(messages[index], HumanMessage):
+            break
+    return None
+
+
+def enable_passthrough(
+    workflow: StateGraph, agent_names: list[str], supervisor_name: str = "supervisor"
+) -> StateGraph:
+    """
+    Faz com que especialistas passthrough respondam direto ao usuário: ao retornarem
+    uma resposta passthrough, o grafo termina sem nova chamada ao LLM do supervisor.
+    Cria as arestas de saída desses especialistas (que não devem ter outras).
+    """
+    if not agent_names:
+        return workflow
+
+    def route(state: dict) -> str:
+        if _find_passthrough(state["messages"]) is not None:
+            return DELIVER_NODE
+        return supervisor_name
+
+    def deliver(state: dict) -> dict:
+        # Remove as mensagens de retorno ao supervisor para que a resposta do
+        # especialista seja a última mensagem do turno
+        messages = state["messages"]
+        index = _find_passthrough(messages)
+        return {"messages": [RemoveMessage(id=m.id) for m in messages[index + 1 :]]}
+
+    workflow.add_node(DELIVER_NODE, deliver)
+    workflow.add_edge(DELIVER_NODE, END)
+    for name in agent_names:
+        workflow.add_conditional_edges(name, route, [DELIVER_NODE, supervisor_name])
+    return workflow
@@ -1,167 +1,335 @@
-from langgraph.prebuilt import create_react_agent
-from langgraph_supervisor import create_supervisor
-from langchain_openai import ChatOpenAI
-from app.application.tool import get_company_info, get_budget_info, handle_customer_data, get_service_and_budget_info
-from langchain_core.messages import BaseMessage, SystemMessage
-from typing import TypedDict, Annotated
-from langgraph.graph.message import add_messages
-from langgraph.types import Checkpointer
-from langgraph.store.base import BaseStore
+import hashlib
+import json
 import logging
 import os
+from dataclasses import asdict
+
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+from langgraph.graph import START
+from langgraph.prebuilt import create_react_agent
+from langgraph.store.base import BaseStore
+from langgraph.types import Checkpointer
 
+from app.application.agent.fast_path_router import add_fast_path_router
+from app.application.agent.history import (
+    HistoryWindow,
+    add_history_manager,
+    build_pre_model_hook,
+)
+from app.application.agent.passthrough import as_return_direct, with_passthrough
+from app.application.agent.supervisor_graph import (
+    SUPERVISOR_NAME,
+    create_supervisor_workflow,
+)
+from app.application.agent.system_prompt import build_system_prompt
+from app.application.tool import (
+    get_budget_info,
+    get_company_info,
+    get_service_and_budget_info,
+    handle_customer_data,
+)
+from app.config.settings import ModelSettings, get_settings
 
 logger = logging.getLogger(__name__)
 
-class ProxyAgentState(TypedDict):
-    messages: Annotated[list[BaseMessage], add_messages]
-    next: str
+COMPANY_AGENT_PROMPT = (
+    "Você é um especialista em informações corporativas. "
+    "Chame get_company_info com a pergunta do usuário. Use a resposta da ferramenta. "
+    "Não peça detalhes adicionais antes de consultar a ferramenta. "
+    "Informe como funciona a higienização preferencialmente."
+)
+
+BUDGET_AGENT_PROMPT = (
+    "Você é o especialista de ORÇAMENTOS.\n"
+    "- SEMPRE chame get_budget_info PRIMEIRO com a mensagem original do usuário.\n"
+    "- Depois da ferramenta responder, sua MENSAGEM FINAL deve ser "
+    "EXATAMENTE o TEXTO retornado pela ferramenta.\n"
+    "- PROIBIDO adicionar qualquer palavra extra (ex.: 'O agente de orçamento forneceu...'), "
+    "comentários, resumos ou títulos. Preserve as QUEBRAS DE LINHA.\n"
+    "- Se a ferramenta retornar erro/timeout, devolva exatamente o texto retornado pela ferramenta.\n"
+    "- Se a ferramenta retornar vazio/incompleto, chame get_budget_info novamente uma vez.\n"
+)
+
+CUSTOMER_DATA_AGENT_PROMPT = (
+    "Você coleta dados do cliente. "
+    "Agregue os dados já informados na conversa (Nome, Email, CPF, CEP, Número, Complemento) "
+    "e chame handle_customer_data apenas quando houver DADO NOVO do cliente. "
+    "Se a ferramenta solicitar campos faltantes, REPASSE essa solicitação em tom cordial, "
+    "listando TODOS os faltantes de uma só vez (bullets curtos), sem pedir um a um em turnos diferentes. "
+    "Não reenvie a mesma solicitação no mesmo turno e aguarde a resposta do usuário. "
+    "Responda sempre EXATAMENTE com o texto da ferramenta; não reescreva."
+)
+
+SERVICE_AND_BUDGET_AGENT_PROMPT = (
+    "Você combina informações de serviço e orçamento. "
+    "Use esta ferramenta quando precisar apresentar VARIAÇÕES de itens "
+    "e/ou incluir a explicação de 'como funciona' junto do orçamento. "
+    "NÃO utilize esta ferramenta para perguntas EXCLUSIVAMENTE de preço/orçamento; "
+    "nesses casos o supervisor delegará ao 'budget_specialist'. "
+    "Ao chamar a ferramenta, inclua na 'query' um resumo curto da intenção "
+    "atual do cliente inferida do histórico recente (item específico e "
+    "quantidade quando existirem). "
+    "Responda EXATAMENTE com o conteúdo retornado pela ferramenta; "
+    "não reescreva, não resuma, não acrescente texto próprio. "
+    "Se nesta conversa já houver explicação recente sobre 'como funciona', "
+    "a ferramenta pode retornar apenas o orçamento."
+)
+
+SUPERVISOR_PROMPT = (
+    "Você é 'Yasmin - Doutor Sofá'. "
+    "1) Primeiro contato: cumprimente brevemente e APRESENTE-SE como Yasmin "
+    "(ex.: 'Oi, eu sou a Yasmin, da Doutor Sofá') e pergunte em que posso ajudar. "
+    "2) SE a mensagem do usuário JÁ contiver: (a) TIPO DE SERVIÇO (ex.: 'limpeza', "
+    "'impermeabilização'), (b) PRODUTO/ITEM específico (ex.: 'sofá', 'cadeira', "
+    "com variações como '2 lugares', '3 lugares'), e (c) se houver, QUANTIDADE "
+    "explícita, então DELEGUE DIRETAMENTE ao 'service_and_budget_specialist'. "
+    "NÃO delegue ao 'budget_specialist' nessas condições. "
+    "2.1) Se o usuário PEDIR APENAS PREÇO/ORÇAMENTO/COTAÇÃO sem item/quantidade "
+    "(ex.: 'qual o valor', 'quanto custa', 'orçamento'), DELEGUE ao "
+    "'budget_specialist'. "
+    "2.2) Se for necessário apresentar VARIAÇÕES de itens e/ou combinar a explicação de "
+    "'como funciona' com o orçamento, DELEGUE ao 'service_and_budget_specialist'. "
+    "2.3) Se o 'service_and_budget_specialist' retornar múltiplas opções (ex.: "
+    "'Variações disponíveis:' ou fizer uma pergunta do tipo 'qual opção específica?'), "
+    "REPASSE EXATAMENTE esse texto ao usuário e AGUARDE a resposta com o item/quantidade. "
+    "2.4) Após o USUÁRIO informar explicitamente o item e, se houver, a quantidade, "
+    "delegue NOVAMENTE ao 'service_and_budget_specialist' para RETORNAR a explicação de "
+    "'como funciona' + o orçamento da opção escolhida. "
+    "2.5) Depois de REPASSAR essa resposta ao usuário, NÃO pergunte dia/horário; "
+    "delegue imediatamente ao 'colect_customer_data_specialist' para iniciar a coleta de dados. "
+    "3) Ao retornar de QUALQUER especialista, REPASSE EXATAMENTE o texto retornado, "
+    "caractere por caractere, PRESERVANDO QUEBRAS DE LINHA. "
+    "NUNCA acrescente CTA, saudações, títulos, contexto ou qualquer frase adicional. "
+    "Não reescreva, não resuma, não edite. "
+    "AO RETORNAR DE UM ESPECIALISTA: COPIE E COLE exatamente a última mensagem do especialista; "
+    "NÃO adicione prefixos como 'Variações disponíveis:' nem perguntas extras. "
+    "Se houver uma pergunta ao cliente, ela deve estar já contida no texto do especialista."
+    "4) Quando o cliente concordar/prosseguir OU fornecer dados pessoais, delegue ao "
+    "'colect_customer_data_specialist'. Após a resposta, REPASSE EXATAMENTE o texto retornado. "
+    "5) Se o especialista de coleta pedir apenas CONFIRMAÇÃO dos dados e o usuário confirmar "
+    "(ex.: 'confirmo', 'ok', 'está correto'), então NÃO delegue novamente. "
+    "Responda em UMA única linha: 'Perfeito! Um atendente dará sequência ao seu atendimento "
+    "em instantes.' E nada mais. "
+    "6) Nunca mencione agentes ou ferramentas internas. "
+    "IMPORTANTE: Você NUNCA deve resumir, simplificar ou omitir informações dos especialistas."
+)
+
+# Prompts por papel (nome do nó no grafo)
+DEFAULT_PROMPTS: dict[str, str] = {
+    "supervisor": SUPERVISOR_PROMPT,
+    "company_specialist": COMPANY_AGENT_PROMPT,
+    "budget_specialist": BUDGET_AGENT_PROMPT,
+    "colect_customer_data_specialist": CUSTOMER_DATA_AGENT_PROMPT,
+    "service_and_budget_specialist": SERVICE_AND_BUDGET_AGENT_PROMPT,
+}
+
+HISTORY_SUMMARY_ROLE = "history_summary"
+# Papéis com modelo configurável (MODEL_ROLES__<PAPEL>__...)
+MODEL_ROLES = (*DEFAULT_PROMPTS, HISTORY_SUMMARY_ROLE)
+
+
+def resolve_model_settings(
+    model_name: str | None = None, temperature: float | None = None
+) -> dict[str, ModelSettings]:
+    """
+    Modelo, limites e endpoint de cada papel; model_name e temperature substituem os
+    padrões (OPENAI_MODEL/OPENAI_TEMPERATURE), mas não os ajustes de um papel
+    """
+    settings = get_settings()
+    return {
+        role: settings.model_settings(role, model=model_name, temperature=temperature)
+        for role in MODEL_ROLES
+    }
+
+
+def create_chat_model(model_settings: ModelSettings) -> BaseChatModel:
+    return ChatOpenAI(
+        model=model_settings.model,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        temperature=model_settings.temperature,
+        max_tokens=model_settings.max_tokens or None,
+        timeout=model_settings.timeout,
+        max_retries=model_settings.max_retries,
+        base_url=model_settings.base_url or None,
+        # Uso de tokens também no streaming (/chat/stream), para as métricas de tokens
+        stream_usage=True,
+    )
+
+
+def build_config_key(
+    model_settings: dict[str, ModelSettings],
+    prompts: dict[str, str],
+    passthrough_agents: list[str] | None = None,
+    fast_path_enabled: bool = False,
+    history_window: HistoryWindow | None = None,
+) -> str:
+    """
+    Gera a chave que identifica uma configuração de modelo/prompts do grafo
+    """
+    raw = json.dumps(
+        {
+            "models": {
+                role: config.model_dump() for role, config in model_settings.items()
+            },
+            "prompts": prompts,
+            "passthrough_agents": sorted(passthrough_agents or []),
+            "fast_path_enabled": fast_path_enabled,
+            "history_window": asdict(history_window or HistoryWindow()),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 
 class ProxyAgentBuilder:
     """
     Classe responsável por construir o agente proxy supervisor
     """
 
-    def __init__(self):
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            temperature=0
+    def __init__(
+        self,
+        model_name: str | None = None,
+        temperature: float | None = None,
+        prompts: dict[str, str] | None = None,
+        model: BaseChatModel | None = None,
+        passthrough_agents: list[str] | None = None,
+        fast_path_enabled: bool | None = None,
+        history_window: HistoryWindow | None = None,
+        model_settings: dict[str, ModelSettings] | None = None,
+    ):
+        settings = get_settings()
+        self.model_name = model_name or settings.openai_model
+        self.temperature = (
+            settings.openai_temperature if temperature is None else temperature
+        )
+        # Modelo, max_tokens, timeout, tentativas e endpoint de cada papel
+        self.model_settings = model_settings or resolve_model_settings(
+            self.model_name, self.temperature
+        )
+        self.prompts = {**DEFAULT_PROMPTS, **(prompts or {})}
+        # Especialistas cuja saída da ferramenta vai direto ao usuário
+        self.passthrough_agents = (
+            settings.passthrough_agents
+            if passthrough_agents is None
+            else passthrough_agents
+        )
+        # Pré-classificador determinístico antes do supervisor
+        self.fast_path_enabled = (
+            settings.fast_path_enabled
+            if fast_path_enabled is None
+            else fast_path_enabled
         )
+        # Janela de histórico, resumo dos turnos antigos e orçamento de tokens por chamada
+        self.history_window = history_window or HistoryWindow.from_settings(settings)
+        # Modelo injetado (ex.: benchmarks) usado por todos os papéis
+        self.model = model
+        self._models: dict[str, BaseChatModel] = {}
 
-    def _create_company_agent(self):
-        return create_react_agent(
-            model=self.model,
-            tools=[get_company_info],
-            prompt=SystemMessage(
-                content=(
-                    "Você é um especialista em informações corporativas. "
-                    "Chame get_company_info com a pergunta do usuário. Use a resposta da ferramenta. "
-                    "Não peça detalhes adicionais antes de consultar a ferramenta. "
-                    "Informe como funciona a higienização preferencialmente."
-                )
-            ),
-            name="company_specialist",
+    @property
+    def config_key(self) -> str:
+        """
+        Chave da configuração usada para cachear o grafo compilado
+        """
+        return build_config_key(
+            self.model_settings,
+            self.prompts,
+            self.passthrough_agents,
+            self.fast_path_enabled,
+            self.history_window,
         )
 
-    def _create_budget_agent(self):
-        return create_react_agent(
-            model=self.model,
-            tools=[get_budget_info],
-            prompt=SystemMessage(
-                content=(
-                    "Você é o especialista de ORÇAMENTOS.\n"
-                    "- SEMPRE chame get_budget_info PRIMEIRO com a mensagem original do usuário.\n"
-                    "- Depois da ferramenta responder, sua MENSAGEM FINAL deve ser "
-                    "EXATAMENTE o TEXTO retornado pela ferramenta.\n"
-                    "- PROIBIDO adicionar qualquer palavra extra (ex.: 'O agente de orçamento forneceu...'), "
-                    "comentários, resumos ou títulos. Preserve as QUEBRAS DE LINHA.\n"
-                    "- Se a ferramenta retornar erro/timeout, devolva exatamente o texto retornado pela ferramenta.\n"
-                    "- Se a ferramenta retornar vazio/incompleto, chame get_budget_info novamente uma vez.\n"
-                )
-            ),
-            name="budget_specialist",
+    def _model_for(self, role: str) -> BaseChatModel:
+        """
+        Modelo do papel; papéis com a mesma configuração compartilham o cliente
+        """
+        if self.model is not None:
+            return self.model
+        config = self.model_settings[role]
+        key = config.model_dump_json()
+        if key not in self._models:
+            self._models[key] = create_chat_model(config)
+        return self._models[key]
+
+    def _create_specialist(self, name: str, tool):
+        """
+        Cria um especialista; em modo passthrough a resposta é o texto da ferramenta,
+        sem nova geração pelo especialista nem pelo supervisor
+        """
+        passthrough = name in self.passthrough_agents
+        agent = create_react_agent(
+            model=self._model_for(name),
+            tools=[as_return_direct(tool) if passthrough else tool],
+            prompt=build_system_prompt(self.prompts[name]),
+            pre_model_hook=build_pre_model_hook(self.history_window.max_prompt_tokens),
+            name=name,
         )
-    
+        return with_passthrough(agent, name) if passthrough else agent
+
+    def _create_company_agent(self):
+        return self._create_specialist("company_specialist", get_company_info)
+
+    def _create_budget_agent(self):
+        return self._create_specialist("budget_specialist", get_budget_info)
+
     def _create_handle_customer_data_agent(self):
-        return create_react_agent(
-            model=self.model,
-            tools=[handle_customer_data],
-            prompt=SystemMessage(
-                content=(
-                    "Você coleta dados do cliente. "
-                    "Agregue os dados já informados na conversa (Nome, Email, CPF, CEP, Número, Complemento) "
-                    "e chame handle_customer_data apenas quando houver DADO NOVO do cliente. "
-                    "Se a ferramenta solicitar campos faltantes, REPASSE essa solicitação em tom cordial, "
-                    "listando TODOS os faltantes de uma só vez (bullets curtos), sem pedir um a um em turnos diferentes. "
-                    "Não reenvie a mesma solicitação no mesmo turno e aguarde a resposta do usuário. "
-                    "Responda sempre EXATAMENTE com o texto da ferramenta; não reescreva."
-                )
-            ),
-            name="colect_customer_data_specialist",
+        return self._create_specialist(
+            "colect_customer_data_specialist", handle_customer_data
         )
 
     def _create_service_and_budget_agent(self):
-        return create_react_agent(
-            model=self.model,
-            tools=[get_service_and_budget_info],
-            prompt=SystemMessage(
-                content=(
-                    "Você combina informações de serviço e orçamento. "
-                    "Use esta ferramenta quando precisar apresentar VARIAÇÕES de itens "
-                    "e/ou incluir a explicação de 'como funciona' junto do orçamento. "
-                    "NÃO utilize esta ferramenta para perguntas EXCLUSIVAMENTE de preço/orçamento; "
-                    "nesses casos o supervisor delegará ao 'budget_specialist'. "
-                    "Ao chamar a ferramenta, inclua na 'query' um resumo curto da intenção "
-                    "atual do cliente inferida do histórico recente (item específico e "
-                    "quantidade quando existirem). "
-                    "Responda EXATAMENTE com o conteúdo retornado pela ferramenta; "
-                    "não reescreva, não resuma, não acrescente texto próprio. "
-                    "Se nesta conversa já houver explicação recente sobre 'como funciona', "
-                    "a ferramenta pode retornar apenas o orçamento."
-                )
-            ),
-            name="service_and_budget_specialist",
+        return self._create_specialist(
+            "service_and_budget_specialist", get_service_and_budget_info
         )
 
     def build(self):
         """
         Constrói o agente proxy supervisor
         """
+        unknown_roles = sorted(set(get_settings().model_roles) - set(MODEL_ROLES))
+        if unknown_roles:
+            logger.warning(
+                f"MODEL_ROLES com papéis desconhecidos (ignorados): {unknown_roles}"
+            )
         company_agent = self._create_company_agent()
         budget_agent = self._create_budget_agent()
         handle_customer_data_agent = self._create_handle_customer_data_agent()
         service_and_budget_agent = self._create_service_and_budget_agent()
 
-        supervisor = create_supervisor(
-            agents=[company_agent, budget_agent, handle_customer_data_agent, service_and_budget_agent],
-            model=self.model,
-            name="supervisor",
-            prompt=(
-                "Você é 'Yasmin - Doutor Sofá'. "
-                "1) Primeiro contato: cumprimente brevemente e APRESENTE-SE como Yasmin "
-                "(ex.: 'Oi, eu sou a Yasmin, da Doutor Sofá') e pergunte em que posso ajudar. "
-                "2) SE a mensagem do usuário JÁ contiver: (a) TIPO DE SERVIÇO (ex.: 'limpeza', "
-                "'impermeabilização'), (b) PRODUTO/ITEM específico (ex.: 'sofá', 'cadeira', "
-                "com variações como '2 lugares', '3 lugares'), e (c) se houver, QUANTIDADE "
-                "explícita, então DELEGUE DIRETAMENTE ao 'service_and_budget_specialist'. "
-                "NÃO delegue ao 'budget_specialist' nessas condições. "
-                "2.1) Se o usuário PEDIR APENAS PREÇO/ORÇAMENTO/COTAÇÃO sem item/quantidade "
-                "(ex.: 'qual o valor', 'quanto custa', 'orçamento'), DELEGUE ao "
-                "'budget_specialist'. "
-                "2.2) Se for necessário apresentar VARIAÇÕES de itens e/ou combinar a explicação de "
-                "'como funciona' com o orçamento, DELEGUE ao 'service_and_budget_specialist'. "
-                "2.3) Se o 'service_and_budget_specialist' retornar múltiplas opções (ex.: "
-                "'Variações disponíveis:' ou fizer uma pergunta do tipo 'qual opção específica?'), "
-                "REPASSE EXATAMENTE esse texto ao usuário e AGUARDE a resposta com o item/quantidade. "
-                "2.4) Após o USUÁRIO informar explicitamente o item e, se houver, a quantidade, "
-                "delegue NOVAMENTE ao 'service_and_budget_specialist' para RETORNAR a explicação de "
-                "'como funciona' + o orçamento da opção escolhida. "
-                "2.5) Depois de REPASSAR essa resposta ao usuário, NÃO pergunte dia/horário; "
-                "delegue imediatamente ao 'colect_customer_data_specialist' para iniciar a coleta de dados. "
-                "3) Ao retornar de QUALQUER especialista, REPASSE EXATAMENTE o texto retornado, "
-                "caractere por caractere, PRESERVANDO QUEBRAS DE LINHA. "
-                "NUNCA acrescente CTA, saudações, títulos, contexto ou qualquer frase adicional. "
-                "Não reescreva, não resuma, não edite. "
-                "AO RETORNAR DE UM ESPECIALISTA: COPIE E COLE exatamente a última mensagem do especialista; "
-                "NÃO adicione prefixos como 'Variações disponíveis:' nem perguntas extras. "
-                "Se houver uma pergunta ao cliente, ela deve estar já contida no texto do especialista."
-                "4) Quando o cliente concordar/prosseguir OU fornecer dados pessoais, delegue ao "
-                "'colect_customer_data_specialist'. Após a resposta, REPASSE EXATAMENTE o texto retornado. "
-                "5) Se o especialista de coleta pedir apenas CONFIRMAÇÃO dos dados e o usuário confirmar "
-                "(ex.: 'confirmo', 'ok', 'está correto'), então NÃO delegue novamente. "
-                "Responda em UMA única linha: 'Perfeito! Um atendente dará sequência ao seu atendimento "
-                "em instantes.' E nada mais. "
-                "6) Nunca mencione agentes ou ferramentas internas. "
-                "IMPORTANTE: Você NUNCA deve resumir, simplificar ou omitir informações dos especialistas."
-            ),
+        agents = [
+            company_agent,
+            budget_agent,
+            handle_customer_data_agent,
+            service_and_budget_agent,
+        ]
+        supervisor = create_supervisor_workflow(
+            agents=agents,
+            model=self._model_for(SUPERVISOR_NAME),
+            prompt=build_system_prompt(self.prompts[SUPERVISOR_NAME]),
+            pre_model_hook=build_pre_model_hook(self.history_window.max_prompt_tokens),
+            passthrough_agents=self.passthrough_agents,
+        )
+        # Nós executados antes do supervisor, do último ao primeiro: resumo do
+        # histórico -> fast path -> supervisor
+        entry = SUPERVISOR_NAME
+        if self.fast_path_enabled:
+            entry = add_fast_path_router(supervisor, [agent.name for agent in agents])
+        entry = add_history_manager(
+            supervisor, self._model_for(HISTORY_SUMMARY_ROLE), self.history_window, entry
         )
+        supervisor.add_edge(START, entry)
 
-        logger.info("Agente proxy supervisor construído com sucesso")
+        logger.info(
+            "Agente proxy supervisor construído com sucesso (modelos: %s)",
+            {role: config.model for role, config in self.model_settings.items()},
+        )
 
         return supervisor
 
-    def compile(self, checkpointer: Checkpointer | None = None, store: BaseStore | None = None):
+    def compile(
+        self, checkpointer: Checkpointer | None = None, store: BaseStore | None = None
+    ):
         """
         Compila o grafo de estado do agente proxy supervisor
         """
@@ -171,7 +339,6 @@ class ProxyAgentBuilder:
         return compile_supervisor
 
 
-
 def get_proxy_agent():
     """
     Exporta o grafo compilado esperado pelo runtime (conforme langgraph.json).
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.store.base import BaseStore
+from langgraph.types import Checkpointer
+
+from app.application.agent.history import HistoryWindow
+from app.application.agent.proxy_agent_builder import (
+    DEFAULT_PROMPTS,
+    ProxyAgentBuilder,
+    build_config_key,
+    resolve_model_settings,
+)
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyAgentCache:
+    """
+    Cache de processo do grafo supervisor compilado.
+
+    O grafo é compilado uma única vez por configuração de modelo/prompts e
+    reutilizado entre requisições; o custo por requisição fica restrito ao ainvoke.
+    A chave da configuração padrão (settings e prompts do módulo, fixos durante a
+    vida do processo) é calculada uma única vez, na criação do cache.
+    """
+
+    def __init__(
+        self,
+        checkpointer: Checkpointer | None = None,
+        store: BaseStore | None = None,
+        max_entries: int = 4,
+        model: BaseChatModel | None = None,
+    ):
+        self.checkpointer = checkpointer
+        self.store = store
+        self.max_entries = max_entries
+        # Modelo usado no lugar dos ChatOpenAI configurados por papel (ex.: benchmarks)
+        self.model = model
+        self._graphs: dict[str, CompiledStateGraph] = {}
+        self._lock = threading.Lock()
+        self._default = self._resolve()
+
+    def get(
+        self,
+        model_name: str | None = None,
+        temperature: float | None = None,
+        prompts: dict[str, str] | None = None,
+        passthrough_agents: list[str] | None = None,
+        fast_path_enabled: bool | None = None,
+        history_window: HistoryWindow | None = None,
+    ) -> CompiledStateGraph:
+        """
+        Retorna o grafo compilado para a configuração, compilando apenas na primeira vez
+        """
+        overrides = (
+            model_name,
+            temperature,
+            prompts,
+            passthrough_agents,
+            fast_path_enabled,
+            history_window,
+        )
+        if all(value is None for value in overrides):
+            key, options = self._default
+        else:
+            key, options = self._resolve(*overrides)
+
+        graph = self._graphs.get(key)
+        if graph is not None:
+            return graph
+
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                start_time = time.perf_counter()
+                builder = ProxyAgentBuilder(**options, model=self.model)
+                graph = builder.compile(checkpointer=self.checkpointer, store=self.store)
+                self._remember(key, graph)
+                logger.info(
+                    "Grafo supervisor compilado e cacheado (chave=%s, %.1fms)",
+                    key[:12],
+                    (time.perf_counter() - start_time) * 1000,
+                )
+        return graph
+
+    @staticmethod
+    def _resolve(
+        model_name: str | None = None,
+        temperature: float | None = None,
+        prompts: dict[str, str] | None = None,
+        passthrough_agents: list[str] | None = None,
+        fast_path_enabled: bool | None = None,
+        history_window: HistoryWindow | None = None,
+    ) -> tuple[str, dict]:
+        """
+        Chave da configuração e argumentos do ProxyAgentBuilder, com os valores
+        ausentes lidos das settings
+        """
+        settings = get_settings()
+        model_name = model_name or settings.openai_model
+        temperature = settings.openai_temperature if temperature is None else temperature
+        prompts = {**DEFAULT_PROMPTS, **(prompts or {})}
+        if passthrough_agents is None:
+            passthrough_agents = settings.passthrough_agents
+        if fast_path_enabled is None:
+            fast_path_enabled = settings.fast_path_enabled
+        history_window = history_window or HistoryWindow.from_settings(settings)
+        model_settings = resolve_model_settings(model_name, temperature)
+        key = build_config_key(
+            model_settings,
+            prompts,
+            passthrough_agents,
+            fast_path_enabled,
+            history_window,
+        )
+        options = {
+            "model_name": model_name,
+            "temperature": temperature,
+            "prompts": prompts,
+            "passthrough_agents": passthrough_agents,
+            "fast_path_enabled": fast_path_enabled,
+            "history_window": history_window,
+            "model_settings": model_settings,
+        }
+        return key, options
+
+    def put(self, builder: ProxyAgentBuilder) -> CompiledStateGraph:
+        """
+        Compila e cacheia o grafo de um builder já configurado (ex.: modelo injetado)
+        """
+        graph = builder.compile(checkpointer=self.checkpointer, store=self.store)
+        with self._lock:
+            self._remember(builder.config_key, graph)
+        return graph
+
+    def warmup(self) -> CompiledStateGraph:
+        """
+        Compila o grafo padrão na inicialização da aplicação
+        """
+        graph = self.get()
+        # Percorre a estrutura do grafo para materializar subgrafos e canais
+        graph.get_graph()
+        return graph
+
+    def invalidate(self) -> None:
+        """
+        Descarta todos os grafos cacheados (o próximo get recompila)
+        """
+        with self._lock:
+            self._graphs.clear()
+
+    def _remember(self, key: str, graph: CompiledStateGraph) -> None:
+        self._graphs.pop(key, None)
+        self._graphs[key] = graph
+        # Mantém apenas as configurações mais recentes; execuções em andamento
+        # continuam com a referência que já possuem
+        while len(self._graphs) > self.max_entries:
+            self._graphs.pop(next(iter(self._graphs)))
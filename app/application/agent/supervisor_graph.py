@@ -0,0 +1,89 @@
+import inspect
+from typing import Annotated, Callable, Sequence, TypedDict
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.prebuilt import create_react_agent
+from langgraph_supervisor import create_handoff_tool
+from langgraph_supervisor.handoff import create_handoff_back_messages
+
+from app.application.agent.passthrough import enable_passthrough
+
+SUPERVISOR_NAME = "supervisor"
+
+
+class SupervisorState(TypedDict):
+    messages: Annotated[Sequence[AnyMessage], add_messages]
+
+
+def _specialist_output(output: dict, agent_name: str, supervisor_name: str) -> dict:
+    """
+    Apenas a última mensagem do especialista (com a tool call, se for resposta de
+    ferramenta) e as mensagens de retorno ao supervisor entram no estado
+    """
+    messages = output["messages"]
+    messages = messages[-2:] if isinstance(messages[-1], ToolMessage) else messages[-1:]
+    return {
+        **output,
+        "messages": [
+            *messages,
+            *create_handoff_back_messages(agent_name, supervisor_name),
+        ],
+    }
+
+
+def _call_specialist(agent: CompiledStateGraph, supervisor_name: str) -> RunnableLambda:
+    def call(state: dict, config: RunnableConfig) -> dict:
+        return _specialist_output(
+            agent.invoke(state, config), agent.name, supervisor_name
+        )
+
+    async def acall(state: dict, config: RunnableConfig) -> dict:
+        output = await agent.ainvoke(state, config)
+        return _specialist_output(output, agent.name, supervisor_name)
+
+    return RunnableLambda(call, afunc=acall, name=agent.name)
+
+
+def create_supervisor_workflow(
+    agents: list[CompiledStateGraph],
+    model: BaseChatModel,
+    prompt: Callable[[dict, RunnableConfig], list[BaseMessage]],
+    pre_model_hook: Callable[[dict], dict] | None = None,
+    passthrough_agents: list[str] | None = None,
+    supervisor_name: str = SUPERVISOR_NAME,
+) -> StateGraph:
+    """
+    Grafo supervisor + especialistas, como langgraph_supervisor.create_supervisor: o
+    supervisor delega por ferramentas transfer_to_<especialista> e cada especialista
+    devolve a última mensagem ao supervisor. Especialistas passthrough respondem direto
+    ao usuário. A aresta de entrada (START) fica a cargo de quem monta o grafo, para
+    que nós anteriores ao supervisor (histórico, fast path) sejam encadeados sem
+    alterar arestas já criadas.
+    """
+    agent_names = [agent.name for agent in agents]
+    handoff_tools = [create_handoff_tool(agent_name=name) for name in agent_names]
+    # Uma delegação por vez: o supervisor não aciona especialistas em paralelo
+    if "parallel_tool_calls" in inspect.signature(model.bind_tools).parameters:
+        model = model.bind_tools(handoff_tools, parallel_tool_calls=False)
+    supervisor = create_react_agent(
+        name=supervisor_name,
+        model=model,
+        tools=handoff_tools,
+        prompt=prompt,
+        pre_model_hook=pre_model_hook,
+    )
+
+    passthrough = [name for name in agent_names if name in (passthrough_agents or [])]
+    workflow = StateGraph(SupervisorState)
+    workflow.add_node(supervisor, destinations=(*agent_names, END))
+    for agent in agents:
+        workflow.add_node(agent.name, _call_specialist(agent, supervisor_name))
+        if agent.name not in passthrough:
+            workflow.add_edge(agent.name, supervisor_name)
+    enable_passthrough(workflow, passthrough, supervisor_name)
+    return workflow
@@ -0,0 +1,53 @@
+from typing import Callable
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+# Chave em config["configurable"] com as memórias do usuário recuperadas para o turno
+MEMORY_CONTEXT_KEY = "memory_context"
+# Id da mensagem (no histórico) com o resumo dos turnos que saíram da janela
+SUMMARY_MESSAGE_ID = "conversation_summary"
+
+PERSONA_MESSAGE = (
+    "Adote a persona 'Yasmin - Doutor Sofá'. "
+    "Na primeira resposta, cumprimente cordialmente e apresente-se como Yasmin; "
+    "não solicite foto do item nesta etapa; pergunte de forma objetiva qual item deseja higienizar. "
+    "Para orçamento e agendamento, o supervisor fará o encaminhamento apropriado. "
+    "Não reescreva respostas dos especialistas; repasse-as exatamente ao usuário. "
+    "Não antecipe coleta de dados; aguarde o fluxo automático."
+    "Evite repetir conteúdo idêntico já enviado nesta conversa."
+)
+
+
+def build_system_prompt(
+    prompt: str,
+) -> Callable[[dict, RunnableConfig], list[BaseMessage]]:
+    """
+    Prompt do agente montado no momento da chamada ao modelo: instruções do papel,
+    persona, memórias do usuário (vindas do config) e resumo da conversa antes do histórico.
+
+    Persona e memórias não entram no estado, então não são gravadas no checkpoint;
+    SystemMessages de threads antigas são ignoradas para não duplicar a persona,
+    exceto o resumo da conversa, que é reposicionado logo após o prefixo.
+    """
+    # Prefixo estável entre turnos (favorece o cache de prompt do provedor)
+    prefix = [SystemMessage(content=prompt), SystemMessage(content=PERSONA_MESSAGE)]
+
+    def system_prompt(state: dict, config: RunnableConfig) -> list[BaseMessage]:
+        messages = [m for m in state["messages"] if not isinstance(m, SystemMessage)]
+        summaries = [m for m in state["messages"] if m.id == SUMMARY_MESSAGE_ID]
+        context = []
+        memory_context = (config.get("configurable") or {}).get(MEMORY_CONTEXT_KEY)
+        if memory_context:
+            context.append(
+                SystemMessage(
+                    content=f"Você é um assistente útil. Informações do usuário: {memory_context}"
+                )
+            )
+        for summary in summaries:
+            context.append(
+                SystemMessage(content=f"Resumo da conversa até aqui:\n{summary.content}")
+            )
+        return [*prefix, *context, *messages]
+
+    return system_prompt
@@ -0,0 +1,68 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+# Chave do prazo (epoch, s) na configuração do grafo
+DEADLINE_CONFIG_KEY = "deadline"
+
+
+class DeadlineExceeded(Exception):
+    """
+    O prazo do turno expirou antes da chamada
+    """
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """
+    Instante (epoch, s) até o qual o turno precisa ser respondido
+    """
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.time())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+# Prazo do turno em andamento; as tarefas do grafo (nós, ferramentas) herdam o contexto
+_current_deadline: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Iterator[Deadline | None]:
+    """
+    Define o prazo para o código executado dentro do bloco
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def bounded_timeout(timeout: float) -> float:
+    """
+    Limita o timeout de uma chamada ao tempo restante do prazo do turno; levanta
+    DeadlineExceeded se o prazo já expirou
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return timeout
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("Prazo do turno expirado")
+    return min(timeout, remaining)
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from app.application.tool.budget_query_normalizer import fold_text
+from app.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Embedder local e determinístico (hashing de palavras e bigramas normalizados).
+    Não exige rede nem chave de API: indicado para testes e ambientes sem provedor.
+    """
+
+    def __init__(self, dims: int = 256):
+        self.dims = dims
+
+    def _embed(self, text: str) -> list[float]:
+        words = fold_text(text).split()
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = [0.0] * self.dims
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "big")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dims] += sign
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Cache LRU em processo sobre um Embeddings: textos idênticos não são embutidos de novo
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._vectors: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, texts: list[str]) -> tuple[dict[int, list[float]], list[int]]:
+        found: dict[int, list[float]] = {}
+        missing: list[int] = []
+        with self._lock:
+            for index, text in enumerate(texts):
+                vector = self._vectors.get(self._key(text))
+                if vector is None:
+                    missing.append(index)
+                else:
+                    self._vectors.move_to_end(self._key(text))
+                    found[index] = vector
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def _remember(self, texts: list[str], vectors: list[list[float]]) -> None:
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._vectors[self._key(text)] = vector
+                self._vectors.move_to_end(self._key(text))
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        found, missing = self._lookup(texts)
+        if missing:
+            pending = list(dict.fromkeys(texts[i] for i in missing))
+            vectors = dict(zip(pending, self.embeddings.embed_documents(pending)))
+            self._remember(pending, list(vectors.values()))
+            found.update({i: vectors[texts[i]] for i in missing})
+        return [found[i] for i in range(len(texts))]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        found, missing = self._lookup(texts)
+        if missing:
+            pending = list(dict.fromkeys(texts[i] for i in missing))
+            vectors = dict(zip(pending, await self.embeddings.aembed_documents(pending)))
+            self._remember(pending, list(vectors.values()))
+            found.update({i: vectors[texts[i]] for i in missing})
+        return [found[i] for i in range(len(texts))]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._vectors),
+            }
+
+
+def create_embeddings(settings: Settings) -> Embeddings | None:
+    """
+    Embedder configurado para o índice de memórias (None = sem índice vetorial)
+    """
+    provider = settings.memory_embedding_provider.lower()
+    if provider in ("", "none"):
+        return None
+    if provider == "hash":
+        embeddings: Embeddings = HashEmbeddings(dims=settings.memory_embedding_dims)
+    elif provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings(
+            model=settings.memory_embedding_model,
+            dimensions=settings.memory_embedding_dims,
+        )
+    else:
+        raise ValueError(f"Provedor de embeddings desconhecido: {provider}")
+    return CachedEmbeddings(embeddings, max_entries=settings.memory_embedding_cache_size)
+
+
+def build_memory_index(settings: Settings) -> dict | None:
+    """
+    Configuração de índice (IndexConfig) do store: apenas o campo 'data' das memórias
+    """
+    embeddings = create_embeddings(settings)
+    if embeddings is None:
+        return None
+    return {
+        "dims": settings.memory_embedding_dims,
+        "embed": embeddings,
+        "fields": ["data"],
+    }
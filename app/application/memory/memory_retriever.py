@@ -0,0 +1,87 @@
+import logging
+import time
+import uuid
+
+from langgraph.store.base import BaseStore, Item
+
+from app.application.tool.budget_query_normalizer import fold_text
+from app.infrastructure.observability.metrics import MEMORY_SEARCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MEMORY_NAMESPACE = "memories"
+
+
+def _memory_text(item: Item) -> str:
+    return (item.value or {}).get("data", "") if item is not None else ""
+
+
+def _words(text: str) -> set[str]:
+    # Palavras curtas (artigos, preposições) não indicam relevância
+    return {word for word in fold_text(text).split() if len(word) > 2}
+
+
+class MemoryRetriever:
+    """
+    Recuperação das memórias do usuário limitada a top_k itens por turno.
+
+    Com índice vetorial no store (indexed=True), a busca é semântica; sem índice,
+    ou se a busca vetorial falhar, as memórias mais recentes (até scan_limit) são
+    ranqueadas por sobreposição de palavras com a mensagem.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        top_k: int = 5,
+        indexed: bool = False,
+        scan_limit: int = 50,
+    ):
+        self.store = store
+        self.top_k = top_k
+        self.indexed = indexed
+        self.scan_limit = scan_limit
+
+    @staticmethod
+    def namespace(user_id: str) -> tuple[str, str]:
+        return (MEMORY_NAMESPACE, user_id)
+
+    async def search(self, user_id: str, query: str) -> list[str]:
+        """
+        Textos das memórias mais relevantes para a mensagem (no máximo top_k)
+        """
+        start_time = time.perf_counter()
+        items: list[Item] = []
+        mode = "vector" if self.indexed else "lexical"
+        if self.indexed:
+            try:
+                items = await self.store.asearch(
+                    self.namespace(user_id), query=query, limit=self.top_k
+                )
+            except Exception as e:
+                logger.error(
+                    f"Erro na busca vetorial de memórias, usando busca lexical: {e}"
+                )
+                mode = "lexical_fallback"
+                items = await self._lexical_search(user_id, query)
+        else:
+            items = await self._lexical_search(user_id, query)
+
+        texts = [text for text in (_memory_text(item) for item in items) if text]
+        elapsed = time.perf_counter() - start_time
+        MEMORY_SEARCH_SECONDS.labels(mode).observe(elapsed)
+        logger.debug(f"{len(texts)} memórias recuperadas em {elapsed * 1000:.1f}ms")
+        return texts
+
+    async def remember(self, user_id: str, text: str) -> None:
+        await self.store.aput(self.namespace(user_id), str(uuid.uuid4()), {"data": text})
+
+    async def _lexical_search(self, user_id: str, query: str) -> list[Item]:
+        items = await self.store.asearch(self.namespace(user_id), limit=self.scan_limit)
+        query_words = _words(query)
+
+        def rank(item: Item) -> tuple[int, float]:
+            overlap = len(query_words & _words(_memory_text(item)))
+            return overlap, item.updated_at.timestamp()
+
+        return sorted(items, key=rank, reverse=True)[: self.top_k]
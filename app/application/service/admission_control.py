@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.application.deadline import current_deadline
+from app.config.settings import Settings
+from app.infrastructure.observability.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+OVERLOADED = "overloaded"
+RATE_LIMITED = "rate_limited"
+
+
+class AdmissionRejected(Exception):
+    """
+    Requisição recusada antes de iniciar o turno (sobrecarga ou limite do telefone)
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(
+            f"Requisição recusada ({reason}); tente novamente em {retry_after:.1f}s"
+        )
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class PhoneRateLimiter:
+    """
+    Token bucket por telefone: `burst` mensagens seguidas e reposição contínua de
+    rate_per_minute; os telefones menos recentes são descartados acima de max_phones
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_phones: int = 10000):
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.max_phones = max_phones
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_second > 0
+
+    def check(self, phone: str) -> None:
+        """
+        Consome um token do telefone ou levanta AdmissionRejected
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(phone, (float(self.burst), now))
+        tokens = min(
+            float(self.burst), tokens + (now - updated_at) * self.rate_per_second
+        )
+        if tokens < 1:
+            self._buckets[phone] = (tokens, now)
+            raise AdmissionRejected(RATE_LIMITED, (1 - tokens) / self.rate_per_second)
+        self._buckets[phone] = (tokens - 1, now)
+        self._buckets.move_to_end(phone)
+        while len(self._buckets) > self.max_phones:
+            self._buckets.popitem(last=False)
+
+
+class AdmissionTicket:
+    """
+    Vaga de execução concedida; release() é idempotente
+    """
+
+    def __init__(self, controller: "AdmissionController | None" = None):
+        self._controller = controller
+
+    def release(self) -> None:
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller._release()
+
+
+class AdmissionController:
+    """
+    Controle de admissão dos turnos: limite global de execuções simultâneas com fila
+    de espera limitada (em tamanho e tempo) e limite de taxa por telefone. Requisições
+    além dos limites são recusadas na hora, em vez de disputarem banco, grafo e LLM.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 0,
+        max_queue: int = 0,
+        queue_timeout: float = 5.0,
+        rate_limiter: PhoneRateLimiter | None = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = rate_limiter
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        )
+        self._waiting = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        return cls(
+            max_concurrent=settings.admission_max_concurrent,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            rate_limiter=PhoneRateLimiter(
+                settings.phone_rate_limit_per_minute, settings.phone_rate_limit_burst
+            ),
+        )
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def check_rate(self, phone: str) -> None:
+        if self.rate_limiter is None:
+            return
+        try:
+            self.rate_limiter.check(phone)
+        except AdmissionRejected:
+            ADMISSION_REJECTIONS.labels(RATE_LIMITED).inc()
+            raise
+
+    async def acquire(
+        self, phone: str, timeout: float | None = None, rate_limited: bool = True
+    ) -> AdmissionTicket:
+        """
+        Aguarda uma vaga (no máximo queue_timeout, ou timeout se menor) ou levanta
+        AdmissionRejected; sem rate_limited, o limite por telefone não é aplicado
+        """
+        if rate_limited:
+            self.check_rate(phone)
+        if self._semaphore is None:
+            return AdmissionTicket()
+
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            ADMISSION_REJECTIONS.labels(OVERLOADED).inc()
+            raise AdmissionRejected(OVERLOADED, self.queue_timeout)
+
+        if not self._semaphore.locked():
+            # Vaga livre e ninguém na fila: sem espera
+            await self._semaphore.acquire()
+            ADMISSION_IN_FLIGHT.inc()
+            return AdmissionTicket(self)
+
+        wait = (
+            self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+        )
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=wait)
+        except TimeoutError:
+            ADMISSION_REJECTIONS.labels(OVERLOADED).inc()
+            logger.warning(
+                f"Fila de admissão cheia por {wait:.1f}s; requisição recusada - {phone}"
+            )
+            raise AdmissionRejected(OVERLOADED, self.queue_timeout) from None
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        ADMISSION_IN_FLIGHT.inc()
+        return AdmissionTicket(self)
+
+    def _release(self) -> None:
+        ADMISSION_IN_FLIGHT.dec()
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admit(
+        self, phone: str, timeout: float | None = None, rate_limited: bool = True
+    ) -> AsyncIterator[None]:
+        ticket = await self.acquire(phone, timeout, rate_limited)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def wrap(
+        self, handler: Callable[[str, str], Awaitable[str]], rate_limited: bool = True
+    ) -> Callable[[str, str], Awaitable[str]]:
+        """
+        Handler (mensagem, telefone) que só executa após a admissão; a espera pela vaga
+        consome o prazo do turno. Usado pelo agrupamento de mensagens, a admissão (vaga
+        e token do telefone) vale uma vez por turno, e não por mensagem. Lotes usam
+        rate_limited=False: reprocessar uma conversa envia várias mensagens do mesmo
+        telefone de propósito, mas cada turno ainda ocupa uma vaga global.
+        """
+
+        async def admitted(message: str, phone: str) -> str:
+            deadline = current_deadline()
+            async with self.admit(
+                phone,
+                timeout=deadline.remaining() if deadline else None,
+                rate_limited=rate_limited,
+            ):
+                return await handler(message, phone)
+
+        return admitted
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END
+
+from app.application.agent.fast_path_router import classify
+from app.application.service.idempotency_store import IdempotencyStore
+from app.application.tool.http_client_registry import (
+    BUDGET_AGENT,
+    COMPANY_AGENT,
+    CUSTOMER_REGISTRATION_AGENT,
+)
+from app.infrastructure.observability.metrics import (
+    CHAT_BATCH_IN_FLIGHT,
+    CHAT_BATCH_ITEMS,
+)
+from app.infrastructure.observability.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
+
+# Turno respondido sem agente remoto (ex.: saudação) ou roteado pelo LLM do supervisor
+NO_UPSTREAM = "none"
+UNKNOWN_UPSTREAM = "unknown"
+
+_SPECIALIST_UPSTREAMS = {
+    "company_specialist": COMPANY_AGENT,
+    "budget_specialist": BUDGET_AGENT,
+    "service_and_budget_specialist": BUDGET_AGENT,
+    "colect_customer_data_specialist": CUSTOMER_REGISTRATION_AGENT,
+}
+
+# Dados pessoais (e-mail, CPF, CEP) seguem para a coleta de dados (regra 4 do supervisor)
+_CUSTOMER_DATA_RE = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|(?<!\d)\d{3}\.?\d{3}\.?\d{3}-?\d{2}(?!\d)"
+    r"|(?<!\d)\d{5}-\d{3}(?!\d)"
+)
+
+
+def predict_upstream(message: str) -> str:
+    """
+    Agente remoto que o turno deve consultar, pelas regras do roteador determinístico
+    (sem o histórico da conversa); é só uma estimativa para distribuir as vagas
+    """
+    if _CUSTOMER_DATA_RE.search(message):
+        return CUSTOMER_REGISTRATION_AGENT
+    decision = classify([HumanMessage(content=message)])
+    if decision.goto == END:
+        return NO_UPSTREAM
+    return _SPECIALIST_UPSTREAMS.get(decision.goto, UNKNOWN_UPSTREAM)
+
+
+@dataclass
+class BatchItem:
+    index: int
+    phone: str
+    message: str
+    message_id: str | None = None
+    upstream: str = UNKNOWN_UPSTREAM
+
+
+@dataclass
+class BatchResult:
+    item: BatchItem
+    response: str | None = None
+    error: Exception | None = None
+    seconds: float = 0.0
+
+
+class ChatBatchRunner:
+    """
+    Executa lotes de turnos (reprocessamentos, campanhas de reengajamento) com
+    concorrência limitada. O handler recebe (mensagem, telefone), como ChatService.run.
+
+    - As mensagens do mesmo telefone executam uma de cada vez, na ordem do lote.
+    - As vagas são distribuídas em rodízio entre os agentes remotos previstos para os
+      turnos, com no máximo max_per_upstream execuções por agente: um lote concentrado
+      em um agente não ocupa todas as vagas nem atrasa os turnos dos demais.
+    - Os limites valem para todos os lotes em andamento na réplica.
+    - Cada turno passa também pelo controle de admissão (handler de
+      AdmissionController.wrap): ocupa uma vaga global, como os turnos interativos, em
+      vez de somar execuções além do limite da réplica; turnos recusados por
+      sobrecarga voltam como erro do item.
+    - Mensagens com message_id passam pela idempotência de /proxy/chat: as já
+      processadas devolvem a resposta guardada sem executar o grafo.
+
+    Os resultados são entregues na ordem de conclusão.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str], Awaitable[str]],
+        max_concurrent: int = 8,
+        max_per_upstream: int = 4,
+        idempotency_store: IdempotencyStore | None = None,
+    ):
+        self.handler = handler
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_upstream = max_per_upstream
+        self.idempotency_store = idempotency_store
+        self._in_flight = 0
+        self._upstream_in_flight: Counter[str] = Counter()
+        self._released = asyncio.Event()
+
+    def _has_capacity(self, upstream: str) -> bool:
+        return self.max_per_upstream <= 0 or (
+            self._upstream_in_flight[upstream] < self.max_per_upstream
+        )
+
+    def _acquire(self, upstream: str) -> None:
+        self._in_flight += 1
+        self._upstream_in_flight[upstream] += 1
+        CHAT_BATCH_IN_FLIGHT.labels(upstream).inc()
+
+    def _release(self, upstream: str) -> None:
+        self._in_flight -= 1
+        self._upstream_in_flight[upstream] -= 1
+        CHAT_BATCH_IN_FLIGHT.labels(upstream).dec()
+        # Acorda os lotes que aguardam vaga
+        released, self._released = self._released, asyncio.Event()
+        released.set()
+
+    def _next(
+        self,
+        threads: dict[str, deque[BatchItem]],
+        busy_threads: set[str],
+        upstreams: deque[str],
+    ) -> BatchItem | None:
+        """
+        Próximo turno a iniciar: o primeiro pendente de um telefone livre, no primeiro
+        agente do rodízio com vaga; o agente e a conversa escolhidos vão para o fim
+        """
+        if self._in_flight >= self.max_concurrent:
+            return None
+        for position, upstream in enumerate(upstreams):
+            if not self._has_capacity(upstream):
+                continue
+            for phone, pending in threads.items():
+                if phone in busy_threads or pending[0].upstream != upstream:
+                    continue
+                item = pending.popleft()
+                # A conversa volta ao fim da fila: rodízio também entre conversas
+                del threads[phone]
+                if pending:
+                    threads[phone] = pending
+                upstreams.rotate(-(position + 1))
+                return item
+        return None
+
+    async def _execute(self, item: BatchItem) -> BatchResult:
+        start_time = time.perf_counter()
+        with log_context(thread_id=item.phone):
+            try:
+                if item.message_id and self.idempotency_store is not None:
+                    response = await self.idempotency_store.run(
+                        IdempotencyStore.key("chat", item.phone, item.message_id),
+                        lambda: self.handler(item.message, item.phone),
+                    )
+                else:
+                    response = await self.handler(item.message, item.phone)
+            except Exception as e:
+                logger.error(f"Erro no item {item.index} do lote: {e}")
+                CHAT_BATCH_ITEMS.labels("error").inc()
+                return BatchResult(
+                    item, error=e, seconds=time.perf_counter() - start_time
+                )
+        CHAT_BATCH_ITEMS.labels("ok").inc()
+        return BatchResult(
+            item, response=response, seconds=time.perf_counter() - start_time
+        )
+
+    async def run(
+        self, items: list[BatchItem], concurrency: int | None = None
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Executa o lote e entrega cada resultado assim que o turno termina; encerrar o
+        iterador antes do fim (ex.: cliente desconectado) cancela os turnos em execução
+        """
+        limit = min(concurrency or self.max_concurrent, self.max_concurrent)
+        threads: dict[str, deque[BatchItem]] = {}
+        for item in items:
+            threads.setdefault(item.phone, deque()).append(item)
+        upstreams = deque(dict.fromkeys(item.upstream for item in items))
+        running: dict[asyncio.Task, BatchItem] = {}
+        logger.info(
+            f"Lote iniciado: {len(items)} turnos, {len(threads)} conversas, "
+            f"concorrência {limit}"
+        )
+
+        try:
+            while threads or running:
+                item = None
+                if len(running) < limit:
+                    busy_threads = {
+                        running_item.phone for running_item in running.values()
+                    }
+                    item = self._next(threads, busy_threads, upstreams)
+                if item is not None:
+                    self._acquire(item.upstream)
+                    task = asyncio.create_task(self._execute(item))
+                    # Callback (e não finally): libera a vaga mesmo se a tarefa for
+                    # cancelada antes de começar
+                    task.add_done_callback(
+                        lambda _, upstream=item.upstream: self._release(upstream)
+                    )
+                    running[task] = item
+                    continue
+
+                # Sem turno elegível: aguarda um turno do lote ou uma vaga de outro lote
+                released = asyncio.ensure_future(self._released.wait())
+                try:
+                    done, _ = await asyncio.wait(
+                        {*running, released}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    released.cancel()
+                for task in done:
+                    if task in running:
+                        del running[task]
+                        yield task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                logger.warning(
+                    f"Lote interrompido; {len(running)} turnos em execução cancelados"
+                )
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+from contextlib import suppress
+from typing import Awaitable, Callable, Collection
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.infrastructure.database.chat_job_repository import (
+    DONE,
+    FAILED,
+    ChatJob,
+    InMemoryChatJobRepository,
+    PostgresChatJobRepository,
+)
+from app.infrastructure.observability.metrics import (
+    CHAT_JOB_CALLBACKS,
+    CHAT_JOBS,
+    CHAT_JOBS_IN_FLIGHT,
+)
+from app.infrastructure.observability.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
+
+
+class ChatJobWorker:
+    """
+    Pool de workers que consome a fila de turnos assíncronos com concorrência limitada
+    e entrega o resultado por POST na URL de callback do job (ou na URL padrão).
+
+    Cada worker busca um job por vez; um enqueue local acorda os workers na hora e,
+    entre réplicas, a fila é consultada a cada poll_interval. Durante a execução o
+    lease do job é renovado periodicamente, para que outra réplica não o retome. Um
+    job que falhou volta à fila após retry_backoff segundos, dobrados a cada tentativa,
+    para não esgotar as tentativas contra um agente remoto que já está falhando.
+
+    URLs de callback informadas pelo cliente só são aceitas se forem a URL padrão ou
+    apontarem para um host de callback_hosts; as demais são recusadas (evita que a
+    aplicação seja usada para enviar requisições a endereços internos).
+    """
+
+    def __init__(
+        self,
+        repository: PostgresChatJobRepository | InMemoryChatJobRepository,
+        handler: Callable[[str, str], Awaitable[str]],
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 5.0,
+        default_callback_url: str | None = None,
+        callback_timeout: float = 10.0,
+        callback_retries: int = 3,
+        callback_hosts: Collection[str] = (),
+    ):
+        self.repository = repository
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.default_callback_url = default_callback_url or None
+        self.callback_timeout = callback_timeout
+        self.callback_retries = callback_retries
+        self.callback_hosts = {host.lower() for host in callback_hosts}
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def callback_allowed(self, url: str) -> bool:
+        """
+        A URL é a de callback padrão ou usa http(s) com um host permitido
+        """
+        if url == self.default_callback_url:
+            return True
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return False
+        return (
+            parts.scheme in ("http", "https")
+            and parts.hostname is not None
+            and parts.hostname.lower() in self.callback_hosts
+        )
+
+    async def enqueue(
+        self, phone: str, message: str, callback_url: str | None = None
+    ) -> ChatJob:
+        if callback_url and not self.callback_allowed(callback_url):
+            raise ValueError(f"URL de callback não permitida: {callback_url}")
+        job = await self.repository.enqueue(phone, message, callback_url)
+        CHAT_JOBS.labels("queued").inc()
+        self._wakeup.set()
+        return job
+
+    def start(self) -> None:
+        if self.running or self.concurrency <= 0:
+            return
+        self._client = httpx.AsyncClient(timeout=self.callback_timeout)
+        self._tasks = [
+            asyncio.create_task(self._loop()) for _ in range(self.concurrency)
+        ]
+        logger.info(f"{self.concurrency} workers de jobs assíncronos iniciados")
+
+    async def stop(self) -> None:
+        """
+        Cancela os workers; jobs interrompidos voltam à fila
+        """
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                jobs = await self.repository.claim(
+                    1, self.lease_seconds, self.max_attempts
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao buscar jobs na fila: {e}")
+                jobs = []
+
+            if not jobs:
+                self._wakeup.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                continue
+            for job in jobs:
+                with log_context(job_id=job.id, thread_id=job.phone):
+                    if job.status == FAILED:
+                        # Tentativas esgotadas com o worker encerrado no meio
+                        logger.error(f"Job {job.id} falhou: {job.error}")
+                        CHAT_JOBS.labels(FAILED).inc()
+                        await self._deliver(job)
+                    else:
+                        await self._process(job)
+            # Outro job do mesmo telefone pode ter sido liberado por este
+            self._wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        """
+        Espera antes da próxima tentativa de um job que já executou attempts vezes
+        """
+        return self.retry_backoff * 2 ** max(attempts - 1, 0)
+
+    async def _heartbeat(self, job: ChatJob) -> None:
+        """
+        Renova o lease do job enquanto o turno executa
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.repository.extend_lease(job.id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Falha ao renovar o lease do job {job.id}: {e}")
+
+    async def _process(self, job: ChatJob) -> None:
+        CHAT_JOBS_IN_FLIGHT.inc()
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            response = await self.handler(job.message, job.phone)
+        except asyncio.CancelledError:
+            await asyncio.shield(self.repository.release(job.id))
+            raise
+        except Exception as e:
+            retry = job.attempts < self.max_attempts
+            logger.error(f"Erro no job {job.id} (tentativa {job.attempts}): {e}")
+            await self.repository.fail(
+                job.id, str(e), retry=retry, retry_delay=self.retry_delay(job.attempts)
+            )
+            CHAT_JOBS.labels("retried" if retry else FAILED).inc()
+            if not retry:
+                job.status, job.error = FAILED, str(e)
+                await self._deliver(job)
+            return
+        finally:
+            heartbeat.cancel()
+            CHAT_JOBS_IN_FLIGHT.dec()
+
+        await self.repository.complete(job.id, response)
+        CHAT_JOBS.labels(DONE).inc()
+        job.status, job.response, job.error = DONE, response, None
+        await self._deliver(job)
+
+    async def _deliver(self, job: ChatJob) -> None:
+        url = job.callback_url or self.default_callback_url
+        if not url or self._client is None:
+            return
+        if not self.callback_allowed(url):
+            # Job enfileirado antes da restrição (ou com a lista de hosts alterada)
+            logger.warning(f"Callback do job {job.id} ignorado: URL não permitida")
+            CHAT_JOB_CALLBACKS.labels("failed").inc()
+            await self.repository.set_callback_status(job.id, "rejected")
+            return
+        payload = {
+            "job_id": job.id,
+            "phone": job.phone,
+            "status": job.status,
+            "message": job.response,
+            "error": job.error,
+        }
+        for attempt in range(self.callback_retries + 1):
+            try:
+                response = await self._client.post(url, json=payload)
+                if response.status_code < 300:
+                    CHAT_JOB_CALLBACKS.labels("delivered").inc()
+                    await self.repository.set_callback_status(job.id, "delivered")
+                    return
+                error = f"status {response.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            logger.warning(f"Falha ao entregar o callback do job {job.id} ({error})")
+            if attempt < self.callback_retries:
+                await asyncio.sleep(random.uniform(0, 0.5 * 2**attempt))
+        CHAT_JOB_CALLBACKS.labels("failed").inc()
+        await self.repository.set_callback_status(job.id, "failed")
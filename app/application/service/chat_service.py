@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from langchain_core.messages import HumanMessage
+from langgraph.store.base import BaseStore
+
+from app.application.agent.proxy_agent_cache import ProxyAgentCache
+from app.application.agent.system_prompt import MEMORY_CONTEXT_KEY
+from app.application.deadline import (
+    DEADLINE_CONFIG_KEY,
+    Deadline,
+    current_deadline,
+    deadline_scope,
+)
+from app.application.memory.memory_retriever import MemoryRetriever
+from app.application.service.keyed_lock import KeyedLock
+from app.application.tool.service_budget_agent_tool import (
+    service_budget_prefetcher,
+    speculate_service_and_budget,
+)
+from app.infrastructure.observability.metrics import (
+    DEADLINE_EXCEEDED,
+    GRAPH_INVOKE_SECONDS,
+    GRAPH_RUNS_IN_FLIGHT,
+    metrics_callback,
+)
+from app.infrastructure.observability.structured_logging import log_context
+from app.infrastructure.observability.tracing import tracing_callbacks
+
+logger = logging.getLogger(__name__)
+
+SUPERVISOR_NODE = "supervisor"
+HANDOFF_TOOL_PREFIX = "transfer_to_"
+
+# Resposta enviada quando o turno não termina dentro do prazo
+DEADLINE_REPLY = (
+    "Desculpe a demora! Estou com uma instabilidade para concluir sua solicitação. "
+    "Pode me enviar a mensagem novamente em instantes?"
+)
+
+
+class ChatService:
+    """
+    Executa um turno de conversa no grafo supervisor (resposta completa ou em streaming)
+    """
+
+    def __init__(
+        self,
+        proxy_agent_cache: ProxyAgentCache,
+        store: BaseStore,
+        memory_retriever: MemoryRetriever | None = None,
+        deadline_seconds: float = 0.0,
+        speculative_prefetch: bool = False,
+    ):
+        self.proxy_agent_cache = proxy_agent_cache
+        self.store = store
+        self.memory_retriever = memory_retriever or MemoryRetriever(store)
+        # Prazo padrão do turno quando o chamador não definiu um (0 = sem prazo)
+        self.deadline_seconds = deadline_seconds
+        self.speculative_prefetch = speculative_prefetch
+        # Duas execuções nunca se intercalam no mesmo checkpoint (thread)
+        self.thread_locks = KeyedLock()
+
+    def _deadline(self) -> Deadline | None:
+        deadline = current_deadline()
+        if deadline is None and self.deadline_seconds > 0:
+            deadline = Deadline.after(self.deadline_seconds)
+        return deadline
+
+    async def prepare_turn(self, message_text: str, phone: str) -> tuple[dict, dict]:
+        """
+        Monta o estado inicial e a configuração do grafo para a mensagem
+        """
+        thread_id = phone
+        user_id = phone
+
+        # Apenas as memórias mais relevantes para a mensagem (limitadas a top_k)
+        memories = await self.memory_retriever.search(user_id, str(message_text))
+        info = "\n".join(memories)
+
+        # Se o usuário pedir para lembrar algo, persistir memória simples
+        lower = (message_text or "").lower()
+        if "lembre" in lower or "remember" in lower:
+            # Heurística: extrair após ':' se existir
+            to_remember = (
+                message_text.split(":", 1)[-1].strip()
+                if ":" in message_text
+                else message_text
+            )
+            await self.memory_retriever.remember(user_id, to_remember)
+
+        # Apenas a mensagem do usuário entra no estado (e no checkpoint); persona e
+        # memórias são injetadas pelo prompt dos agentes a cada chamada ao modelo
+        initial_state = {"messages": [HumanMessage(content=message_text)]}
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "user_id": user_id,
+                MEMORY_CONTEXT_KEY: info,
+            },
+            # Duração e tokens de cada chamada ao modelo, por agente (e spans, com tracing)
+            "callbacks": [metrics_callback, *tracing_callbacks()],
+        }
+        deadline = current_deadline()
+        if deadline is not None:
+            config["configurable"][DEADLINE_CONFIG_KEY] = deadline.expires_at
+        return initial_state, config
+
+    @contextmanager
+    def _speculate(self, message_text: str, phone: str) -> Iterator[None]:
+        """
+        Inicia as chamadas da ferramenta de orçamento + "como funciona" em paralelo ao
+        roteamento quando a mensagem indica esse destino; o que não for consumido pela
+        ferramenta é descartado ao fim do turno
+        """
+        if not self.speculative_prefetch or not speculate_service_and_budget(
+            phone, message_text
+        ):
+            yield
+            return
+        try:
+            yield
+        finally:
+            service_budget_prefetcher.finish(phone)
+
+    @asynccontextmanager
+    async def _measure(self, mode: str):
+        """
+        Mede a execução do grafo (em andamento e duração por resultado)
+        """
+        start_time = time.perf_counter()
+        outcome = "error"
+        GRAPH_RUNS_IN_FLIGHT.inc()
+        try:
+            yield
+            outcome = "success"
+        except (asyncio.CancelledError, TimeoutError):
+            # Prazo do turno expirado ou cliente desconectado
+            outcome = "cancelled"
+            raise
+        finally:
+            GRAPH_RUNS_IN_FLIGHT.dec()
+            GRAPH_INVOKE_SECONDS.labels(mode, outcome).observe(
+                time.perf_counter() - start_time
+            )
+
+    async def run(self, message_text: str, phone: str) -> str:
+        """
+        Executa o supervisor e retorna o texto da resposta final; se o prazo do turno
+        expirar, o trabalho pendente é cancelado e a resposta padrão é retornada
+        """
+        deadline = self._deadline()
+        timeout = asyncio.timeout(deadline.remaining() if deadline else None)
+        try:
+            with deadline_scope(deadline), log_context(thread_id=phone):
+                async with timeout:
+                    async with self.thread_locks.hold(phone):
+                        with self._speculate(message_text, phone):
+                            initial_state, config = await self.prepare_turn(
+                                message_text, phone
+                            )
+
+                            # Grafo compilado uma única vez e reutilizado entre requisições
+                            proxy_supervisor = self.proxy_agent_cache.get()
+                            async with self._measure("invoke"):
+                                result = await proxy_supervisor.ainvoke(
+                                    initial_state, config=config
+                                )
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            DEADLINE_EXCEEDED.labels("invoke").inc()
+            logger.warning(f"Prazo do turno expirado - Thread ID: {phone}")
+            return DEADLINE_REPLY
+
+        # Extrai resposta final de forma simples
+        messages = result.get("messages", [])
+        return messages[-1].content
+
+    async def stream(self, message_text: str, phone: str) -> AsyncIterator[dict]:
+        """
+        Executa o supervisor emitindo eventos de progresso e os tokens da resposta final.
+
+        Eventos: route (delegação a um especialista), tool_start, tool_end,
+        token (trecho da resposta final) e message (resposta completa). Respostas que
+        não são geradas pelo supervisor (fast path, especialistas passthrough) chegam
+        em um único token ao fim do turno.
+        Se o prazo do turno expirar, a execução é cancelada e message traz a resposta padrão.
+        """
+        deadline = self._deadline()
+        with deadline_scope(deadline), log_context(thread_id=phone):
+            final_text = None
+            try:
+                async for item in self._stream_events(message_text, phone, deadline):
+                    if item["event"] == "message":
+                        final_text = item["data"]["message"]
+                    else:
+                        yield item
+            except TimeoutError:
+                # Sem prazo, nenhum timeout é do turno
+                if deadline is None:
+                    raise
+                DEADLINE_EXCEEDED.labels("stream").inc()
+                logger.warning(f"Prazo do turno expirado (stream) - Thread ID: {phone}")
+                final_text = DEADLINE_REPLY
+
+            yield {"event": "message", "data": {"message": final_text or ""}}
+
+    async def _stream_events(
+        self, message_text: str, phone: str, deadline: Deadline | None
+    ) -> AsyncIterator[dict]:
+        def remaining() -> float | None:
+            return deadline.remaining() if deadline else None
+
+        # O prazo vale apenas enquanto o grafo trabalha, nunca durante o envio ao cliente
+        async with self.thread_locks.hold(phone, timeout=remaining()):
+            with self._speculate(message_text, phone):
+                async with asyncio.timeout(remaining()):
+                    initial_state, config = await self.prepare_turn(message_text, phone)
+                proxy_supervisor = self.proxy_agent_cache.get()
+
+                final_text = None
+                # Texto já enviado em tokens desde a última delegação
+                streamed = ""
+                async with self._measure("stream"):
+                    events = proxy_supervisor.astream_events(
+                        initial_state, config=config, version="v2"
+                    )
+                    try:
+                        while True:
+                            try:
+                                async with asyncio.timeout(remaining()):
+                                    event = await anext(events)
+                            except StopAsyncIteration:
+                                break
+
+                            kind = event["event"]
+                            name = event.get("name", "")
+                            metadata = event.get("metadata") or {}
+                            top_level_node = (metadata.get("checkpoint_ns") or "").split(
+                                ":"
+                            )[0]
+
+                            if kind == "on_tool_start":
+                                if name.startswith(HANDOFF_TOOL_PREFIX):
+                                    agent = name[len(HANDOFF_TOOL_PREFIX) :]
+                                    streamed = ""
+                                    yield {"event": "route", "data": {"agent": agent}}
+                                else:
+                                    data = {"tool": name, "agent": top_level_node}
+                                    yield {"event": "tool_start", "data": data}
+
+                            elif kind == "on_tool_end" and not name.startswith(
+                                HANDOFF_TOOL_PREFIX
+                            ):
+                                data = {"tool": name, "agent": top_level_node}
+                                yield {"event": "tool_end", "data": data}
+
+                            elif (
+                                kind == "on_chat_model_stream"
+                                and top_level_node == SUPERVISOR_NODE
+                            ):
+                                chunk = event["data"]["chunk"]
+                                # Trechos de tool call (delegação) não fazem parte da resposta ao usuário
+                                if chunk.content and not getattr(
+                                    chunk, "tool_call_chunks", None
+                                ):
+                                    streamed += chunk.content
+                                    yield {
+                                        "event": "token",
+                                        "data": {"text": chunk.content},
+                                    }
+
+                            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                                messages = (event["data"].get("output") or {}).get(
+                                    "messages", []
+                                )
+                                if messages:
+                                    final_text = messages[-1].content
+                    finally:
+                        # Cancela a execução pendente do grafo (prazo expirado ou cliente desconectado)
+                        await events.aclose()
+
+                # Resposta sem tokens do supervisor (fast path, passthrough): o restante
+                # do texto vai como último token
+                if (
+                    final_text
+                    and final_text.startswith(streamed)
+                    and final_text != streamed
+                ):
+                    yield {
+                        "event": "token",
+                        "data": {"text": final_text[len(streamed) :]},
+                    }
+                yield {"event": "message", "data": {"message": final_text or ""}}
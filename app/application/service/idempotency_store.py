@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Collection, Protocol
+
+from app.application.deadline import DeadlineExceeded, current_deadline
+from app.application.tool.response_cache import ResponseCache
+from app.infrastructure.database.idempotency_repository import IdempotencyClaim
+from app.infrastructure.observability.metrics import CHAT_DUPLICATE_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "chat_idempotency"
+
+
+class IdempotencyPersistence(Protocol):
+    """
+    Reservas compartilhadas entre réplicas (ex.: Postgres)
+    """
+
+    async def claim(
+        self, key: str, lease_seconds: float, ttl_seconds: float
+    ) -> IdempotencyClaim: ...
+
+    async def complete(
+        self, key: str, owner: str, response: str, ttl_seconds: float
+    ) -> None: ...
+
+    async def release(self, key: str, owner: str) -> None: ...
+
+
+class IdempotencyStore:
+    """
+    Resultado dos turnos indexado pelo id da mensagem no provedor (ex.: WhatsApp).
+
+    Uma reentrega do mesmo webhook aguarda a execução em andamento ou recebe o
+    resultado guardado, sem executar o grafo de novo. Com Postgres, a primeira entrega
+    reserva a chave na tabela compartilhada antes de executar: reentregas em outras
+    réplicas aguardam (consultando a reserva) o resultado, no máximo até o prazo do
+    turno (DeadlineExceeded). Erros e respostas transitórias (ex.: prazo do turno
+    expirado) não são guardados: a próxima entrega executa o turno normalmente.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+        persistence: IdempotencyPersistence | None = None,
+        lease_seconds: float = 60.0,
+        poll_interval_seconds: float = 0.5,
+        transient_replies: Collection[str] = (),
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.persistence = persistence
+        # Reserva de um turno em execução; vencida, outra entrega pode retomá-lo
+        self.lease_seconds = lease_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.transient_replies = tuple(transient_replies)
+        self._results = ResponseCache(
+            NAMESPACE, ttl_seconds=ttl_seconds, max_entries=max_entries
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key(kind: str, phone: str, message_id: str) -> str:
+        return f"{kind}:{phone}:{message_id}"
+
+    async def run(self, key: str, handler: Callable[[], Awaitable[str]]) -> str:
+        """
+        Executa o handler uma única vez por chave e retorna o resultado
+        """
+        while True:
+            stored = self._results.get(key)
+            if stored is not None:
+                self._record_duplicate(key)
+                return stored
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                result = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # A requisição que iniciou o turno foi cancelada: tenta novamente
+                if inflight.cancelled():
+                    continue
+                raise
+            self._record_duplicate(key)
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result, executed = await self._run_once(key, handler)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando não há outros aguardando
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._inflight.pop(key, None)
+
+        if not executed:
+            self._record_duplicate(key)
+        elif not self._is_transient(result):
+            self._results.set(key, result)
+        return result
+
+    async def _run_once(
+        self, key: str, handler: Callable[[], Awaitable[str]]
+    ) -> tuple[str, bool]:
+        """
+        Executa o handler após reservar a chave, ou retorna o resultado da execução de
+        outra réplica; o segundo valor indica se o handler foi executado aqui
+        """
+        if self.persistence is None:
+            return await handler(), True
+
+        deadline = current_deadline()
+        while True:
+            try:
+                claim = await self.persistence.claim(
+                    key, self.lease_seconds, self.ttl_seconds
+                )
+            except Exception as e:
+                # Sem a tabela compartilhada, a deduplicação vale apenas nesta réplica
+                logger.warning(f"Falha ao reservar chave de idempotência {key}: {e}")
+                return await handler(), True
+            if claim.acquired:
+                break
+            if claim.response is not None:
+                self._results.set(key, claim.response)
+                return claim.response, False
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(
+                    f"Prazo do turno expirado aguardando a execução em outra réplica - {key}"
+                )
+            interval = self.poll_interval_seconds
+            if deadline is not None:
+                interval = min(interval, deadline.remaining())
+            await asyncio.sleep(interval)
+
+        try:
+            result = await handler()
+        except BaseException:
+            await self._release(key, claim.owner)
+            raise
+        if self._is_transient(result):
+            await self._release(key, claim.owner)
+            return result, True
+        try:
+            await self.persistence.complete(key, claim.owner, result, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar resultado de idempotência {key}: {e}")
+        return result, True
+
+    def _is_transient(self, result: str) -> bool:
+        # A resposta padrão pode vir junto de outro texto (ex.: "como funciona" + erro)
+        return any(reply in result for reply in self.transient_replies)
+
+    async def _release(self, key: str, owner: str) -> None:
+        try:
+            await self.persistence.release(key, owner)
+        except Exception as e:
+            # A reserva expira com o lease
+            logger.warning(f"Falha ao liberar chave de idempotência {key}: {e}")
+
+    @staticmethod
+    def _record_duplicate(key: str) -> None:
+        CHAT_DUPLICATE_MESSAGES.inc()
+        logger.info(f"Mensagem duplicada ignorada; resultado reaproveitado - {key}")
+
+    def snapshot(self) -> dict:
+        return {
+            **self._results.snapshot(),
+            "in_flight": len(self._inflight),
+            "shared": self.persistence is not None,
+        }
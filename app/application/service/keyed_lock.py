@@ -0,0 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class KeyedLock:
+    """
+    Um asyncio.Lock por chave (ex.: thread_id), descartado quando não há mais usuários
+    """
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._users: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str, timeout: float | None = None) -> AsyncIterator[None]:
+        """
+        Mantém o lock da chave; a espera pelo lock é limitada a timeout (TimeoutError)
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with asyncio.timeout(timeout):
+                await lock.acquire()
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._users[key] -= 1
+            if self._users[key] == 0:
+                del self._users[key]
+                del self._locks[key]
+
+    def waiting(self, key: str) -> int:
+        """
+        Quantidade de execuções em andamento ou aguardando para a chave
+        """
+        return self._users.get(key, 0)
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    messages: list[str]
+    future: asyncio.Future
+    started_at: float = field(default_factory=time.monotonic)
+    timer: asyncio.TimerHandle | None = None
+
+
+class MessageCoalescer:
+    """
+    Agrupa mensagens consecutivas do mesmo telefone em um único turno.
+    O handler recebe (mensagem, telefone), como ChatService.run.
+
+    Cada mensagem reinicia a janela de espera (limitada por max_wait). Ao fim da
+    janela, as mensagens são unidas e o handler é executado uma única vez; todas
+    as requisições que aguardavam recebem a mesma resposta.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str], Awaitable[str]],
+        window_seconds: float,
+        max_wait_seconds: float,
+        max_messages: int = 10,
+    ):
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_messages = max_messages
+        self._bursts: dict[str, _Burst] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    async def submit(self, phone: str, message: str) -> str:
+        """
+        Adiciona a mensagem ao grupo aberto do telefone e aguarda a resposta do turno
+        """
+        if not self.enabled:
+            return await self.handler(message, phone)
+
+        loop = asyncio.get_running_loop()
+        burst = self._bursts.get(phone)
+        if burst is None:
+            burst = _Burst(messages=[], future=loop.create_future())
+            self._bursts[phone] = burst
+
+        burst.messages.append(message)
+        if burst.timer is not None:
+            burst.timer.cancel()
+
+        elapsed = time.monotonic() - burst.started_at
+        delay = min(self.window_seconds, max(0.0, self.max_wait_seconds - elapsed))
+        if len(burst.messages) >= self.max_messages:
+            delay = 0.0
+        burst.timer = loop.call_later(delay, self._flush, phone, burst)
+
+        # shield: o cancelamento de uma requisição não cancela o turno das demais
+        return await asyncio.shield(burst.future)
+
+    def _flush(self, phone: str, burst: _Burst) -> None:
+        if self._bursts.get(phone) is burst:
+            del self._bursts[phone]
+        task = asyncio.ensure_future(self._run(phone, burst))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, phone: str, burst: _Burst) -> None:
+        merged = "\n".join(m.strip() for m in burst.messages if m and m.strip())
+        if len(burst.messages) > 1:
+            logger.info(
+                f"{len(burst.messages)} mensagens agrupadas em um turno - {phone}"
+            )
+        try:
+            result = await self.handler(merged, phone)
+        except Exception as e:
+            burst.future.set_exception(e)
+            # Evita "exception was never retrieved" se todos os chamadores desistiram
+            burst.future.exception()
+        else:
+            burst.future.set_result(result)
@@ -1,9 +1,35 @@
+import logging
+
 import httpx
 from langchain_core.tools import tool
 
-import logging
+from app.application.tool.budget_query_normalizer import normalize_budget_query
+from app.application.tool.http_client_registry import (
+    BUDGET_AGENT,
+    UpstreamStatusError,
+    http_client_registry,
+)
+from app.application.tool.resilience import CircuitOpenError
+from app.application.tool.response_cache import create_response_cache
+from app.config.settings import get_settings
+from app.infrastructure.observability.structured_logging import log_payload
+
 logger = logging.getLogger(__name__)
 
+# Resposta imediata ao cliente quando o agente de orçamentos está fora do ar
+BUDGET_UNAVAILABLE_REPLY = (
+    "No momento não consigo consultar os valores. "
+    "Um atendente vai te enviar o orçamento em instantes."
+)
+
+# Respostas já formatadas, indexadas pela forma normalizada do pedido
+budget_cache = create_response_cache(
+    "budget",
+    ttl_seconds=get_settings().budget_cache_ttl,
+    max_entries=get_settings().tool_cache_max_entries,
+)
+
+
 def _format_currency_br(value: object) -> str:
     try:
         num = float(value)
@@ -13,6 +39,7 @@ def _format_currency_br(value: object) -> str:
     # Converte para padrão brasileiro (ponto milhar, vírgula decimal)
     return s.replace(",", "X").replace(".", ",").replace("X", ".")
 
+
 def _format_services(services: list[dict]) -> str:
     lines: list[str] = []
     for item in services or []:
@@ -27,15 +54,13 @@ def _format_services(services: list[dict]) -> str:
         lines.append(f"- {name}: R$ {price_txt}")
     return "\n".join(lines)
 
+
 def _compose_budget_text(result: dict | object) -> str:
     if not isinstance(result, dict):
         return str(result)
 
     header = (
-        result.get("response")
-        or result.get("message")
-        or result.get("answer")
-        or ""
+        result.get("response") or result.get("message") or result.get("answer") or ""
     )
     services = result.get("services") or []
     qty = result.get("quantity")
@@ -53,26 +78,51 @@ def _compose_budget_text(result: dict | object) -> str:
     # rótulos extras para cumprir a regra de não inventar texto.
     return final_text
 
+
+async def fetch_budget_info(query: str) -> str:
+    """
+    Consulta o agente de orçamentos; levanta exceção em caso de erro HTTP/rede
+    """
+    payload = {"message": (query or "").strip()}
+
+    response = await http_client_registry.post(BUDGET_AGENT, payload)
+    if response.status_code != 200:
+        raise UpstreamStatusError(BUDGET_AGENT, response.status_code, response.text)
+
+    result = response.json()
+    log_payload(logger, "Resposta do agente de orçamentos", result)
+    return _compose_budget_text(result)
+
+
+async def invalidate_budget_cache() -> None:
+    """
+    Descarta os orçamentos cacheados (ex.: após alteração da tabela de preços)
+    """
+    await budget_cache.invalidate()
+    logger.info("Cache de orçamentos invalidado")
+
+
 @tool
 async def get_budget_info(query: str) -> str:
     """
     Acessa o agente de orçamentos para obter informações sobre o orçamento.
     """
-    url = "https://budget-agent.livelygrass-5e1cbc66.brazilsouth.azurecontainerapps.io/chat"
-    payload = {"message": (query or "").strip()}
-    headers = {"Content-Type": "application/json"}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload, timeout=30.0, headers=headers)
-            result = response.json() if response.status_code == 200 else None
-            logger.info(f"Resposta do agente de orçamentos: {result}")
-            if response.status_code == 200:
-                return _compose_budget_text(result)
-            return f"Erro ao consultar dados de orçamento. Status: {response.status_code}"
-        except httpx.TimeoutException:
-            return "Timeout: O agente de orçamentos demorou para responder."
-        except httpx.ConnectError:
-            return "Erro de conexão: Não foi possível conectar ao agente de orçamentos."
-        except Exception as e:
-            return f"Erro inesperado ao consultar dados de orçamento: {str(e)}"
+    cache_key = normalize_budget_query(query).cache_key
+
+    try:
+        if cache_key is None:
+            # Pedido sem conteúdo além de "quanto custa?": a resposta depende do contexto
+            return await fetch_budget_info(query)
+        return await budget_cache.get_or_load(
+            cache_key, lambda: fetch_budget_info(query)
+        )
+    except CircuitOpenError:
+        return BUDGET_UNAVAILABLE_REPLY
+    except UpstreamStatusError as e:
+        return f"Erro ao consultar dados de orçamento. Status: {e.status_code}"
+    except httpx.TimeoutException:
+        return "Timeout: O agente de orçamentos demorou para responder."
+    except httpx.ConnectError:
+        return "Erro de conexão: Não foi possível conectar ao agente de orçamentos."
+    except Exception as e:
+        return f"Erro inesperado ao consultar dados de orçamento: {str(e)}"
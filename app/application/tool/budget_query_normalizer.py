@@ -0,0 +1,259 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Variações de escrita -> item canônico
+_ITEMS = {
+    "sofa": "sofa",
+    "sofas": "sofa",
+    "cadeira": "cadeira",
+    "cadeiras": "cadeira",
+    "poltrona": "poltrona",
+    "poltronas": "poltrona",
+    "colchao": "colchao",
+    "colchoes": "colchao",
+    "tapete": "tapete",
+    "tapetes": "tapete",
+    "puff": "puff",
+    "puffs": "puff",
+    "pufe": "puff",
+    "pufes": "puff",
+    "cabeceira": "cabeceira",
+    "cabeceiras": "cabeceira",
+    "almofada": "almofada",
+    "almofadas": "almofada",
+    "banco": "banco",
+    "bancos": "banco",
+    "estofado": "estofado",
+    "estofados": "estofado",
+    "carpete": "carpete",
+    "carpetes": "carpete",
+}
+
+# Tamanhos que definem a variação do item (colchão, cabeceira, tapete...)
+_SIZES = {
+    "solteiro",
+    "casal",
+    "queen",
+    "king",
+    "pequeno",
+    "pequena",
+    "medio",
+    "media",
+    "grande",
+}
+
+# Negação torna o pedido ambíguo ("não quero 3 lugares, quero 2 lugares")
+_NEGATION_WORDS = {"nao", "nem", "exceto", "menos"}
+
+_NUMBER_WORDS = {
+    "um": 1,
+    "uma": 1,
+    "dois": 2,
+    "duas": 2,
+    "tres": 3,
+    "quatro": 4,
+    "cinco": 5,
+    "seis": 6,
+    "sete": 7,
+    "oito": 8,
+    "nove": 9,
+    "dez": 10,
+    "doze": 12,
+}
+
+_SERVICE_PATTERNS = (
+    ("impermeabilizacao", re.compile(r"\bimpermeabiliz\w*")),
+    ("higienizacao", re.compile(r"\b(higieniz|limp|lava)\w*")),
+)
+
+# Palavras que não mudam o pedido de orçamento
+_FILLER_WORDS = {
+    "quanto",
+    "custa",
+    "custaria",
+    "fica",
+    "ficaria",
+    "valor",
+    "valores",
+    "preco",
+    "precos",
+    "orcamento",
+    "cotacao",
+    "qual",
+    "quais",
+    "o",
+    "a",
+    "os",
+    "as",
+    "de",
+    "do",
+    "da",
+    "dos",
+    "das",
+    "para",
+    "pra",
+    "por",
+    "um",
+    "uma",
+    "e",
+    "me",
+    "ola",
+    "oi",
+    "bom",
+    "boa",
+    "dia",
+    "tarde",
+    "noite",
+    "favor",
+    "gostaria",
+    "queria",
+    "quero",
+    "saber",
+    "teria",
+    "tem",
+    "seria",
+    "sobre",
+    "meu",
+    "minha",
+    "com",
+    "no",
+    "na",
+    "nos",
+    "nas",
+    "em",
+    "ao",
+    "pro",
+    "que",
+    "voce",
+    "voces",
+    "vc",
+    "vcs",
+    "servico",
+    "fazer",
+    "faz",
+    "fazem",
+    "sai",
+    "cobra",
+    "cobram",
+    "preciso",
+    "precisava",
+}
+
+_SEATS_RE = re.compile(r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")\s*lugar(?:es)?\b")
+_QUANTITY_RE = re.compile(r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")\b")
+
+
+@dataclass(frozen=True)
+class BudgetQuery:
+    """
+    Forma normalizada de um pedido de orçamento
+    """
+
+    folded: str
+    service: str
+    item: str | None = None
+    variant: str | None = None
+    quantity: int | None = None
+    # O serviço foi citado no texto (e não assumido como higienização)
+    explicit_service: bool = False
+    # Demais palavras do pedido (ex.: "retratil", "couro", "canto"), na ordem do texto
+    qualifiers: tuple[str, ...] = ()
+    # Algum item foi citado, mesmo que o pedido não tenha um item único sem ambiguidade
+    mentions_item: bool = False
+    # Item no plural sem quantidade ("cadeiras"): a quantidade não é 1
+    plural: bool = False
+
+    @property
+    def cache_key(self) -> str | None:
+        """
+        Chave do orçamento no cache, ou None se o pedido não deve ser cacheado (nada
+        além de palavras de preenchimento, ex.: "quanto custa?")
+        """
+        if self.item is None:
+            words = [w for w in self.folded.split() if w not in _FILLER_WORDS]
+            return "text:" + " ".join(words) if words else None
+        quantity = self.quantity or ("" if self.plural else 1)
+        return (
+            f"item:{self.service}|{self.item}|{self.variant or ''}|{quantity}"
+            f"|{' '.join(self.qualifiers)}"
+        )
+
+
+def fold_text(text: str) -> str:
+    """
+    Remove acentos, pontuação e diferenças de caixa/espaços
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = re.sub(r"[^a-z0-9]+", " ", without_accents.lower())
+    return " ".join(cleaned.split())
+
+
+def _to_int(token: str) -> int:
+    return int(token) if token.isdigit() else _NUMBER_WORDS[token]
+
+
+def _is_known_word(token: str) -> bool:
+    """
+    Palavra já representada na chave (serviço, item, tamanho, quantidade) ou irrelevante
+    """
+    return (
+        token in _FILLER_WORDS
+        or token in _ITEMS
+        or token in _SIZES
+        or token.isdigit()
+        or token in _NUMBER_WORDS
+        or any(pattern.match(token) for _, pattern in _SERVICE_PATTERNS)
+    )
+
+
+def normalize_budget_query(query: str) -> BudgetQuery:
+    """
+    Extrai serviço, item (com variação), quantidade e demais qualificadores de um
+    pedido de orçamento. Pedidos ambíguos (mais de um item, de número de lugares, de
+    tamanho ou de quantidade, ou com negação) usam apenas o texto normalizado.
+    """
+    folded = fold_text(query)
+    tokens = folded.split()
+
+    services = [name for name, pattern in _SERVICE_PATTERNS if pattern.search(folded)]
+    # Sem serviço explícito, o pedido padrão da empresa é a higienização
+    service = "+".join(sorted(services)) if services else "higienizacao"
+
+    items = {_ITEMS[t] for t in tokens if t in _ITEMS}
+    text_only = BudgetQuery(
+        folded=folded,
+        service=service,
+        explicit_service=bool(services),
+        mentions_item=bool(items),
+    )
+    if len(items) != 1 or _NEGATION_WORDS.intersection(tokens):
+        return text_only
+    item = items.pop()
+    # As formas no plural de _ITEMS terminam em "s" e as do singular, não
+    plural = any(t in _ITEMS and t.endswith("s") for t in tokens)
+
+    seats = {_to_int(m.group(1)) for m in _SEATS_RE.finditer(folded)}
+    sizes = {t for t in tokens if t in _SIZES}
+    if len(seats) > 1 or len(sizes) > 1:
+        return text_only
+    variant_parts = [f"{seats.pop()} lugares"] if seats else []
+    variant_parts.extend(sizes)
+
+    without_seats = _SEATS_RE.sub(" ", folded)
+    quantities = [_to_int(m.group(1)) for m in _QUANTITY_RE.finditer(without_seats)]
+    if len(quantities) > 1:
+        return text_only
+
+    return BudgetQuery(
+        folded=folded,
+        service=service,
+        item=item,
+        variant=" ".join(variant_parts) or None,
+        quantity=quantities[0] if quantities else None,
+        explicit_service=bool(services),
+        qualifiers=tuple(t for t in without_seats.split() if not _is_known_word(t)),
+        mentions_item=True,
+        plural=plural and not quantities,
+    )
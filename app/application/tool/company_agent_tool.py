@@ -1,58 +1,81 @@
+import logging
+
 import httpx
 from langchain_core.tools import tool
-import logging
+
+from app.application.tool.http_client_registry import (
+    COMPANY_AGENT,
+    UpstreamStatusError,
+    http_client_registry,
+)
+from app.application.tool.resilience import CircuitOpenError
+from app.infrastructure.observability.structured_logging import log_payload
 
 logger = logging.getLogger(__name__)
 
+# Resposta imediata ao cliente quando o agente da empresa está fora do ar
+COMPANY_UNAVAILABLE_REPLY = (
+    "No momento não consigo buscar essas informações. "
+    "Um atendente vai te responder em instantes."
+)
+
+
+async def fetch_company_info(query: str) -> str:
+    """
+    Consulta o agente da empresa; levanta exceção em caso de erro HTTP/rede
+    """
+    response = await http_client_registry.post(COMPANY_AGENT, {"message": query})
+
+    if response.status_code != 200:
+        raise UpstreamStatusError(COMPANY_AGENT, response.status_code, response.text)
+
+    result = response.json()
+
+    # Extrai a resposta dependendo da estrutura retornada
+    if isinstance(result, dict):
+        # Tenta diferentes campos possíveis de resposta
+        return (
+            result.get("response")
+            or result.get("message")
+            or result.get("answer")
+            or str(result)
+        )
+    return str(result)
+
+
 @tool
 async def get_company_info(query: str) -> str:
     """
-    Consulta informações sobre a empresa, serviços oferecidos, produtos, 
+    Consulta informações sobre a empresa, serviços oferecidos, produtos,
     ou qualquer pergunta relacionada aos dados corporativos.
     Use esta ferramenta para perguntas sobre a empresa.
     Dê preferência em como funciona a higienização
     """
-    logger.info(f"Consultando agente da empresa: {query}")
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://conversation-agent.livelygrass-5e1cbc66.brazilsouth.azurecontainerapps.io/api/gateway",
-                json={"message": query},
-                timeout=30.0,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extrai a resposta dependendo da estrutura retornada
-                if isinstance(result, dict):
-                    # Tenta diferentes campos possíveis de resposta
-                    company_response = (
-                        result.get("response") or 
-                        result.get("message") or 
-                        result.get("answer") or 
-                        str(result)
-                    )
-                else:
-                    company_response = str(result)
-                
-                logger.info(f"Resposta recebida do agente da empresa")
-                return company_response
-            else:
-                logger.error(f"Erro HTTP {response.status_code}: {response.text}")
-                return f"Erro ao consultar dados da empresa. Status: {response.status_code}"
-                
-        except httpx.TimeoutException:
-            logger.error("Timeout ao chamar agente da empresa")
-            return "Timeout: O agente da empresa demorou para responder."
-            
-        except httpx.ConnectError:
-            logger.error("Erro de conexão ao chamar agente da empresa")
-            return "Erro de conexão: Não foi possível conectar ao agente da empresa."
-            
-        except Exception as e:
-            logger.error(f"Erro ao consultar agente da empresa: {e}")
-            return f"Erro inesperado ao consultar dados da empresa: {str(e)}"
+    log_payload(logger, "Consultando agente da empresa", query)
+
+    try:
+        company_response = await fetch_company_info(query)
+        logger.info("Resposta recebida do agente da empresa")
+        return company_response
+
+    except CircuitOpenError:
+        logger.warning(
+            "Circuito aberto para o agente da empresa; usando resposta padrão"
+        )
+        return COMPANY_UNAVAILABLE_REPLY
+
+    except UpstreamStatusError as e:
+        logger.error(f"Erro HTTP {e.status_code}: {e.body}")
+        return f"Erro ao consultar dados da empresa. Status: {e.status_code}"
+
+    except httpx.TimeoutException:
+        logger.error("Timeout ao chamar agente da empresa")
+        return "Timeout: O agente da empresa demorou para responder."
+
+    except httpx.ConnectError:
+        logger.error("Erro de conexão ao chamar agente da empresa")
+        return "Erro de conexão: Não foi possível conectar ao agente da empresa."
 
+    except Exception as e:
+        logger.error(f"Erro ao consultar agente da empresa: {e}")
+        return f"Erro inesperado ao consultar dados da empresa: {str(e)}"
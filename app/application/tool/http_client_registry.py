@@ -0,0 +1,215 @@
+import asyncio
+import importlib.util
+import logging
+import time
+
+import httpx
+
+from app.application.deadline import bounded_timeout
+from app.application.tool.resilience import CircuitBreaker, ResilientCaller
+from app.config.settings import UpstreamSettings, get_settings
+from app.infrastructure.observability.metrics import (
+    UPSTREAM_REQUEST_SECONDS,
+    UPSTREAM_REQUESTS_IN_FLIGHT,
+)
+from app.infrastructure.observability.tracing import (
+    inject_trace_headers,
+    record_response,
+    upstream_span,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPANY_AGENT = "company_agent"
+BUDGET_AGENT = "budget_agent"
+CUSTOMER_REGISTRATION_AGENT = "customer_registration_agent"
+
+
+class UpstreamStatusError(Exception):
+    """
+    Resposta HTTP diferente de 200 de um agente remoto
+    """
+
+    def __init__(self, upstream: str, status_code: int, body: str = ""):
+        super().__init__(f"{upstream} respondeu com status {status_code}")
+        self.upstream = upstream
+        self.status_code = status_code
+        self.body = body
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte que mede cada chamada ao agente remoto, por status ou tipo de erro
+    """
+
+    def __init__(self, upstream: str, transport: httpx.AsyncBaseTransport):
+        self.upstream = upstream
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start_time = time.perf_counter()
+        status = "error"
+        UPSTREAM_REQUESTS_IN_FLIGHT.labels(self.upstream).inc()
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        except asyncio.CancelledError:
+            # Requisição abandonada (tentativa perdedora do hedge, prazo do turno ou
+            # cliente desconectado): não é um erro do agente remoto
+            status = "cancelled"
+            raise
+        finally:
+            UPSTREAM_REQUESTS_IN_FLIGHT.labels(self.upstream).dec()
+            UPSTREAM_REQUEST_SECONDS.labels(self.upstream, status).observe(
+                time.perf_counter() - start_time
+            )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HttpClientRegistry:
+    """
+    Registro de clientes HTTP compartilhados, um por agente remoto.
+
+    Cada cliente mantém seu próprio pool de conexões keep-alive, então chamadas
+    consecutivas (e o fan-out paralelo das ferramentas) reaproveitam conexões já
+    abertas em vez de pagar DNS + TCP + TLS a cada chamada.
+    """
+
+    def __init__(self, upstreams: dict[str, UpstreamSettings] | None = None):
+        self._upstreams = upstreams
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._callers: dict[str, ResilientCaller] = {}
+
+    @property
+    def upstreams(self) -> dict[str, UpstreamSettings]:
+        if self._upstreams is None:
+            settings = get_settings()
+            self._upstreams = {
+                COMPANY_AGENT: settings.company_agent,
+                BUDGET_AGENT: settings.budget_agent,
+                CUSTOMER_REGISTRATION_AGENT: settings.customer_registration_agent,
+            }
+        return self._upstreams
+
+    def upstream(self, name: str) -> UpstreamSettings:
+        try:
+            return self.upstreams[name]
+        except KeyError:
+            raise KeyError(f"Agente remoto não configurado: {name}") from None
+
+    def url(self, name: str) -> str:
+        return self.upstream(name).url
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """
+        Retorna o cliente do agente remoto, criando-o na primeira utilização
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name, self.upstream(name))
+            self._clients[name] = client
+        return client
+
+    def caller(self, name: str) -> ResilientCaller:
+        """
+        Política de resiliência do agente remoto (estado do circuito e latências recentes)
+        """
+        caller = self._callers.get(name)
+        if caller is None:
+            upstream = self.upstream(name)
+            caller = ResilientCaller(
+                name,
+                retries=upstream.retries,
+                retry_backoff=upstream.retry_backoff,
+                hedge_quantile=upstream.hedge_quantile,
+                hedge_min_samples=upstream.hedge_min_samples,
+                hedge_min_delay=upstream.hedge_min_delay,
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=upstream.breaker_failure_threshold,
+                    reset_timeout=upstream.breaker_reset_timeout,
+                ),
+            )
+            self._callers[name] = caller
+        return caller
+
+    async def post(self, name: str, payload: dict) -> httpx.Response:
+        """
+        POST ao agente remoto com novas tentativas, hedge e circuit breaker; levanta
+        CircuitOpenError quando o circuito está aberto.
+
+        O timeout de cada tentativa é limitado ao tempo restante do prazo do turno
+        (DeadlineExceeded se já expirou). Cada tentativa é um span próprio.
+        """
+        client = self.client(name)
+        upstream = self.upstream(name)
+
+        async def send():
+            timeout = bounded_timeout(upstream.timeout)
+            with upstream_span(name, upstream.url) as span:
+                response = await client.post(
+                    upstream.url,
+                    json=payload,
+                    timeout=httpx.Timeout(
+                        timeout, connect=min(upstream.connect_timeout, timeout)
+                    ),
+                )
+                record_response(span, response)
+                return response
+
+        return await self.caller(name).call(send)
+
+    def open(self) -> None:
+        """
+        Cria antecipadamente os clientes de todos os agentes remotos configurados
+        """
+        for name in self.upstreams:
+            self.client(name)
+
+    async def aclose(self) -> None:
+        """
+        Fecha todos os clientes (e suas conexões) ao desligar a aplicação
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def _create_client(self, name: str, upstream: UpstreamSettings) -> httpx.AsyncClient:
+        http2 = upstream.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 solicitado para %s, mas o pacote 'h2' não está instalado; usando HTTP/1.1",
+                name,
+            )
+            http2 = False
+
+        logger.info(
+            "Cliente HTTP criado para %s (max_connections=%s, http2=%s)",
+            name,
+            upstream.max_connections,
+            http2,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=upstream.max_connections,
+                max_keepalive_connections=upstream.max_keepalive_connections,
+                keepalive_expiry=upstream.keepalive_expiry,
+            ),
+            http2=http2,
+        )
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(upstream.timeout, connect=upstream.connect_timeout),
+            headers={"Content-Type": "application/json"},
+            transport=InstrumentedTransport(name, transport),
+            # Propaga o trace (W3C traceparent) para os agentes remotos
+            event_hooks={"request": [inject_trace_headers]},
+        )
+
+
+http_client_registry = HttpClientRegistry()
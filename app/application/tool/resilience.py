@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+import httpx
+
+from app.application.deadline import current_deadline
+from app.infrastructure.observability.metrics import (
+    UPSTREAM_BREAKER_REJECTIONS,
+    UPSTREAM_BREAKER_STATE,
+    UPSTREAM_HEDGES,
+    UPSTREAM_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """
+    Chamada recusada sem tentativa: o circuito do agente remoto está aberto
+    """
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(
+            f"Circuito aberto para {upstream} (nova tentativa em {retry_after:.1f}s)"
+        )
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """
+    Janela deslizante das latências recentes bem-sucedidas, para estimar o atraso do hedge
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> float | None:
+        if len(self._samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Abre após failure_threshold falhas consecutivas; depois de reset_timeout deixa
+    passar uma única chamada de teste (half-open), que fecha ou reabre o circuito
+    """
+
+    def __init__(
+        self, upstream: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        UPSTREAM_BREAKER_STATE.labels(upstream).set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuito de {self.upstream}: {self.state} -> {state}")
+            self.state = state
+            UPSTREAM_BREAKER_STATE.labels(self.upstream).set(_STATE_VALUES[state])
+
+    def before_call(self) -> None:
+        """
+        Levanta CircuitOpenError se a chamada não deve ser feita agora
+        """
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return
+        if self.state == OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                UPSTREAM_BREAKER_REJECTIONS.labels(self.upstream).inc()
+                raise CircuitOpenError(self.upstream, remaining)
+            self._set_state(HALF_OPEN)
+        if self._probe_in_flight:
+            UPSTREAM_BREAKER_REJECTIONS.labels(self.upstream).inc()
+            raise CircuitOpenError(self.upstream, 0.0)
+        self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._set_state(CLOSED)
+
+    def release(self) -> None:
+        """
+        Libera a chamada de teste sem resultado (ex.: cancelada)
+        """
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+
+def is_retryable(response: httpx.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class ResilientCaller:
+    """
+    Envia uma chamada ao agente remoto com circuit breaker, novas tentativas com
+    backoff exponencial e jitter e, para consultas idempotentes, hedge: uma segunda
+    requisição disparada após o quantil configurado da latência recente, valendo a
+    primeira resposta bem-sucedida.
+    """
+
+    def __init__(
+        self,
+        upstream: str,
+        retries: int = 0,
+        retry_backoff: float = 0.2,
+        hedge_quantile: float = 0.0,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.05,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.upstream = upstream
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(upstream, failure_threshold=0)
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> float | None:
+        if self.hedge_quantile <= 0:
+            return None
+        delay = self.latency.quantile(self.hedge_quantile, self.hedge_min_samples)
+        return None if delay is None else max(delay, self.hedge_min_delay)
+
+    async def call(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """
+        Retorna a resposta final (inclusive status de erro após esgotar as tentativas);
+        levanta CircuitOpenError ou o erro de rede da última tentativa
+        """
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            error = None
+            try:
+                response = await self._send_hedged(send)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                error = e
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                if not is_retryable(response):
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+
+            # Full jitter: espalha as novas tentativas de várias conversas no tempo
+            backoff = random.uniform(0, self.retry_backoff * 2**attempt)
+            deadline = current_deadline()
+            # Sem nova tentativa se o prazo do turno não comporta sequer a espera
+            if attempt == self.retries or (
+                deadline is not None and deadline.remaining() <= backoff
+            ):
+                if error is not None:
+                    raise error
+                return response
+            UPSTREAM_RETRIES.labels(self.upstream).inc()
+            await asyncio.sleep(backoff)
+        raise AssertionError("unreachable")
+
+    async def _timed_send(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        start_time = time.perf_counter()
+        response = await send()
+        if not is_retryable(response):
+            self.latency.record(time.perf_counter() - start_time)
+        return response
+
+    async def _send_hedged(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed_send(send)
+
+        primary = asyncio.ensure_future(self._timed_send(send))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            UPSTREAM_HEDGES.labels(self.upstream, "sent").inc()
+            hedge = asyncio.ensure_future(self._timed_send(send))
+            tasks.append(hedge)
+            pending = set(tasks)
+            last_outcome = primary
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    last_outcome = task
+                    if task.exception() is None and not is_retryable(task.result()):
+                        if task is hedge:
+                            UPSTREAM_HEDGES.labels(self.upstream, "won").inc()
+                        return task.result()
+            # Ambas falharam: propaga o resultado da última a terminar
+            return last_outcome.result()
+        finally:
+            # A requisição perdedora (ou ambas, se a chamada for cancelada) é abandonada
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class CachePersistence(Protocol):
+    """
+    Armazenamento compartilhado entre réplicas (ex.: Postgres)
+    """
+
+    async def aget(self, namespace: str, key: str) -> tuple[str, float] | None:
+        """Retorna (valor, segundos restantes de validade) ou None"""
+        ...
+
+    async def aput(
+        self, namespace: str, key: str, value: str, ttl_seconds: float
+    ) -> None: ...
+
+    async def adelete(self, namespace: str, key: str | None = None) -> None: ...
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Requisições que aguardaram uma carga já em andamento (single-flight)
+    coalesced: int = 0
+    persistent_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    load_errors: int = 0
+
+
+class ResponseCache:
+    """
+    Cache de respostas das ferramentas com TTL, despejo LRU e limite de tamanho.
+
+    Misses concorrentes para a mesma chave compartilham uma única chamada ao
+    agente remoto (single-flight). Erros não são cacheados. Opcionalmente consulta
+    um armazenamento persistente para compartilhar entradas entre réplicas.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int = 256,
+        persistence: CachePersistence | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persistence = persistence
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> str | None:
+        """
+        Consulta apenas a memória local; não conta como acerto/falha
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[str]]) -> str:
+        """
+        Retorna o valor cacheado ou executa o loader (uma única vez por chave)
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.stats.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.stats.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # A requisição que iniciou a carga foi cancelada: tenta novamente
+                if inflight.cancelled():
+                    continue
+                raise
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats.load_errors += 1
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando não há outros aguardando
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, key: str | None = None) -> None:
+        """
+        Remove uma chave (ou todas, se key for None), inclusive do armazenamento persistente
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        if self.persistence is not None:
+            try:
+                await self.persistence.adelete(self.namespace, key)
+            except Exception as e:
+                logger.warning(
+                    "Falha ao invalidar cache persistente %s: %s", self.namespace, e
+                )
+
+    def snapshot(self) -> dict:
+        return {
+            "namespace": self.namespace,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.persistence is not None,
+            **asdict(self.stats),
+        }
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[str]]) -> str:
+        if self.persistence is not None:
+            try:
+                stored = await self.persistence.aget(self.namespace, key)
+            except Exception as e:
+                logger.warning(
+                    "Falha ao ler cache persistente %s: %s", self.namespace, e
+                )
+                stored = None
+            if stored is not None:
+                value, remaining = stored
+                self.stats.persistent_hits += 1
+                self.set(key, value, ttl_seconds=min(remaining, self.ttl_seconds))
+                return value
+
+        value = await loader()
+        self.set(key, value)
+
+        if self.persistence is not None:
+            try:
+                await self.persistence.aput(self.namespace, key, value, self.ttl_seconds)
+            except Exception as e:
+                logger.warning(
+                    "Falha ao gravar cache persistente %s: %s", self.namespace, e
+                )
+        return value
+
+
+_caches: dict[str, ResponseCache] = {}
+_persistence: CachePersistence | None = None
+
+
+def create_response_cache(
+    namespace: str, ttl_seconds: float, max_entries: int = 256
+) -> ResponseCache:
+    """
+    Cria (ou retorna) o cache registrado para o namespace
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = ResponseCache(
+            namespace,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            persistence=_persistence,
+        )
+        _caches[namespace] = cache
+    return cache
+
+
+def attach_cache_persistence(persistence: CachePersistence | None) -> None:
+    """
+    Liga (ou desliga) o armazenamento persistente em todos os caches registrados
+    """
+    global _persistence
+    _persistence = persistence
+    for cache in _caches.values():
+        cache.persistence = persistence
+
+
+def get_cache_stats() -> dict[str, dict]:
+    """
+    Contadores de acerto/falha de todos os caches registrados
+    """
+    return {namespace: cache.snapshot() for namespace, cache in _caches.items()}
@@ -1,78 +1,127 @@
 import asyncio
+import hashlib
 import logging
+
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.application.tool.budget_agent_tool import get_budget_info
-from app.application.tool.company_agent_tool import get_company_info
+from app.application.tool.budget_agent_tool import (
+    budget_cache,
+    fetch_budget_info,
+    get_budget_info,
+)
+from app.application.tool.budget_query_normalizer import normalize_budget_query
+from app.application.tool.company_agent_tool import fetch_company_info
+from app.application.tool.response_cache import create_response_cache
+from app.application.tool.speculative_prefetch import SpeculativePrefetcher
+from app.config.settings import get_settings
+from app.infrastructure.observability.structured_logging import log_payload
 
 logger = logging.getLogger(__name__)
 
-def _preview(value: object, limit: int = 800) -> str:
-    try:
-        s = str(value) if value is not None else ""
-    except Exception as e:
-        s = f"<unrenderable: {e}>"
-    if len(s) > limit:
-        return s[:limit] + "...(truncated)"
-    return s
+COMPANY_INFO_QUERY = (
+    "Forneça uma explicação COMPLETA e DETALHADA sobre como funciona a "
+    "higienização da Doutor Sofá. Inclua: produtos (ANVISA), estabilizador "
+    "de pH, método semi-seco (extração até ~5cm), benefícios (extração "
+    "industrial, odores, secagem 8-12h, serviço no local), observações "
+    "(não garantir remoção total de manchas, não expor ao sol, não usar panos, "
+    "prazo 48h para reparos/retorno) e garantia (renovação do estofado). "
+    "Não inclua preços nem CTA."
+)
+
+# A chave deriva do texto da pergunta: alterá-la invalida o cache automaticamente
+_COMPANY_INFO_CACHE_KEY = hashlib.sha256(COMPANY_INFO_QUERY.encode("utf-8")).hexdigest()
+
+how_it_works_cache = create_response_cache(
+    "how_it_works",
+    ttl_seconds=get_settings().how_it_works_cache_ttl,
+    max_entries=get_settings().tool_cache_max_entries,
+)
+
+
+async def get_how_it_works_info() -> str:
+    """
+    Explicação de "como funciona", servida do cache quando disponível
+    """
+    return await how_it_works_cache.get_or_load(
+        _COMPANY_INFO_CACHE_KEY, lambda: fetch_company_info(COMPANY_INFO_QUERY)
+    )
+
+
+service_budget_prefetcher = SpeculativePrefetcher("service_and_budget")
+
+
+def speculate_service_and_budget(thread_id: str, message: str) -> bool:
+    """
+    Inicia as duas buscas da ferramenta se a mensagem já traz serviço e item (regra 2
+    do supervisor, quase sempre roteada ao service_and_budget_specialist)
+    """
+    query = normalize_budget_query(message)
+    if query.item is None or not query.explicit_service:
+        return False
+
+    async def fetch() -> list:
+        # Pelos mesmos caches da ferramenta: também aproveita buscas já em andamento
+        return await asyncio.gather(
+            get_how_it_works_info(),
+            budget_cache.get_or_load(
+                query.cache_key, lambda: fetch_budget_info(message)
+            ),
+            return_exceptions=True,
+        )
+
+    service_budget_prefetcher.start(thread_id, query.cache_key, fetch)
+    return True
+
 
 @tool
-async def get_service_and_budget_info(query: str) -> str:
+async def get_service_and_budget_info(query: str, config: RunnableConfig) -> str:
     """
-    Versão mínima para depuração:
-    - Chama em paralelo o agente de orçamento e o agente de 'como funciona'.
-    - Loga payloads e retornos (preview).
-    - Retorna a concatenação: <company_info> + duas quebras + <budget_info>.
+    Retorna a explicação de como funciona a higienização seguida do orçamento do
+    item pedido (inclua na query o item, a variação e a quantidade, quando houver).
     """
+    # Orçamento e "como funciona" em paralelo, ou a pré-busca especulativa do turno
+    # quando for do mesmo pedido; a resposta é <como funciona> + <orçamento>
     sanitized_query = (query or "").strip()
-    logger.info("[service_budget:min] query=%r", sanitized_query)
+    log_payload(logger, "Pedido de serviço e orçamento", sanitized_query)
 
     # Payloads
     payload_budget = {"query": sanitized_query}
-    company_info_query = (
-        "Forneça uma explicação COMPLETA e DETALHADA sobre como funciona a "
-        "higienização da Doutor Sofá. Inclua: produtos (ANVISA), estabilizador "
-        "de pH, método semi-seco (extração até ~5cm), benefícios (extração "
-        "industrial, odores, secagem 8-12h, serviço no local), observações "
-        "(não garantir remoção total de manchas, não expor ao sol, não usar panos, "
-        "prazo 48h para reparos/retorno) e garantia (renovação do estofado). "
-        "Não inclua preços nem CTA."
-    )
-    payload_company = {"query": company_info_query}
 
-    logger.info("[service_budget:min] budget payload=%r", payload_budget)
-    logger.info("[service_budget:min] company payload=%r", payload_company)
-
-    # Chamadas em paralelo
-    budget_task = get_budget_info.ainvoke(payload_budget)
-    company_task = get_company_info.ainvoke(payload_company)
-
-    logger.info("[service_budget:min] aguardando respostas em paralelo...")
-    company_info, budget_info = await asyncio.gather(
-        company_task, budget_task, return_exceptions=True
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    cache_key = normalize_budget_query(sanitized_query).cache_key
+    prefetched = (
+        service_budget_prefetcher.take(thread_id, cache_key) if cache_key else None
     )
+    results = await prefetched if prefetched is not None else None
+    if results is not None:
+        used = not any(isinstance(r, Exception) for r in results)
+        service_budget_prefetcher.record_use(used)
+        if not used:
+            results = None
+    if results is None:
+        # Chamadas em paralelo ("como funciona" vem do cache quando disponível); com
+        # falha na pré-busca, a ferramenta repete as chamadas com o tratamento de erros
+        budget_task = get_budget_info.ainvoke(payload_budget)
+        company_task = get_how_it_works_info()
+        results = await asyncio.gather(company_task, budget_task, return_exceptions=True)
+    company_info, budget_info = results
 
     # Logs dos retornos
     if isinstance(company_info, Exception):
-        logger.warning("[service_budget:min] company_info ERROR: %s", company_info)
+        logger.warning(f"Erro ao obter a explicação de como funciona: {company_info}")
         company_text = ""
     else:
         logger.info(
-            "[service_budget:min] company_info ok: type=%s len=%s",
-            type(company_info).__name__, len(str(company_info))
+            f"Explicação de como funciona obtida ({len(str(company_info))} caracteres)"
         )
-        logger.debug("[service_budget:min] company_info preview:\n%s", _preview(company_info))
         company_text = str(company_info).strip()
 
     if isinstance(budget_info, Exception):
-        logger.warning("[service_budget:min] budget_info ERROR: %s", budget_info)
+        logger.warning(f"Erro ao obter o orçamento: {budget_info}")
         budget_text = ""
     else:
-        logger.info(
-            "[service_budget:min] budget_info ok: type=%s len=%s",
-            type(budget_info).__name__, len(str(budget_info))
-        )
-        logger.debug("[service_budget:min] budget_info preview:\n%s", _preview(budget_info))
+        logger.info(f"Orçamento obtido ({len(str(budget_info))} caracteres)")
         budget_text = str(budget_info).strip()
 
     parts: list[str] = []
@@ -81,7 +130,11 @@ async def get_service_and_budget_info(query: str) -> str:
     if budget_text:
         parts.append(budget_text)
 
-    final_text = "\n\n".join(parts) if parts else "Não foi possível obter informações no momento."
-    logger.info("[service_budget:min] RESPOSTA FINAL ENVIADA AO USUÁRIO:\n%s", final_text)
-    logger.debug("[service_budget:min] final preview:\n%s", _preview(final_text))
+    final_text = (
+        "\n\n".join(parts) if parts else "Não foi possível obter informações no momento."
+    )
+    logger.info(f"Resposta de serviço e orçamento ({len(final_text)} caracteres)")
+    log_payload(
+        logger, "Resposta de serviço e orçamento", final_text, level=logging.DEBUG
+    )
     return final_text
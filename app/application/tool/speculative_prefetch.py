@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from app.infrastructure.observability.metrics import SPECULATIVE_PREFETCHES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Prefetch:
+    key: str
+    task: asyncio.Task
+    taken: bool = False
+
+
+class SpeculativePrefetcher:
+    """
+    Chamadas de uma ferramenta iniciadas antes do roteamento, uma por conversa (thread).
+
+    O turno inicia a busca assim que a mensagem chega, em paralelo às chamadas ao LLM
+    do supervisor e do especialista; a ferramenta consome o resultado se o pedido dela
+    tiver a mesma chave e informa, com record_use, se ele foi aproveitado (hit) ou
+    descartado por falha (failed). Ao fim do turno, uma busca não consumida é cancelada
+    e contada como desperdício.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pending: dict[str, _Prefetch] = {}
+
+    def start(
+        self, thread_id: str, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> None:
+        self.finish(thread_id)
+        self._pending[thread_id] = _Prefetch(key, asyncio.create_task(fetch()))
+        SPECULATIVE_PREFETCHES.labels(self.name, "started").inc()
+
+    def take(self, thread_id: str | None, key: str) -> asyncio.Task | None:
+        """
+        Busca em andamento (ou concluída) da conversa para a chave, se houver
+        """
+        prefetch = self._pending.get(thread_id) if thread_id else None
+        if prefetch is None or prefetch.taken or prefetch.key != key:
+            return None
+        prefetch.taken = True
+        return prefetch.task
+
+    def record_use(self, used: bool) -> None:
+        """
+        Registra se o resultado de uma busca obtida com take foi usado pela ferramenta
+        """
+        SPECULATIVE_PREFETCHES.labels(self.name, "hit" if used else "failed").inc()
+
+    def finish(self, thread_id: str) -> None:
+        """
+        Encerra a especulação da conversa (fim do turno)
+        """
+        prefetch = self._pending.pop(thread_id, None)
+        if prefetch is None or prefetch.taken:
+            return
+        SPECULATIVE_PREFETCHES.labels(self.name, "wasted").inc()
+        if not prefetch.task.done():
+            prefetch.task.cancel()
+        elif not prefetch.task.cancelled():
+            # Evita "exception was never retrieved" de uma busca que falhou
+            prefetch.task.exception()
+        logger.info(
+            f"Pré-busca especulativa descartada ({self.name}, chave={prefetch.key})"
+        )
@@ -0,0 +1,64 @@
+"""
+Compactação das tabelas de checkpoints: mantém os últimos N checkpoints por thread
+e remove threads inativas além da janela de retenção.
+
+Uso:
+    python -m app.cli.compact_checkpoints --dry-run
+    python -m app.cli.compact_checkpoints --keep-last 5 --retention-days 60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from dotenv import load_dotenv
+
+from app.config.settings import get_settings
+from app.infrastructure.database.checkpoint_compactor import CheckpointCompactor
+from app.infrastructure.database.postgres_pool import (
+    close_postgres_resources,
+    open_postgres_resources,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    resources = await open_postgres_resources(settings)
+    try:
+        compactor = CheckpointCompactor(
+            resources.pool,
+            keep_last=args.keep_last or settings.checkpoint_keep_last,
+            retention_days=(
+                settings.checkpoint_retention_days
+                if args.retention_days is None
+                else args.retention_days
+            ),
+            batch_size=args.batch_size or settings.checkpoint_compaction_batch_size,
+        )
+        report = await compactor.run(dry_run=args.dry_run)
+        print(json.dumps(report.as_dict(), indent=2))
+    finally:
+        await close_postgres_resources(resources)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keep-last", type=int, help="checkpoints mantidos por thread")
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        help="dias sem atividade até remover a thread (0 = nunca)",
+    )
+    parser.add_argument("--batch-size", type=int, help="threads por transação")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="contabiliza e desfaz as remoções"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Migração: remove as SystemMessages (persona e memórias) gravadas no histórico das
+threads antigas, quando elas ainda eram anexadas ao estado a cada turno.
+
+Uso:
+    python -m app.cli.strip_system_messages --dry-run
+    python -m app.cli.strip_system_messages --thread-id 5549999999999
+"""
+
+import argparse
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+from langchain_core.messages import RemoveMessage, SystemMessage
+from langgraph.graph.state import CompiledStateGraph
+from psycopg_pool import AsyncConnectionPool
+
+from app.application.agent.proxy_agent_builder import ProxyAgentBuilder
+from app.application.agent.system_prompt import SUMMARY_MESSAGE_ID
+from app.config.settings import get_settings
+from app.infrastructure.database.postgres_pool import (
+    close_postgres_resources,
+    open_postgres_resources,
+)
+
+logger = logging.getLogger(__name__)
+
+# Nó usado como autor da atualização: o grafo permanece sem próximos passos pendentes
+UPDATE_AS_NODE = "supervisor"
+
+
+async def list_thread_ids(pool: AsyncConnectionPool) -> list[str]:
+    async with pool.connection() as conn:
+        cursor = await conn.execute(
+            "SELECT DISTINCT thread_id FROM checkpoints WHERE checkpoint_ns = '' ORDER BY thread_id"
+        )
+        return [row["thread_id"] for row in await cursor.fetchall()]
+
+
+async def strip_thread(graph: CompiledStateGraph, thread_id: str, dry_run: bool) -> int:
+    """
+    Remove as SystemMessages do estado atual da thread; retorna quantas foram encontradas
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = await graph.aget_state(config)
+    messages = (snapshot.values or {}).get("messages", [])
+    system_ids = [
+        m.id
+        for m in messages
+        if isinstance(m, SystemMessage) and m.id and m.id != SUMMARY_MESSAGE_ID
+    ]
+    if not system_ids or dry_run:
+        return len(system_ids)
+    if snapshot.next:
+        logger.warning(
+            f"Thread {thread_id} com execução pendente ({snapshot.next}); ignorada"
+        )
+        return 0
+
+    await graph.aupdate_state(
+        config,
+        {"messages": [RemoveMessage(id=message_id) for message_id in system_ids]},
+        as_node=UPDATE_AS_NODE,
+    )
+    return len(system_ids)
+
+
+async def main(thread_ids: list[str], dry_run: bool) -> None:
+    settings = get_settings()
+    resources = await open_postgres_resources(settings)
+    try:
+        graph = ProxyAgentBuilder().compile(
+            checkpointer=resources.checkpointer, store=resources.store
+        )
+        thread_ids = thread_ids or await list_thread_ids(resources.pool)
+
+        threads_changed = 0
+        messages_removed = 0
+        for thread_id in thread_ids:
+            removed = await strip_thread(graph, thread_id, dry_run)
+            if removed:
+                threads_changed += 1
+                messages_removed += removed
+                logger.info(f"Thread {thread_id}: {removed} SystemMessage(s)")
+
+        action = "seriam removidas" if dry_run else "removidas"
+        logger.info(
+            f"{messages_removed} SystemMessage(s) {action} em {threads_changed} "
+            f"de {len(thread_ids)} thread(s)"
+        )
+    finally:
+        await close_postgres_resources(resources)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--thread-id", action="append", default=[], help="thread específica (repetível)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="apenas contabiliza, sem alterar"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.thread_id, args.dry_run))
@@ -0,0 +1,269 @@
+from functools import lru_cache
+
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class UpstreamSettings(BaseModel):
+    """
+    Configuração de um agente remoto chamado pelas ferramentas
+    """
+
+    url: str
+    # Timeout total (s) de cada chamada e timeout de conexão
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    # Pool de conexões keep-alive do cliente HTTP
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    # Requer o pacote 'h2' (httpx[http2]); sem ele o cliente usa HTTP/1.1
+    http2: bool = False
+    # Novas tentativas após erro de rede/5xx, com backoff exponencial e jitter (s)
+    retries: int = 1
+    retry_backoff: float = 0.2
+    # Hedge: segunda requisição após este quantil da latência recente (0 = desativado),
+    # somente depois de hedge_min_samples chamadas e nunca antes de hedge_min_delay (s)
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_min_delay: float = 0.05
+    # Circuit breaker: falhas consecutivas que abrem o circuito (0 = desativado) e
+    # tempo (s) até a chamada de teste; com o circuito aberto a ferramenta responde na hora
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+
+
+class CompanyAgentSettings(UpstreamSettings):
+    url: str = (
+        "https://conversation-agent.livelygrass-5e1cbc66.brazilsouth.azurecontainerapps.io/api/gateway"
+    )
+
+
+class BudgetAgentSettings(UpstreamSettings):
+    url: str = (
+        "https://budget-agent.livelygrass-5e1cbc66.brazilsouth.azurecontainerapps.io/chat"
+    )
+
+
+class CustomerRegistrationAgentSettings(UpstreamSettings):
+    url: str = (
+        "https://customer-registration-agent.livelygrass-5e1cbc66.brazilsouth.azurecontainerapps.io/coleta/chat"
+    )
+    # A coleta grava os dados do cliente: sem novas tentativas nem hedge (não idempotente)
+    retries: int = 0
+    hedge_quantile: float = 0.0
+
+
+class ModelSettings(BaseModel):
+    """
+    Modelo de um papel do grafo (supervisor, especialista ou resumo do histórico);
+    campos não informados herdam os valores padrão (OPENAI_*)
+    """
+
+    model: str | None = None
+    temperature: float | None = None
+    # Tokens gerados por chamada (0 = sem limite)
+    max_tokens: int | None = None
+    # Timeout (s) de cada chamada e novas tentativas do cliente após erro/timeout
+    timeout: float | None = None
+    max_retries: int | None = None
+    # Endpoint compatível com a API da OpenAI (ex.: servidor local)
+    base_url: str | None = None
+
+
+class Settings(BaseSettings):
+    """
+    Configurações da aplicação carregadas de variáveis de ambiente (ou .env).
+    Campos aninhados usam '__' como separador (ex.: BUDGET_AGENT__TIMEOUT=10).
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=".env", env_nested_delimiter="__", extra="ignore"
+    )
+
+    # Logs: registros enfileirados e escritos por uma thread em segundo plano, em JSON
+    # ("json") ou texto ("text"); acima de log_queue_size registros pendentes os novos
+    # são descartados. CPF, e-mail, telefone e credenciais de DSN são mascarados.
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    # Mensagens mais longas são truncadas
+    log_max_message_chars: int = 2000
+    # Fração dos logs de conteúdo (mensagens, respostas dos agentes) efetivamente
+    # registrada e tamanho máximo de cada conteúdo
+    log_payload_sample_rate: float = 0.1
+    log_payload_max_chars: int = 500
+
+    # Tracing OpenTelemetry (requer o extra "tracing": uv sync --extra tracing): span por
+    # requisição, nó do grafo, chamada ao modelo, ferramenta e chamada aos agentes
+    # remotos (com traceparent), exportados via OTLP/HTTP, ex.: para um coletor local
+    tracing_enabled: bool = False
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_service_name: str = "proxy-agent"
+    # Fração dos traces iniciados aqui que são amostrados (traces recebidos seguem o chamador)
+    tracing_sample_ratio: float = 1.0
+
+    # Persistência de memórias e checkpoints: "postgres" ou "memory" (sem banco; apenas
+    # para desenvolvimento local e benchmarks, o estado é perdido ao reiniciar)
+    persistence_backend: str = "postgres"
+
+    # Postgres (store de memórias + checkpointer do LangGraph)
+    db_uri: str = ""
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    # Tempo máximo (s) que uma requisição aguarda por uma conexão livre do pool
+    db_pool_timeout: float = 10.0
+    # Quantidade máxima de requisições na fila do pool (0 = ilimitado)
+    db_pool_max_waiting: int = 0
+    # Conexões ociosas acima de min_size são fechadas após este tempo (s)
+    db_pool_max_idle: float = 300.0
+    # Conexões são recicladas após este tempo de vida (s)
+    db_pool_max_lifetime: float = 1800.0
+    # Valida a conexão (SELECT 1) antes de entregá-la ao chamador
+    db_pool_check: bool = True
+    # Executa store.setup()/checkpointer.setup() uma única vez na inicialização
+    db_run_setup: bool = True
+
+    # Retenção dos checkpoints: últimos N por thread e remoção de threads inativas (0 = nunca)
+    checkpoint_keep_last: int = 10
+    checkpoint_retention_days: int = 90
+    checkpoint_compaction_batch_size: int = 200
+    # Intervalo da compactação em segundo plano na aplicação (0 = apenas via CLI)
+    checkpoint_compaction_interval_minutes: int = 0
+
+    # Modelo padrão do supervisor, dos especialistas e do resumo do histórico
+    openai_model: str = "gpt-4o-mini"
+    openai_temperature: float = 0.0
+    openai_max_tokens: int = 0
+    openai_timeout: float = 30.0
+    openai_max_retries: int = 2
+    # Vazio = api.openai.com (ou OPENAI_BASE_URL, lida pelo próprio cliente)
+    openai_base_url: str = ""
+    # Ajustes por papel (nome do nó no grafo ou "history_summary"), ex.:
+    # MODEL_ROLES__SUPERVISOR__MODEL=gpt-4.1-nano
+    # MODEL_ROLES__COMPANY_SPECIALIST__MAX_TOKENS=400
+    model_roles: dict[str, ModelSettings] = {}
+    # Especialistas cuja saída da ferramenta é a resposta final (sem nova geração
+    # pelo especialista nem pelo supervisor; erros da ferramenta viram uma resposta
+    # padrão, sem nova tentativa). Ex.: PASSTHROUGH_AGENTS='["budget_specialist"]'
+    passthrough_agents: list[str] = []
+    # Compila o grafo na inicialização para que a primeira requisição não pague o custo
+    agent_warmup: bool = True
+    # Regras determinísticas (saudação, confirmação de dados, pedido de preço) tratadas
+    # antes do supervisor, sem chamada ao LLM; casos ambíguos seguem para o supervisor
+    fast_path_enabled: bool = True
+    # Pedido com serviço e item explícitos: busca orçamento e "como funciona" assim que a
+    # mensagem chega, em paralelo ao roteamento; descartada se o turno não usar
+    speculative_prefetch_enabled: bool = True
+    # Histórico por thread: turnos mantidos na íntegra; acima de history_summary_trigger_turns
+    # os turnos mais antigos são resumidos e removidos do estado (0 = desativado)
+    history_keep_turns: int = 6
+    history_summary_trigger_turns: int = 10
+    # Orçamento aproximado de tokens do histórico enviado a cada chamada ao modelo (0 = sem limite)
+    history_max_prompt_tokens: int = 4000
+
+    # Memórias por usuário: quantidade máxima injetada no prompt a cada turno
+    memory_top_k: int = 5
+    # Índice vetorial do store: "none" (busca lexical), "hash" (local, determinístico)
+    # ou "openai". Com índice no Postgres, a extensão pgvector é necessária.
+    memory_embedding_provider: str = "none"
+    memory_embedding_model: str = "text-embedding-3-small"
+    memory_embedding_dims: int = 256
+    memory_embedding_cache_size: int = 1024
+    # Memórias mais recentes consideradas na busca lexical
+    memory_lexical_scan_limit: int = 50
+
+    # Prazo total (s) de um turno, contado da chegada da requisição: limita os timeouts
+    # das chamadas aos agentes remotos ao tempo restante e, ao expirar, cancela o
+    # trabalho pendente e responde com uma mensagem padrão (0 = sem prazo)
+    chat_deadline_seconds: float = 25.0
+
+    # Controle de admissão dos turnos síncronos: execuções simultâneas por réplica
+    # (0 = sem limite), requisições aguardando vaga e tempo máximo de espera; além
+    # disso a resposta é 429 com Retry-After
+    admission_max_concurrent: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 5.0
+    # Limite por telefone (token bucket): mensagens por minuto e rajada (0 = sem limite)
+    phone_rate_limit_per_minute: float = 20.0
+    phone_rate_limit_burst: int = 5
+
+    # Modo assíncrono (POST /proxy/chat/async): workers por réplica (0 = sem consumo),
+    # intervalo de consulta à fila, lease de um job em execução e tentativas por job
+    chat_job_workers: int = 4
+    chat_job_poll_interval_seconds: float = 1.0
+    chat_job_lease_seconds: float = 120.0
+    chat_job_max_attempts: int = 3
+    # Espera antes de uma nova tentativa de um job que falhou, dobrada a cada tentativa
+    chat_job_retry_backoff_seconds: float = 5.0
+    # URL de callback usada quando o job não informa uma
+    chat_job_callback_url: str = ""
+    # Hosts aceitos nas URLs de callback informadas pelo cliente; sem hosts, apenas
+    # CHAT_JOB_CALLBACK_URL é aceita
+    chat_job_callback_hosts: list[str] = []
+    chat_job_callback_timeout: float = 10.0
+    chat_job_callback_retries: int = 3
+
+    # Lotes (POST /proxy/chat/batch): pedidos por lote, turnos simultâneos somando todos
+    # os lotes da réplica e, desses, quantos por agente remoto previsto (0 = sem limite)
+    chat_batch_max_items: int = 1000
+    chat_batch_max_concurrent: int = 8
+    chat_batch_max_per_upstream: int = 4
+
+    # Idempotência por message_id do provedor: por quanto tempo (s) e quantos resultados
+    # ficam guardados por réplica (com Postgres, também na tabela compartilhada)
+    idempotency_ttl_seconds: float = 24 * 60 * 60
+    idempotency_max_entries: int = 10000
+    # Com Postgres: reserva de um turno em execução (vencida, outra réplica pode
+    # retomá-lo; deve cobrir o prazo do turno) e intervalo de consulta das reentregas
+    # que aguardam o resultado de outra réplica
+    idempotency_lease_seconds: float = 60.0
+    idempotency_poll_interval_seconds: float = 0.5
+
+    # Agrupamento de mensagens consecutivas do mesmo telefone (0 = desativado)
+    chat_coalesce_window_ms: int = 0
+    # Tempo máximo que a primeira mensagem do grupo pode aguardar
+    chat_coalesce_max_wait_ms: int = 5000
+    chat_coalesce_max_messages: int = 10
+
+    # Agentes remotos (Azure Container Apps)
+    company_agent: CompanyAgentSettings = CompanyAgentSettings()
+    budget_agent: BudgetAgentSettings = BudgetAgentSettings()
+    customer_registration_agent: CustomerRegistrationAgentSettings = (
+        CustomerRegistrationAgentSettings()
+    )
+
+    # Cache de respostas das ferramentas
+    tool_cache_max_entries: int = 256
+    # Explicação de "como funciona" (texto praticamente constante)
+    how_it_works_cache_ttl: float = 6 * 60 * 60
+    # Orçamentos por pedido normalizado (TTL curto: a tabela de preços pode mudar)
+    budget_cache_ttl: float = 5 * 60
+    # Compartilha o cache entre réplicas via Postgres
+    tool_cache_persistent: bool = False
+
+    def model_settings(self, role: str, **defaults) -> ModelSettings:
+        """
+        Configuração completa do modelo de um papel: ajustes do papel sobre os padrões
+        (OPENAI_*, ou os valores de `defaults` que não forem None)
+        """
+        resolved = ModelSettings(
+            model=self.openai_model,
+            temperature=self.openai_temperature,
+            max_tokens=self.openai_max_tokens,
+            timeout=self.openai_timeout,
+            max_retries=self.openai_max_retries,
+            base_url=self.openai_base_url,
+        ).model_copy(update={k: v for k, v in defaults.items() if v is not None})
+        overrides = self.model_roles.get(role)
+        if overrides is None:
+            return resolved
+        return resolved.model_copy(update=overrides.model_dump(exclude_none=True))
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Retorna a instância única das configurações
+    """
+    return Settings()
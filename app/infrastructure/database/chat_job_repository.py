@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+
+from psycopg_pool import AsyncConnectionPool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class ChatJob:
+    """
+    Turno de conversa enfileirado para execução assíncrona
+    """
+
+    id: str
+    phone: str
+    message: str
+    callback_url: str | None = None
+    status: str = QUEUED
+    response: str | None = None
+    error: str | None = None
+    attempts: int = 0
+    callback_status: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    locked_until: datetime | None = None
+    # Jobs na fila só são executados a partir deste instante (espera entre tentativas)
+    available_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+_COLUMNS = (
+    "id::text AS id, phone, message, callback_url, status, response, error, attempts, "
+    "callback_status, created_at, updated_at, locked_until, available_at"
+)
+
+# Erro registrado nos jobs cujo worker foi encerrado no meio em todas as tentativas
+LEASE_EXPIRED_ERROR = "Execução interrompida (lease vencido) em todas as tentativas"
+
+# Próximo job de cada telefone (o mais antigo na fila), apenas se nenhum outro job do
+# mesmo telefone estiver em execução: preserva a ordem dos turnos de cada conversa.
+# Jobs que falharam voltam à fila com available_at no futuro e só então são elegíveis.
+# Jobs "running" com lease vencido (worker encerrado no meio) voltam a ser elegíveis
+# enquanto restarem tentativas; esgotadas, são marcados como falhos e retornados
+# também, para a entrega do callback.
+_CLAIM_SQL = f"""
+    WITH exhausted AS (
+        UPDATE chat_jobs
+        SET status = 'failed', error = %(lease_error)s, locked_until = NULL, updated_at = now()
+        WHERE status = 'running' AND locked_until < now() AND attempts >= %(max_attempts)s
+        RETURNING {_COLUMNS}
+    ),
+    candidates AS (
+        SELECT j.id FROM chat_jobs j
+        WHERE ((j.status = 'queued' AND j.available_at <= now())
+               OR (j.status = 'running' AND j.locked_until < now()
+                   AND j.attempts < %(max_attempts)s))
+          AND NOT EXISTS (
+              SELECT 1 FROM chat_jobs o
+              WHERE o.phone = j.phone AND o.id <> j.id
+                AND ((o.status = 'running' AND o.locked_until >= now())
+                     OR (o.status IN ('queued', 'running') AND o.created_at < j.created_at))
+          )
+        ORDER BY j.created_at
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    ),
+    claimed AS (
+        UPDATE chat_jobs j
+        SET status = 'running', attempts = j.attempts + 1, updated_at = now(),
+            locked_until = now() + make_interval(secs => %(lease_seconds)s)
+        FROM candidates c
+        WHERE j.id = c.id
+        RETURNING {_COLUMNS.replace("id::text", "j.id::text")}
+    )
+    SELECT * FROM claimed
+    UNION ALL
+    SELECT * FROM exhausted
+"""
+
+
+class PostgresChatJobRepository:
+    """
+    Fila durável de turnos assíncronos; vários workers (e réplicas) consomem a mesma
+    tabela com FOR UPDATE SKIP LOCKED, sem disputar as mesmas linhas
+    """
+
+    def __init__(self, pool: AsyncConnectionPool):
+        self.pool = pool
+
+    async def setup(self) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_jobs (
+                    id UUID PRIMARY KEY,
+                    phone TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    callback_url TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    response TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    callback_status TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    locked_until TIMESTAMPTZ,
+                    available_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """
+            )
+            # Tabelas criadas antes da espera entre tentativas
+            await conn.execute(
+                """
+                ALTER TABLE chat_jobs
+                ADD COLUMN IF NOT EXISTS available_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS chat_jobs_pending_idx
+                ON chat_jobs (created_at) WHERE status IN ('queued', 'running')
+                """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS chat_jobs_phone_pending_idx
+                ON chat_jobs (phone, created_at) WHERE status IN ('queued', 'running')
+                """
+            )
+
+    async def enqueue(
+        self, phone: str, message: str, callback_url: str | None = None
+    ) -> ChatJob:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"""
+                INSERT INTO chat_jobs (id, phone, message, callback_url)
+                VALUES (%s, %s, %s, %s)
+                RETURNING {_COLUMNS}
+                """,
+                (uuid.uuid4(), phone, message, callback_url),
+            )
+            return ChatJob(**await cursor.fetchone())
+
+    async def claim(
+        self, limit: int, lease_seconds: float, max_attempts: int
+    ) -> list[ChatJob]:
+        """
+        Até limit jobs reservados para execução ("running") e os que esgotaram as
+        tentativas com o lease vencido ("failed")
+        """
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                _CLAIM_SQL,
+                {
+                    "limit": limit,
+                    "lease_seconds": lease_seconds,
+                    "max_attempts": max_attempts,
+                    "lease_error": LEASE_EXPIRED_ERROR,
+                },
+            )
+            return [ChatJob(**row) for row in await cursor.fetchall()]
+
+    async def extend_lease(self, job_id: str, lease_seconds: float) -> None:
+        """
+        Renova o lease de um job em execução (heartbeat do worker)
+        """
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE chat_jobs
+                SET locked_until = now() + make_interval(secs => %s)
+                WHERE id = %s AND status = 'running'
+                """,
+                (lease_seconds, job_id),
+            )
+
+    async def get(self, job_id: str) -> ChatJob | None:
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"SELECT {_COLUMNS} FROM chat_jobs WHERE id = %s", (job_id,)
+            )
+            row = await cursor.fetchone()
+        return ChatJob(**row) if row else None
+
+    async def complete(self, job_id: str, response: str) -> None:
+        await self._update(job_id, status=DONE, response=response, error=None)
+
+    async def fail(
+        self, job_id: str, error: str, retry: bool, retry_delay: float = 0.0
+    ) -> None:
+        """
+        Marca o job como falho ou, com retry, devolve-o à fila para ser executado
+        novamente após retry_delay segundos
+        """
+        await self._update(
+            job_id,
+            status=QUEUED if retry else FAILED,
+            error=error,
+            available_after=retry_delay if retry else 0.0,
+        )
+
+    async def release(self, job_id: str) -> None:
+        """
+        Devolve à fila um job interrompido (ex.: desligamento) sem contar a tentativa
+        """
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE chat_jobs
+                SET status = 'queued', attempts = greatest(attempts - 1, 0),
+                    locked_until = NULL, updated_at = now()
+                WHERE id = %s AND status = 'running'
+                """,
+                (job_id,),
+            )
+
+    async def set_callback_status(self, job_id: str, callback_status: str) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "UPDATE chat_jobs SET callback_status = %s, updated_at = now() WHERE id = %s",
+                (callback_status, job_id),
+            )
+
+    async def _update(self, job_id: str, status: str, **values) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE chat_jobs
+                SET status = %(status)s,
+                    response = coalesce(%(response)s, response),
+                    error = %(error)s,
+                    locked_until = NULL,
+                    available_at = now() + make_interval(secs => %(available_after)s),
+                    updated_at = now()
+                WHERE id = %(id)s
+                """,
+                {
+                    "id": job_id,
+                    "status": status,
+                    "response": values.get("response"),
+                    "error": values.get("error"),
+                    "available_after": values.get("available_after", 0.0),
+                },
+            )
+
+
+class InMemoryChatJobRepository:
+    """
+    Mesma interface da fila Postgres, sem durabilidade (PERSISTENCE_BACKEND=memory)
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, ChatJob] = {}
+        self._lock = asyncio.Lock()
+
+    async def setup(self) -> None:
+        return None
+
+    async def enqueue(
+        self, phone: str, message: str, callback_url: str | None = None
+    ) -> ChatJob:
+        job = ChatJob(
+            id=str(uuid.uuid4()), phone=phone, message=message, callback_url=callback_url
+        )
+        self._jobs[job.id] = job
+        return replace(job)
+
+    async def claim(
+        self, limit: int, lease_seconds: float, max_attempts: int
+    ) -> list[ChatJob]:
+        async with self._lock:
+            now = datetime.now(timezone.utc)
+            exhausted: list[ChatJob] = []
+            for job in self._jobs.values():
+                if (
+                    job.status == RUNNING
+                    and job.locked_until
+                    and job.locked_until < now
+                    and job.attempts >= max_attempts
+                ):
+                    job.status, job.error = FAILED, LEASE_EXPIRED_ERROR
+                    job.locked_until, job.updated_at = None, now
+                    exhausted.append(replace(job))
+            busy = {
+                job.phone
+                for job in self._jobs.values()
+                if job.status == RUNNING and job.locked_until and job.locked_until >= now
+            }
+            claimed: list[ChatJob] = []
+            for job in sorted(self._jobs.values(), key=lambda j: j.created_at):
+                if len(claimed) >= limit:
+                    break
+                pending = (job.status == QUEUED and job.available_at <= now) or (
+                    job.status == RUNNING and job.locked_until and job.locked_until < now
+                )
+                if not pending or job.phone in busy:
+                    continue
+                # Apenas o mais antigo pendente de cada telefone
+                busy.add(job.phone)
+                job.status = RUNNING
+                job.attempts += 1
+                job.updated_at = now
+                job.locked_until = now + timedelta(seconds=lease_seconds)
+                claimed.append(replace(job))
+            return claimed + exhausted
+
+    async def extend_lease(self, job_id: str, lease_seconds: float) -> None:
+        job = self._jobs.get(job_id)
+        if job and job.status == RUNNING:
+            job.locked_until = datetime.now(timezone.utc) + timedelta(
+                seconds=lease_seconds
+            )
+
+    async def get(self, job_id: str) -> ChatJob | None:
+        job = self._jobs.get(job_id)
+        return replace(job) if job else None
+
+    async def complete(self, job_id: str, response: str) -> None:
+        self._set(job_id, status=DONE, response=response, error=None, locked_until=None)
+
+    async def fail(
+        self, job_id: str, error: str, retry: bool, retry_delay: float = 0.0
+    ) -> None:
+        self._set(
+            job_id,
+            status=QUEUED if retry else FAILED,
+            error=error,
+            locked_until=None,
+            available_at=datetime.now(timezone.utc)
+            + timedelta(seconds=retry_delay if retry else 0.0),
+        )
+
+    async def release(self, job_id: str) -> None:
+        job = self._jobs.get(job_id)
+        if job and job.status == RUNNING:
+            self._set(
+                job_id,
+                status=QUEUED,
+                attempts=max(job.attempts - 1, 0),
+                locked_until=None,
+            )
+
+    async def set_callback_status(self, job_id: str, callback_status: str) -> None:
+        self._set(job_id, callback_status=callback_status)
+
+    def _set(self, job_id: str, **values) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        for key, value in values.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.now(timezone.utc)
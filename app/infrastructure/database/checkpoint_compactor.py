@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Threads que ultrapassam o limite de checkpoints do namespace raiz (paginação por thread_id)
+_THREADS_OVER_LIMIT_SQL = """
+    SELECT thread_id FROM checkpoints
+    WHERE checkpoint_ns = '' AND thread_id > %(after)s
+    GROUP BY thread_id
+    HAVING count(*) > %(keep_last)s
+    ORDER BY thread_id
+    LIMIT %(batch_size)s
+"""
+
+# Threads cujo checkpoint mais recente é anterior ao início da janela de retenção
+_IDLE_THREADS_SQL = """
+    SELECT thread_id FROM checkpoints
+    WHERE checkpoint_ns = '' AND thread_id > %(after)s
+    GROUP BY thread_id
+    HAVING max((checkpoint->>'ts')::timestamptz) < %(idle_before)s
+    ORDER BY thread_id
+    LIMIT %(batch_size)s
+"""
+
+# Checkpoint mais antigo a manter por thread: o K-ésimo mais recente do namespace raiz.
+# Os ids são uuid6 (ordenados no tempo), então checkpoints de subgrafos (especialistas)
+# de turnos anteriores ao corte também são removidos.
+_CUTOFFS_CTE = """
+    WITH cutoffs AS (
+        SELECT thread_id, checkpoint_id AS cutoff FROM (
+            SELECT thread_id, checkpoint_id,
+                   row_number() OVER (PARTITION BY thread_id ORDER BY checkpoint_id DESC) AS rn
+            FROM checkpoints
+            WHERE checkpoint_ns = '' AND thread_id = ANY(%(threads)s)
+        ) ranked
+        WHERE rn = %(keep_last)s
+    )
+"""
+
+_PRUNE_WRITES_SQL = (
+    _CUTOFFS_CTE
+    + """
+    , deleted AS (
+        DELETE FROM checkpoint_writes w USING cutoffs c
+        WHERE w.thread_id = c.thread_id AND w.checkpoint_id < c.cutoff
+        RETURNING pg_column_size(w.blob) AS size
+    )
+    SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+"""
+)
+
+_PRUNE_CHECKPOINTS_SQL = (
+    _CUTOFFS_CTE
+    + """
+    , deleted AS (
+        DELETE FROM checkpoints k USING cutoffs c
+        WHERE k.thread_id = c.thread_id AND k.checkpoint_id < c.cutoff
+        RETURNING pg_column_size(k.checkpoint) + pg_column_size(k.metadata) AS size
+    )
+    SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+"""
+)
+
+# Blobs de canais que nenhum checkpoint restante referencia (channel_versions). O
+# AsyncPostgresSaver grava os blobs antes da linha do checkpoint, então um turno em
+# andamento tem blobs ainda sem referência: no namespace raiz só são removidas versões
+# anteriores à do checkpoint de corte (as versões crescem a cada checkpoint); nos
+# subgrafos, apenas de threads sem checkpoint desde active_before.
+_PRUNE_ORPHAN_BLOBS_SQL = (
+    _CUTOFFS_CTE
+    + """
+    , cutoff_checkpoints AS (
+        SELECT k.thread_id, k.checkpoint->'channel_versions' AS versions,
+               (SELECT max((r.checkpoint->>'ts')::timestamptz) FROM checkpoints r
+                WHERE r.thread_id = k.thread_id AND r.checkpoint_ns = '') AS last_ts
+        FROM checkpoints k JOIN cutoffs c
+          ON k.thread_id = c.thread_id AND k.checkpoint_ns = '' AND k.checkpoint_id = c.cutoff
+    )
+    , deleted AS (
+        DELETE FROM checkpoint_blobs b USING cutoff_checkpoints c
+        WHERE b.thread_id = c.thread_id
+          AND CASE
+                WHEN b.checkpoint_ns = '' THEN b.version < c.versions->>b.channel
+                ELSE c.last_ts < %(active_before)s
+              END
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints k
+              WHERE k.thread_id = b.thread_id
+                AND k.checkpoint_ns = b.checkpoint_ns
+                AND k.checkpoint->'channel_versions'->>b.channel = b.version
+          )
+        RETURNING coalesce(pg_column_size(b.blob), 0) AS size
+    )
+    SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+"""
+)
+
+_DELETE_THREADS_SQL = {
+    "writes": """
+        WITH deleted AS (
+            DELETE FROM checkpoint_writes WHERE thread_id = ANY(%(threads)s)
+            RETURNING pg_column_size(blob) AS size
+        )
+        SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+    """,
+    "blobs": """
+        WITH deleted AS (
+            DELETE FROM checkpoint_blobs WHERE thread_id = ANY(%(threads)s)
+            RETURNING coalesce(pg_column_size(blob), 0) AS size
+        )
+        SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+    """,
+    "checkpoints": """
+        WITH deleted AS (
+            DELETE FROM checkpoints WHERE thread_id = ANY(%(threads)s)
+            RETURNING pg_column_size(checkpoint) + pg_column_size(metadata) AS size
+        )
+        SELECT count(*) AS deleted_rows, coalesce(sum(size), 0) AS deleted_bytes FROM deleted
+    """,
+}
+
+
+@dataclass
+class CompactionReport:
+    """
+    Resultado de uma execução da compactação (bytes = tamanho lógico das linhas removidas;
+    o espaço em disco é devolvido pelo (auto)vacuum)
+    """
+
+    threads_pruned: int = 0
+    threads_deleted: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    blobs_deleted: int = 0
+    bytes_reclaimed: int = 0
+    batches: int = 0
+    duration_seconds: float = 0.0
+    dry_run: bool = False
+
+    def add(self, table: str, row: dict) -> None:
+        setattr(
+            self,
+            f"{table}_deleted",
+            getattr(self, f"{table}_deleted") + row["deleted_rows"],
+        )
+        self.bytes_reclaimed += int(row["deleted_bytes"])
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class CheckpointCompactor:
+    """
+    Retenção das tabelas do AsyncPostgresSaver: mantém os últimos keep_last checkpoints
+    de cada thread e remove threads sem atividade há mais de retention_days.
+
+    Cada lote de threads é processado em uma transação curta, evitando locks longos
+    concorrentes com as conversas em andamento. Blobs de subgrafos sem referência só
+    são removidos de threads sem checkpoint há active_grace_seconds (turno encerrado).
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        keep_last: int = 10,
+        retention_days: int = 90,
+        batch_size: int = 200,
+        active_grace_seconds: float = 600.0,
+    ):
+        if keep_last < 1:
+            raise ValueError("keep_last deve ser ao menos 1")
+        self.pool = pool
+        self.keep_last = keep_last
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.active_grace_seconds = active_grace_seconds
+
+    @classmethod
+    def from_settings(
+        cls, pool: AsyncConnectionPool, settings: Settings
+    ) -> "CheckpointCompactor":
+        return cls(
+            pool,
+            keep_last=settings.checkpoint_keep_last,
+            retention_days=settings.checkpoint_retention_days,
+            batch_size=settings.checkpoint_compaction_batch_size,
+        )
+
+    async def run(self, dry_run: bool = False) -> CompactionReport:
+        """
+        Executa a remoção de threads inativas e depois a poda de checkpoints antigos
+        """
+        start_time = time.perf_counter()
+        report = CompactionReport(dry_run=dry_run)
+        if self.retention_days > 0:
+            await self._delete_idle_threads(report, dry_run)
+        await self._prune_threads(report, dry_run)
+        report.duration_seconds = round(time.perf_counter() - start_time, 3)
+        logger.info(f"Compactação de checkpoints concluída: {report.as_dict()}")
+        return report
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        """
+        Laço da tarefa em segundo plano; erros são registrados e a próxima execução segue
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na compactação de checkpoints: {e}")
+
+    async def _delete_idle_threads(
+        self, report: CompactionReport, dry_run: bool
+    ) -> None:
+        idle_before = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        after = ""
+        while True:
+            async with self.pool.connection() as conn:
+                threads = await self._select_threads(
+                    conn, _IDLE_THREADS_SQL, after, idle_before=idle_before
+                )
+                if not threads:
+                    return
+                async with conn.transaction(force_rollback=dry_run):
+                    for table, sql in _DELETE_THREADS_SQL.items():
+                        report.add(
+                            table, await self._fetch_counts(conn, sql, threads=threads)
+                        )
+            report.threads_deleted += len(threads)
+            report.batches += 1
+            after = threads[-1]
+
+    async def _prune_threads(self, report: CompactionReport, dry_run: bool) -> None:
+        after = ""
+        while True:
+            async with self.pool.connection() as conn:
+                threads = await self._select_threads(
+                    conn, _THREADS_OVER_LIMIT_SQL, after
+                )
+                if not threads:
+                    return
+                params = {"threads": threads, "keep_last": self.keep_last}
+                async with conn.transaction(force_rollback=dry_run):
+                    report.add(
+                        "writes",
+                        await self._fetch_counts(conn, _PRUNE_WRITES_SQL, **params),
+                    )
+                    report.add(
+                        "checkpoints",
+                        await self._fetch_counts(conn, _PRUNE_CHECKPOINTS_SQL, **params),
+                    )
+                    active_before = datetime.now(timezone.utc) - timedelta(
+                        seconds=self.active_grace_seconds
+                    )
+                    report.add(
+                        "blobs",
+                        await self._fetch_counts(
+                            conn,
+                            _PRUNE_ORPHAN_BLOBS_SQL,
+                            active_before=active_before,
+                            **params,
+                        ),
+                    )
+            report.threads_pruned += len(threads)
+            report.batches += 1
+            after = threads[-1]
+
+    async def _select_threads(
+        self, conn: AsyncConnection, sql: str, after: str, **params
+    ) -> list[str]:
+        cursor = await conn.execute(
+            sql,
+            {
+                "after": after,
+                "keep_last": self.keep_last,
+                "batch_size": self.batch_size,
+                **params,
+            },
+        )
+        return [row["thread_id"] for row in await cursor.fetchall()]
+
+    async def _fetch_counts(self, conn: AsyncConnection, sql: str, **params) -> dict:
+        cursor = await conn.execute(sql, params)
+        return await cursor.fetchone()
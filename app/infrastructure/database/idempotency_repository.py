@@ -0,0 +1,146 @@
+import logging
+import uuid
+from dataclasses import dataclass
+
+from psycopg_pool import AsyncConnectionPool
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+
+
+@dataclass(frozen=True)
+class IdempotencyClaim:
+    """
+    Resultado de uma tentativa de reserva: reservada para esta execução (com o token
+    do dono, exigido para gravar ou liberar a reserva), ou não (com a resposta já
+    guardada, ou None enquanto o turno está em execução em outra réplica)
+    """
+
+    acquired: bool
+    response: str | None = None
+    owner: str | None = None
+
+
+class PostgresIdempotencyRepository:
+    """
+    Reserva e resultado dos turnos por message_id, compartilhados entre réplicas: a
+    primeira entrega reserva a chave (pending) e as reentregas em outras réplicas
+    aguardam o resultado em vez de executar o turno de novo
+    """
+
+    def __init__(self, pool: AsyncConnectionPool):
+        self.pool = pool
+
+    async def setup(self) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_idempotency (
+                    key TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    response TEXT,
+                    owner TEXT,
+                    locked_until TIMESTAMPTZ,
+                    expires_at TIMESTAMPTZ NOT NULL
+                )
+                """
+            )
+            # Tabelas criadas antes do token do dono da reserva
+            await conn.execute(
+                "ALTER TABLE chat_idempotency ADD COLUMN IF NOT EXISTS owner TEXT"
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS chat_idempotency_expires_at_idx
+                ON chat_idempotency (expires_at)
+                """
+            )
+
+    async def claim(
+        self, key: str, lease_seconds: float, ttl_seconds: float
+    ) -> IdempotencyClaim:
+        """
+        Reserva a chave; se já houver reserva, retorna o resultado guardado (ou None,
+        se o turno ainda está em execução). Reservas com lease vencido (réplica
+        encerrada no meio do turno) e resultados expirados podem ser retomados; cada
+        reserva recebe um novo token de dono, e a execução anterior não consegue mais
+        gravar nem liberar a chave.
+        """
+        owner = uuid.uuid4().hex
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                INSERT INTO chat_idempotency (key, status, owner, locked_until, expires_at)
+                VALUES (
+                    %(key)s, 'pending', %(owner)s,
+                    now() + make_interval(secs => %(lease_seconds)s),
+                    now() + make_interval(secs => %(ttl_seconds)s)
+                )
+                ON CONFLICT (key) DO UPDATE
+                SET status = 'pending', response = NULL, owner = EXCLUDED.owner,
+                    locked_until = EXCLUDED.locked_until, expires_at = EXCLUDED.expires_at
+                WHERE chat_idempotency.expires_at <= now()
+                   OR (chat_idempotency.status = 'pending'
+                       AND chat_idempotency.locked_until < now())
+                RETURNING key
+                """,
+                {
+                    "key": key,
+                    "owner": owner,
+                    "lease_seconds": lease_seconds,
+                    "ttl_seconds": ttl_seconds,
+                },
+            )
+            if await cursor.fetchone() is not None:
+                return IdempotencyClaim(acquired=True, owner=owner)
+            cursor = await conn.execute(
+                "SELECT status, response FROM chat_idempotency WHERE key = %s", (key,)
+            )
+            row = await cursor.fetchone()
+        if row is None or row["status"] != DONE:
+            # Reserva ativa de outra execução (ou liberada entre as duas consultas)
+            return IdempotencyClaim(acquired=False)
+        return IdempotencyClaim(acquired=False, response=row["response"])
+
+    async def complete(
+        self, key: str, owner: str, response: str, ttl_seconds: float
+    ) -> None:
+        """
+        Guarda o resultado, se a reserva ainda for desta execução
+        """
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE chat_idempotency
+                SET status = 'done', response = %s, locked_until = NULL,
+                    expires_at = now() + make_interval(secs => %s)
+                WHERE key = %s AND owner = %s AND status = 'pending'
+                """,
+                (response, ttl_seconds, key, owner),
+            )
+
+    async def release(self, key: str, owner: str) -> None:
+        """
+        Desfaz a reserva de um turno que não terminou com uma resposta a guardar, se a
+        reserva ainda for desta execução
+        """
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                DELETE FROM chat_idempotency
+                WHERE key = %s AND owner = %s AND status = 'pending'
+                """,
+                (key, owner),
+            )
+
+    async def purge_expired(self) -> int:
+        """
+        Remove resultados expirados; retorna a quantidade removida
+        """
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM chat_idempotency WHERE expires_at <= now() AND status = 'done'"
+            )
+            return cursor.rowcount
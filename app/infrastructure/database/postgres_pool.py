@@ -0,0 +1,119 @@
+import logging
+import time
+from dataclasses import dataclass
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.store.postgres.aio import AsyncPostgresStore
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.settings import Settings
+from app.infrastructure.observability.metrics import DB_POOL_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PostgresResources:
+    """
+    Recursos de banco compartilhados durante todo o ciclo de vida da aplicação
+    """
+
+    pool: AsyncConnectionPool
+    store: AsyncPostgresStore
+    checkpointer: AsyncPostgresSaver
+
+
+class InstrumentedConnectionPool(AsyncConnectionPool):
+    """
+    Pool que registra o tempo de espera por conexão de cada requisição
+    """
+
+    async def getconn(self, timeout: float | None = None):
+        start_time = time.perf_counter()
+        try:
+            return await super().getconn(timeout=timeout)
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start_time)
+
+
+def create_postgres_pool(settings: Settings) -> AsyncConnectionPool:
+    """
+    Cria o pool de conexões (ainda fechado) usado pelo store e pelo checkpointer
+    """
+    return InstrumentedConnectionPool(
+        conninfo=settings.db_uri,
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size,
+        timeout=settings.db_pool_timeout,
+        max_waiting=settings.db_pool_max_waiting,
+        max_idle=settings.db_pool_max_idle,
+        max_lifetime=settings.db_pool_max_lifetime,
+        check=AsyncConnectionPool.check_connection if settings.db_pool_check else None,
+        # Parâmetros exigidos pelo AsyncPostgresStore/AsyncPostgresSaver
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        name="proxy-agent",
+        open=False,
+    )
+
+
+async def open_postgres_resources(
+    settings: Settings, index: dict | None = None
+) -> PostgresResources:
+    """
+    Abre o pool e instancia store e checkpointer sobre ele.
+    O setup (migrações) é executado uma única vez aqui, e não a cada requisição.
+    Com index (IndexConfig), o store mantém embeddings para busca semântica.
+    """
+    pool = create_postgres_pool(settings)
+    await pool.open(wait=True, timeout=settings.db_pool_timeout)
+
+    store = AsyncPostgresStore(pool, index=index)
+    checkpointer = AsyncPostgresSaver(pool)
+
+    if settings.db_run_setup:
+        await store.setup()
+        await checkpointer.setup()
+        logger.info("Setup do store e do checkpointer executado")
+
+    logger.info(
+        "Pool Postgres aberto (min=%s, max=%s)",
+        settings.db_pool_min_size,
+        settings.db_pool_max_size,
+    )
+    return PostgresResources(pool=pool, store=store, checkpointer=checkpointer)
+
+
+async def close_postgres_resources(resources: PostgresResources) -> None:
+    """
+    Fecha o pool de conexões ao desligar a aplicação
+    """
+    await resources.pool.close()
+    logger.info("Pool Postgres fechado")
+
+
+def get_pool_metrics(pool: AsyncConnectionPool) -> dict:
+    """
+    Métricas do pool, incluindo tempo de espera por conexão
+    """
+    stats = pool.get_stats()
+    requests_num = stats.get("requests_num", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "pool_min": stats.get("pool_min"),
+        "pool_max": stats.get("pool_max"),
+        "pool_size": stats.get("pool_size"),
+        "pool_available": stats.get("pool_available"),
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "requests_num": requests_num,
+        "requests_queued": stats.get("requests_queued", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "requests_wait_ms": wait_ms,
+        "requests_wait_avg_ms": (
+            round(wait_ms / requests_num, 2) if requests_num else 0.0
+        ),
+        "connections_num": stats.get("connections_num", 0),
+        "connections_errors": stats.get("connections_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+        "returns_bad": stats.get("returns_bad", 0),
+    }
@@ -0,0 +1,85 @@
+import logging
+
+from psycopg_pool import AsyncConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresResponseCacheRepository:
+    """
+    Persistência do cache de respostas das ferramentas, compartilhada entre réplicas
+    """
+
+    def __init__(self, pool: AsyncConnectionPool):
+        self.pool = pool
+
+    async def setup(self) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tool_response_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at TIMESTAMPTZ NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS tool_response_cache_expires_at_idx
+                ON tool_response_cache (expires_at)
+                """
+            )
+
+    async def aget(self, namespace: str, key: str) -> tuple[str, float] | None:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT value, EXTRACT(EPOCH FROM (expires_at - now())) AS remaining
+                FROM tool_response_cache
+                WHERE namespace = %s AND key = %s AND expires_at > now()
+                """,
+                (namespace, key),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return row["value"], float(row["remaining"])
+
+    async def aput(
+        self, namespace: str, key: str, value: str, ttl_seconds: float
+    ) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO tool_response_cache (namespace, key, value, expires_at)
+                VALUES (%s, %s, %s, now() + make_interval(secs => %s))
+                ON CONFLICT (namespace, key)
+                DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """,
+                (namespace, key, value, ttl_seconds),
+            )
+
+    async def adelete(self, namespace: str, key: str | None = None) -> None:
+        async with self.pool.connection() as conn:
+            if key is None:
+                await conn.execute(
+                    "DELETE FROM tool_response_cache WHERE namespace = %s", (namespace,)
+                )
+            else:
+                await conn.execute(
+                    "DELETE FROM tool_response_cache WHERE namespace = %s AND key = %s",
+                    (namespace, key),
+                )
+
+    async def purge_expired(self) -> int:
+        """
+        Remove entradas expiradas; retorna a quantidade removida
+        """
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM tool_response_cache WHERE expires_at <= now()"
+            )
+            return cursor.rowcount
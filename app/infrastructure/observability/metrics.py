@@ -0,0 +1,310 @@
+import time
+from typing import Any, Callable
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Latências de chamadas remotas (LLM, agentes) vão de dezenas de ms a dezenas de s
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# Espera por conexão do pool e operações locais
+_FAST_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    5,
+    10,
+)
+_TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "proxy_http_requests_in_flight", "Requisições HTTP em andamento", ["endpoint"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "proxy_http_request_seconds",
+    "Duração das requisições HTTP",
+    ["endpoint", "method", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+GRAPH_RUNS_IN_FLIGHT = Gauge(
+    "proxy_graph_runs_in_flight", "Execuções do grafo em andamento"
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "proxy_admission_in_flight",
+    "Turnos admitidos em execução (limite global de concorrência)",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "proxy_admission_queue_depth", "Requisições aguardando vaga na fila de admissão"
+)
+ADMISSION_REJECTIONS = Counter(
+    "proxy_admission_rejections_total",
+    "Requisições recusadas com 429 (overloaded = fila cheia, rate_limited = limite do telefone)",
+    ["reason"],
+)
+CHAT_DUPLICATE_MESSAGES = Counter(
+    "proxy_chat_duplicate_messages_total",
+    "Reentregas de mensagens (mesmo message_id) respondidas sem executar o turno de novo",
+)
+CHAT_JOBS = Counter(
+    "proxy_chat_jobs_total", "Jobs de chat assíncronos por evento", ["event"]
+)
+CHAT_JOBS_IN_FLIGHT = Gauge(
+    "proxy_chat_jobs_in_flight", "Jobs de chat assíncronos em execução"
+)
+CHAT_JOB_CALLBACKS = Counter(
+    "proxy_chat_job_callbacks_total", "Entregas de resultado por callback", ["outcome"]
+)
+CHAT_BATCH_ITEMS = Counter(
+    "proxy_chat_batch_items_total",
+    "Turnos executados em lotes (/proxy/chat/batch)",
+    ["status"],
+)
+CHAT_BATCH_IN_FLIGHT = Gauge(
+    "proxy_chat_batch_in_flight",
+    "Turnos de lotes em execução, por agente remoto previsto",
+    ["upstream"],
+)
+DEADLINE_EXCEEDED = Counter(
+    "proxy_deadline_exceeded_total",
+    "Turnos cancelados por prazo expirado (respondidos com a mensagem padrão)",
+    ["mode"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "proxy_log_records_dropped_total",
+    "Registros de log descartados com a fila de escrita cheia",
+)
+SPECULATIVE_PREFETCHES = Counter(
+    "proxy_speculative_prefetches_total",
+    "Pré-buscas especulativas das ferramentas: iniciadas, usadas (hit), descartadas por "
+    "falha (failed) e não consumidas (wasted)",
+    ["tool", "outcome"],
+)
+GRAPH_INVOKE_SECONDS = Histogram(
+    "proxy_graph_invoke_seconds",
+    "Duração de um turno no grafo supervisor",
+    ["mode", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "proxy_db_pool_wait_seconds",
+    "Tempo de espera por uma conexão do pool Postgres",
+    buckets=_FAST_BUCKETS,
+)
+MEMORY_SEARCH_SECONDS = Histogram(
+    "proxy_memory_search_seconds",
+    "Duração da busca de memórias do usuário",
+    ["mode"],
+    buckets=_FAST_BUCKETS,
+)
+LLM_CALL_SECONDS = Histogram(
+    "proxy_llm_call_seconds",
+    "Duração de cada chamada ao modelo, por agente",
+    ["agent", "model", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "proxy_llm_tokens",
+    "Tokens por chamada ao modelo (prompt/completion), por agente",
+    ["agent", "model", "kind"],
+    buckets=_TOKEN_BUCKETS,
+)
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "proxy_llm_calls_in_flight", "Chamadas ao modelo em andamento"
+)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "proxy_upstream_request_seconds",
+    "Duração das chamadas aos agentes remotos, por status (ou tipo de erro)",
+    ["upstream", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge(
+    "proxy_upstream_requests_in_flight",
+    "Chamadas aos agentes remotos em andamento",
+    ["upstream"],
+)
+UPSTREAM_RETRIES = Counter(
+    "proxy_upstream_retries_total",
+    "Novas tentativas de chamadas aos agentes remotos",
+    ["upstream"],
+)
+UPSTREAM_HEDGES = Counter(
+    "proxy_upstream_hedges_total",
+    "Requisições duplicadas (hedge) aos agentes remotos: enviadas e vencedoras",
+    ["upstream", "outcome"],
+)
+UPSTREAM_BREAKER_STATE = Gauge(
+    "proxy_upstream_circuit_state",
+    "Estado do circuit breaker por agente remoto (0 = fechado, 1 = half-open, 2 = aberto)",
+    ["upstream"],
+)
+UPSTREAM_BREAKER_REJECTIONS = Counter(
+    "proxy_upstream_circuit_rejections_total",
+    "Chamadas recusadas sem tentativa por circuito aberto",
+    ["upstream"],
+)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Mede cada chamada ao modelo (duração e tokens), identificando o agente pelo nó
+    de primeiro nível do grafo (supervisor, especialistas, resumo do histórico)
+    """
+
+    # Executa no próprio loop, sem thread auxiliar (apenas atualiza métricas)
+    run_inline = True
+
+    def __init__(self):
+        self._calls: dict[UUID, tuple[float, str, str]] = {}
+
+    @staticmethod
+    def _agent(metadata: dict | None) -> str:
+        metadata = metadata or {}
+        namespace = metadata.get("checkpoint_ns") or ""
+        return namespace.split(":")[0] or metadata.get("langgraph_node") or "unknown"
+
+    def on_chat_model_start(
+        self,
+        serialized: dict,
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: dict | None = None,
+        **kwargs: Any,
+    ) -> None:
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._calls[run_id] = (time.perf_counter(), self._agent(metadata), model)
+        LLM_CALLS_IN_FLIGHT.inc()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        start_time, agent, model = call
+        LLM_CALLS_IN_FLIGHT.dec()
+        LLM_CALL_SECONDS.labels(agent, model, "success").observe(
+            time.perf_counter() - start_time
+        )
+
+        usage = None
+        for generations in response.generations:
+            for generation in generations:
+                usage = (
+                    getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    or usage
+                )
+        if usage:
+            LLM_TOKENS.labels(agent, model, "prompt").observe(
+                usage.get("input_tokens", 0)
+            )
+            LLM_TOKENS.labels(agent, model, "completion").observe(
+                usage.get("output_tokens", 0)
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        start_time, agent, model = call
+        LLM_CALLS_IN_FLIGHT.dec()
+        LLM_CALL_SECONDS.labels(agent, model, "error").observe(
+            time.perf_counter() - start_time
+        )
+
+
+class StatsCollector(Collector):
+    """
+    Exporta, no momento da coleta, contadores mantidos pela própria aplicação
+    (caches das ferramentas, fast path, pool Postgres) sem duplicá-los
+    """
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], Any]] = {}
+
+    def register(self, name: str, source: Callable[[], Any]) -> None:
+        self._sources[name] = source
+
+    def collect(self):
+        if "tool_cache" in self._sources:
+            yield from self._collect_caches(self._sources["tool_cache"]())
+        if "fast_path" in self._sources:
+            yield from self._collect_fast_path(self._sources["fast_path"]())
+        if "db_pool" in self._sources:
+            yield from self._collect_pool(self._sources["db_pool"]())
+
+    @staticmethod
+    def _collect_caches(stats: dict[str, dict]):
+        events = CounterMetricFamily(
+            "proxy_tool_cache_events",
+            "Eventos dos caches de ferramentas",
+            labels=["cache", "event"],
+        )
+        entries = GaugeMetricFamily(
+            "proxy_tool_cache_entries",
+            "Entradas nos caches de ferramentas",
+            labels=["cache"],
+        )
+        for namespace, snapshot in stats.items():
+            entries.add_metric([namespace], snapshot.get("entries", 0))
+            for event in (
+                "hits",
+                "misses",
+                "coalesced",
+                "persistent_hits",
+                "evictions",
+                "expirations",
+                "load_errors",
+            ):
+                events.add_metric([namespace, event], snapshot.get(event, 0))
+        yield events
+        yield entries
+
+    @staticmethod
+    def _collect_fast_path(snapshot: dict):
+        decisions = CounterMetricFamily(
+            "proxy_fast_path_decisions",
+            "Decisões do roteador determinístico",
+            labels=["rule"],
+        )
+        for rule, count in (snapshot.get("rules") or {}).items():
+            decisions.add_metric([rule], count)
+        yield decisions
+
+    @staticmethod
+    def _collect_pool(stats: dict):
+        for key in ("pool_size", "pool_available", "requests_waiting"):
+            yield GaugeMetricFamily(
+                f"proxy_db_{key}", f"Pool Postgres: {key}", value=stats.get(key) or 0
+            )
+        for key in (
+            "requests_num",
+            "requests_queued",
+            "requests_errors",
+            "connections_num",
+            "connections_errors",
+            "connections_lost",
+        ):
+            yield CounterMetricFamily(
+                f"proxy_db_{key}", f"Pool Postgres: {key}", value=stats.get(key) or 0
+            )
+        # Tempo acumulado para abrir conexões (psycopg_pool mede em ms)
+        yield CounterMetricFamily(
+            "proxy_db_connect_seconds",
+            "Tempo acumulado abrindo conexões com o Postgres",
+            value=(stats.get("connections_ms") or 0) / 1000,
+        )
+
+
+metrics_callback = MetricsCallbackHandler()
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
@@ -0,0 +1,320 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterator
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+from langgraph.errors import GraphBubbleUp
+
+from app.config.settings import Settings
+
+try:
+    # Pacote opcional (extra "tracing"); sem ele o tracing fica desativado
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "proxy-agent"
+
+_provider = None
+
+
+def configure_tracing(settings: Settings) -> bool:
+    """
+    Registra o TracerProvider com exportação OTLP/HTTP em lote; retorna se o tracing
+    ficou ativo
+    """
+    global _provider
+    if not settings.tracing_enabled or _provider is not None:
+        return _provider is not None
+    if trace is None:
+        logger.warning(
+            "TRACING_ENABLED=true, mas o OpenTelemetry não está instalado "
+            "(uv sync --extra tracing); tracing desativado"
+        )
+        return False
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        # Respeita a decisão de amostragem de quem iniciou o trace (traceparent)
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint))
+    )
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info(f"Tracing OpenTelemetry ativo (OTLP: {settings.tracing_otlp_endpoint})")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """
+    Exporta os spans pendentes ao desligar a aplicação
+    """
+    global _provider
+    provider, _provider = _provider, None
+    if provider is not None:
+        provider.shutdown()
+
+
+def tracing_enabled() -> bool:
+    return _provider is not None
+
+
+def _tracer():
+    return trace.get_tracer(TRACER_NAME)
+
+
+@contextmanager
+def server_span(
+    name: str, headers: dict[str, str], attributes: dict[str, Any]
+) -> Iterator[Any]:
+    """
+    Span raiz de uma requisição recebida, continuando o trace do chamador (traceparent)
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    with _tracer().start_as_current_span(
+        name,
+        context=propagate.extract(headers),
+        kind=SpanKind.SERVER,
+        attributes=attributes,
+    ) as span:
+        yield span
+
+
+@contextmanager
+def upstream_span(upstream: str, url: str) -> Iterator[Any]:
+    """
+    Span de uma chamada HTTP a um agente remoto, filho do span da ferramenta em
+    execução; enquanto ativo, o hook do cliente propaga o traceparent
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    span = _tracer().start_span(
+        f"POST {upstream}",
+        context=tracing_callback.current_run_context(),
+        kind=SpanKind.CLIENT,
+        attributes={
+            "http.request.method": "POST",
+            "url.full": url,
+            "upstream": upstream,
+        },
+    )
+    with trace.use_span(span, end_on_exit=True):
+        yield span
+
+
+def record_response(span: Any, response: httpx.Response) -> None:
+    if span is None:
+        return
+    span.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 400:
+        span.set_status(Status(StatusCode.ERROR, f"status {response.status_code}"))
+
+
+async def inject_trace_headers(request: httpx.Request) -> None:
+    """
+    Hook de request do httpx: headers W3C (traceparent/tracestate) do span atual
+    """
+    if tracing_enabled():
+        propagate.inject(request.headers)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Spans do grafo a partir dos callbacks do LangChain: execução do grafo, cada nó
+    (supervisor, especialistas e seus nós internos), chamadas ao modelo (com tokens) e
+    ferramentas. O pai de cada span é o span do run ancestral mais próximo.
+    """
+
+    # Executa no próprio loop, no contexto de quem dispara o callback
+    run_inline = True
+
+    def __init__(self):
+        self._spans: dict[UUID, Any] = {}
+        self._parents: dict[UUID, UUID | None] = {}
+        # Contexto OpenTelemetry (span da requisição) de cada execução raiz
+        self._root_contexts: dict[UUID, Any] = {}
+
+    def current_run_context(self):
+        """
+        Contexto com o span do run LangChain em execução (ex.: a ferramenta que faz a
+        chamada HTTP); fora de um run, o contexto atual
+        """
+        config = var_child_runnable_config.get() or {}
+        run_id = getattr(config.get("callbacks"), "parent_run_id", None)
+        return self._parent_context(run_id) if run_id else otel_context.get_current()
+
+    def _parent_context(self, run_id: UUID | None):
+        seen = set()
+        while run_id is not None and run_id not in seen:
+            seen.add(run_id)
+            span = self._spans.get(run_id)
+            if span is not None:
+                return trace.set_span_in_context(span)
+            if run_id in self._root_contexts:
+                return self._root_contexts[run_id]
+            run_id = self._parents.get(run_id)
+        return otel_context.get_current()
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        name: str | None,
+        attributes: dict[str, Any] | None = None,
+        kind=None,
+    ) -> None:
+        self._parents[run_id] = parent_run_id
+        if parent_run_id is None:
+            self._root_contexts[run_id] = otel_context.get_current()
+        if name is None:
+            return
+        self._spans[run_id] = _tracer().start_span(
+            name,
+            context=self._parent_context(parent_run_id),
+            kind=kind or SpanKind.INTERNAL,
+            attributes=attributes or {},
+        )
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> Any:
+        self._parents.pop(run_id, None)
+        self._root_contexts.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            if error is not None:
+                span.record_exception(error)
+                span.set_status(Status(StatusCode.ERROR, type(error).__name__))
+            span.end()
+        return span
+
+    def on_chain_start(
+        self,
+        serialized: dict,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        name = kwargs.get("name") or ""
+        node = metadata.get("langgraph_node")
+        if parent_run_id is None:
+            span_name = f"graph {name or 'invoke'}"
+        elif node and node == name:
+            # O próprio nó (e não os runnables internos dele); o grafo de um especialista
+            # tem o mesmo nome do nó que o executa e não ganha um span a mais
+            span_name = f"node {node}"
+            parent = self._spans.get(parent_run_id)
+            if getattr(parent, "name", None) == span_name:
+                span_name = None
+        else:
+            span_name = None
+        self._start(
+            run_id,
+            parent_run_id,
+            span_name,
+            {"langgraph.node": node or "", "thread_id": metadata.get("thread_id", "")},
+        )
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # Handoffs entre agentes sobem pelo grafo como exceção (ParentCommand): não é falha
+        self._end(run_id, None if isinstance(error, GraphBubbleUp) else error)
+
+    def on_chat_model_start(
+        self,
+        serialized: dict,
+        messages: list,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or "unknown"
+        self._start(
+            run_id,
+            parent_run_id,
+            f"llm {model}",
+            {
+                "gen_ai.request.model": model,
+                "gen_ai.system": metadata.get("ls_provider") or "unknown",
+                "langgraph.node": metadata.get("langgraph_node") or "",
+            },
+            kind=SpanKind.CLIENT,
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None:
+            usage = None
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage = getattr(message, "usage_metadata", None) or usage
+            if usage:
+                span.set_attribute(
+                    "gen_ai.usage.input_tokens", usage.get("input_tokens", 0)
+                )
+                span.set_attribute(
+                    "gen_ai.usage.output_tokens", usage.get("output_tokens", 0)
+                )
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: dict,
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool {name}", {"tool.name": name})
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, None if isinstance(error, GraphBubbleUp) else error)
+
+
+tracing_callback = TracingCallbackHandler()
+
+
+def tracing_callbacks() -> list[BaseCallbackHandler]:
+    """
+    Callbacks a incluir na configuração do grafo (vazio com o tracing desativado)
+    """
+    return [tracing_callback] if tracing_enabled() else []
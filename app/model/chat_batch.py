@@ -0,0 +1,33 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from app.model.chat_request import ChatRequest
+
+
+class ChatBatchRequest(BaseModel):
+    requests: list[ChatRequest] = Field(min_length=1)
+    # Execuções simultâneas deste lote (limitado por CHAT_BATCH_MAX_CONCURRENT)
+    concurrency: int | None = Field(default=None, ge=1)
+
+
+class ChatBatchItemResult(BaseModel):
+    type: Literal["result"] = "result"
+    # Posição do pedido no lote (os resultados chegam na ordem de conclusão)
+    index: int
+    phone: str
+    message_id: str | None = None
+    status: Literal["ok", "error"]
+    message: str
+    error: str | None = None
+    # Agente remoto previsto para o turno, usado na distribuição das vagas
+    upstream: str
+    execution_time: str
+
+
+class ChatBatchSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    total: int
+    succeeded: int
+    failed: int
+    execution_time: str
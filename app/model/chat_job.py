@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.model.chat_request import ChatRequest
+
+
+class AsyncChatRequest(ChatRequest):
+    # URL que recebe o resultado por POST; sem ela, vale CHAT_JOB_CALLBACK_URL. Outras
+    # URLs só são aceitas com host em CHAT_JOB_CALLBACK_HOSTS
+    callback_url: str | None = None
+
+
+class ChatJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+class ChatJobStatus(BaseModel):
+    job_id: str
+    phone: str
+    status: str
+    message: str | None = None
+    error: str | None = None
+    attempts: int
+    callback_status: str | None = None
+    created_at: datetime
+    updated_at: datetime
@@ -1,5 +1,8 @@
 from pydantic import BaseModel
 
+
 class ChatRequest(BaseModel):
     message: str
-    phone: str
\ No newline at end of file
+    phone: str
+    # Id da mensagem no provedor; reentregas com o mesmo id não executam o turno de novo
+    message_id: str | None = None
@@ -0,0 +1,74 @@
+from fastapi import Request
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.store.postgres.aio import AsyncPostgresStore
+
+from app.application.agent.proxy_agent_cache import ProxyAgentCache
+from app.application.service.admission_control import AdmissionController
+from app.application.service.chat_batch import ChatBatchRunner
+from app.application.service.chat_job_worker import ChatJobWorker
+from app.application.service.chat_service import ChatService
+from app.application.service.idempotency_store import IdempotencyStore
+from app.application.service.message_coalescer import MessageCoalescer
+
+
+def get_store(request: Request) -> AsyncPostgresStore:
+    """
+    Store compartilhado, criado no lifespan da aplicação
+    """
+    return request.app.state.store
+
+
+def get_checkpointer(request: Request) -> AsyncPostgresSaver:
+    """
+    Checkpointer compartilhado, criado no lifespan da aplicação
+    """
+    return request.app.state.checkpointer
+
+
+def get_proxy_agent_cache(request: Request) -> ProxyAgentCache:
+    """
+    Cache do grafo supervisor compilado, criado no lifespan da aplicação
+    """
+    return request.app.state.proxy_agent_cache
+
+
+def get_chat_service(request: Request) -> ChatService:
+    """
+    Serviço de execução de turnos de conversa, criado no lifespan da aplicação
+    """
+    return request.app.state.chat_service
+
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    """
+    Controle de admissão (concorrência global e limite por telefone), criado no lifespan
+    """
+    return request.app.state.admission_controller
+
+
+def get_chat_job_worker(request: Request) -> ChatJobWorker:
+    """
+    Fila e workers dos turnos assíncronos, criados no lifespan da aplicação
+    """
+    return request.app.state.chat_job_worker
+
+
+def get_chat_batch_runner(request: Request) -> ChatBatchRunner:
+    """
+    Executor dos lotes de turnos (limites compartilhados entre os lotes), criado no lifespan
+    """
+    return request.app.state.chat_batch_runner
+
+
+def get_idempotency_store(request: Request) -> IdempotencyStore:
+    """
+    Resultados dos turnos por message_id (reentregas do provedor), criado no lifespan
+    """
+    return request.app.state.idempotency_store
+
+
+def get_message_coalescer(request: Request) -> MessageCoalescer:
+    """
+    Agrupador de mensagens consecutivas por telefone, criado no lifespan da aplicação
+    """
+    return request.app.state.message_coalescer
@@ -1,120 +1,363 @@
-from fastapi import APIRouter, HTTPException, Depends
-import time
-from app.application.agent.proxy_agent_builder import ProxyAgentBuilder
-from langchain_core.messages import HumanMessage, SystemMessage
+import json
 import logging
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.application.agent.fast_path_router import fast_path_stats
+from app.application.deadline import Deadline, DeadlineExceeded, deadline_scope
+from app.application.service.admission_control import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionTicket,
+)
+from app.application.service.chat_batch import (
+    BatchItem,
+    ChatBatchRunner,
+    predict_upstream,
+)
+from app.application.service.chat_job_worker import ChatJobWorker
+from app.application.service.chat_service import DEADLINE_REPLY, ChatService
+from app.application.service.idempotency_store import IdempotencyStore
+from app.application.service.message_coalescer import MessageCoalescer
+from app.application.tool.budget_agent_tool import invalidate_budget_cache
+from app.application.tool.response_cache import get_cache_stats
+from app.config.settings import get_settings
+from app.infrastructure.observability.metrics import DEADLINE_EXCEEDED
+from app.infrastructure.observability.structured_logging import log_context, log_payload
+from app.model.chat_batch import ChatBatchItemResult, ChatBatchRequest, ChatBatchSummary
+from app.model.chat_job import AsyncChatRequest, ChatJobAccepted, ChatJobStatus
 from app.model.chat_request import ChatRequest
 from app.model.chat_response import ChatResponse
-import os
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from langgraph.store.postgres.aio import AsyncPostgresStore
+from app.presentation.dependencies import (
+    get_admission_controller,
+    get_chat_batch_runner,
+    get_chat_job_worker,
+    get_chat_service,
+    get_idempotency_store,
+    get_message_coalescer,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+ERROR_MESSAGE = "Desculpe, ocorreu um erro interno."
+
+
+def _request_deadline() -> Deadline | None:
+    """
+    Prazo do turno contado a partir da chegada da requisição
+    """
+    seconds = get_settings().chat_deadline_seconds
+    return Deadline.after(seconds) if seconds > 0 else None
+
+
+def _too_many_requests(rejection: AdmissionRejected, phone: str) -> HTTPException:
+    logger.warning(f"Requisição recusada ({rejection.reason}) - {phone}")
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Muitas requisições no momento; tente novamente em instantes.",
+        headers={"Retry-After": rejection.retry_after_header},
+    )
+
+
+async def _admit(
+    admission_controller: AdmissionController, phone: str, deadline: Deadline | None
+) -> AdmissionTicket:
+    """
+    Reserva uma vaga de execução (a espera também consome o prazo do turno) ou responde 429
+    """
+    try:
+        return await admission_controller.acquire(
+            phone, timeout=deadline.remaining() if deadline else None
+        )
+    except AdmissionRejected as e:
+        raise _too_many_requests(e, phone) from None
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    message_coalescer: MessageCoalescer = Depends(get_message_coalescer),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+):
     """
     Endpoint para conversar com o proxy agent supervisor
     """
     start_time = time.time()
-    
-    
+    deadline = _request_deadline()
+
+    async def run_turn() -> str:
+        try:
+            # Mensagens em sequência do mesmo telefone viram um único turno, admitido
+            # uma única vez pelo handler do agrupador; o prazo segue no contexto até o
+            # grafo e as ferramentas
+            with deadline_scope(deadline):
+                return await message_coalescer.submit(request.phone, request.message)
+        except AdmissionRejected as e:
+            raise _too_many_requests(e, request.phone) from None
+
     try:
         message_text = request.message
         phone = request.phone
         thread_id = phone
-        user_id = phone
-
-        logger.info(f"Pergunta recebida: {message_text} - {phone} - {thread_id}")
-
-        dsn = os.getenv("DB_URI")
-
-        logger.info(f"A tentar conectar com a DSN: {dsn}")
-
-        async with (
-            AsyncPostgresStore.from_conn_string(dsn) as store, 
-            AsyncPostgresSaver.from_conn_string(dsn) as checkpointer
-            ):
-            #await store.setup()
-            #await checkpointer.setup()
 
-            # Cria supervisor a cada requisição (evita cache)
-            proxy_supervisor = ProxyAgentBuilder().compile(checkpointer=checkpointer, store=store)
-
-            # Cria namespace para memórias por usuário
-            namespace = ("memories", user_id)
+        # O conteúdo da mensagem vai apenas em uma amostra dos logs
+        with log_context(thread_id=thread_id):
+            logger.info(f"Pergunta recebida ({len(message_text)} caracteres)")
+            log_payload(logger, "Pergunta", message_text)
 
+        if request.message_id:
+            # Reentregas do provedor aguardam o turno original (até o prazo do turno) ou
+            # recebem a resposta guardada
             try:
-                memories = await store.asearch(namespace, query=str(message_text))
-            except TypeError:
-                # Compatibilidade caso a assinatura exija parâmetros nomeados diferentes
-                memories = await store.asearch(namespace=namespace, query=str(message_text))
-            info = "\n".join([m.value.get("data", "") for m in (memories or []) if m and getattr(m, "value", None)])
-
-            system_msg = ""
-            if info:
-                system_msg = f"Você é um assistente útil. Informações do usuário: {info}"
-
-            persona_msg = (
-                "Adote a persona 'Yasmin - Doutor Sofá'. "
-                "Na primeira resposta, cumprimente cordialmente e apresente-se como Yasmin; "
-                "não solicite foto do item nesta etapa; pergunte de forma objetiva qual item deseja higienizar. "
-                "Para orçamento e agendamento, o supervisor fará o encaminhamento apropriado. "
-                "Não reescreva respostas dos especialistas; repasse-as exatamente ao usuário. "
-                "Não antecipe coleta de dados; aguarde o fluxo automático."
-                "Evite repetir conteúdo idêntico já enviado nesta conversa."
-            )
+                with deadline_scope(deadline):
+                    response_text = await idempotency_store.run(
+                        IdempotencyStore.key("chat", phone, request.message_id), run_turn
+                    )
+            except DeadlineExceeded:
+                DEADLINE_EXCEEDED.labels("idempotency").inc()
+                logger.warning(f"Prazo expirado aguardando o turno original - {phone}")
+                response_text = DEADLINE_REPLY
+        else:
+            response_text = await run_turn()
 
-            # Se o usuário pedir para lembrar algo, persistir memória simples
-            lower = (message_text or "").lower()
-            if "lembre" in lower or "remember" in lower:
-                # Heurística: extrair após ':' se existir
-                to_remember = message_text.split(":", 1)[-1].strip() if ":" in message_text else message_text
-                await store.aput(namespace, str(__import__("uuid").uuid4()), {"data": to_remember})
-
-            # Cria estado inicial com SystemMessage (se existir) + HumanMessage
-            messages_init = []
-
-            if persona_msg:
-                messages_init.append(SystemMessage(content=persona_msg))
-
-            if system_msg:
-                messages_init.append(SystemMessage(content=system_msg))
-            messages_init.append(HumanMessage(content=request.message))
-
-            # Cria estado inicial
-            initial_state = {"messages": messages_init}
-
-            config = {"configurable": {"thread_id": thread_id, "user_id": user_id}}
-            
-            # Executa o supervisor
-            result = await proxy_supervisor.ainvoke(initial_state, config=config )
-        
-            # Extrai resposta final e agente usado de forma simples
-            messages = result.get("messages", [])
-            last_message = messages[-1]
-            response_text = last_message.content
-            
-            logger.info(f"Requisição processada - Thread ID: {thread_id}")
+        logger.info(f"Requisição processada - Thread ID: {thread_id}")
 
         total_time = time.time() - start_time
-        
+
         return ChatResponse(
             message=response_text,
             phone=request.phone,
             execution_time=f"{total_time:.2f}s",
         )
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         # Captura stacktrace completo para diagnóstico
         import traceback
+
         logger.error(f"Erro no chat: {str(e)}")
         logger.error(f"Stacktrace completo: {traceback.format_exc()}")
         total_time = time.time() - start_time
         return ChatResponse(
-            message="Desculpe, ocorreu um erro interno.",
+            message=ERROR_MESSAGE,
             phone=request.phone,
             execution_time=f"{total_time:.2f}s",
-        )
\ No newline at end of file
+        )
+
+
+@router.post(
+    "/chat/async", response_model=ChatJobAccepted, status_code=status.HTTP_202_ACCEPTED
+)
+async def chat_async(
+    request: AsyncChatRequest,
+    chat_job_worker: ChatJobWorker = Depends(get_chat_job_worker),
+    admission_controller: AdmissionController = Depends(get_admission_controller),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+):
+    """
+    Enfileira o turno e responde imediatamente; o resultado é entregue por POST na
+    URL de callback e pode ser consultado em GET /proxy/jobs/{job_id}
+    """
+    created = None
+    if request.callback_url and not chat_job_worker.callback_allowed(
+        request.callback_url
+    ):
+        raise HTTPException(status_code=422, detail="callback_url não permitida")
+
+    async def enqueue() -> str:
+        nonlocal created
+        # A concorrência é limitada pelos workers; aqui vale apenas o limite por telefone
+        try:
+            admission_controller.check_rate(request.phone)
+        except AdmissionRejected as e:
+            raise _too_many_requests(e, request.phone) from None
+        job = await chat_job_worker.enqueue(
+            request.phone, request.message, request.callback_url
+        )
+        logger.info(f"Job {job.id} enfileirado - {request.phone}")
+        created = job
+        return job.id
+
+    if not request.message_id:
+        job_id = await enqueue()
+    else:
+        # Reentrega do mesmo webhook: devolve o job já criado em vez de enfileirar outro
+        job_id = await idempotency_store.run(
+            IdempotencyStore.key("async", request.phone, request.message_id), enqueue
+        )
+    job = created or await chat_job_worker.repository.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return ChatJobAccepted(
+        job_id=job.id, status=job.status, status_url=f"/proxy/jobs/{job.id}"
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=ChatJobStatus)
+async def chat_job_status(
+    job_id: str,
+    chat_job_worker: ChatJobWorker = Depends(get_chat_job_worker),
+):
+    """
+    Situação de um turno assíncrono e, quando concluído, a resposta
+    """
+    job = await chat_job_worker.repository.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return ChatJobStatus(
+        job_id=job.id,
+        phone=job.phone,
+        status=job.status,
+        message=job.response,
+        error=job.error,
+        attempts=job.attempts,
+        callback_status=job.callback_status,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    admission_controller: AdmissionController = Depends(get_admission_controller),
+):
+    """
+    Endpoint de conversa com resposta em Server-Sent Events: emite o progresso
+    (delegação, ferramentas) e os tokens da resposta final à medida que chegam
+    """
+    start_time = time.time()
+    deadline = _request_deadline()
+    with log_context(thread_id=request.phone):
+        logger.info(f"Pergunta recebida (stream, {len(request.message)} caracteres)")
+        log_payload(logger, "Pergunta", request.message)
+    # A vaga é liberada ao fim do stream (ou pela tarefa de fundo, se o stream não iniciar)
+    ticket = await _admit(admission_controller, request.phone, deadline)
+
+    async def event_source():
+        try:
+            with deadline_scope(deadline):
+                async for item in chat_service.stream(request.message, request.phone):
+                    if item["event"] == "message":
+                        item["data"].update(
+                            phone=request.phone,
+                            execution_time=f"{time.time() - start_time:.2f}s",
+                        )
+                    yield _sse(item["event"], item["data"])
+        except Exception as e:
+            logger.exception(f"Erro no chat (stream): {str(e)}")
+            yield _sse(
+                "error",
+                {
+                    "message": ERROR_MESSAGE,
+                    "phone": request.phone,
+                    "execution_time": f"{time.time() - start_time:.2f}s",
+                },
+            )
+        finally:
+            ticket.release()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
+
+
+@router.post("/chat/batch")
+async def chat_batch(
+    request: ChatBatchRequest,
+    chat_batch_runner: ChatBatchRunner = Depends(get_chat_batch_runner),
+):
+    """
+    Executa vários turnos (reprocessamentos, campanhas) com concorrência limitada e em
+    ordem dentro de cada conversa. Responde em NDJSON: uma linha por turno, assim que
+    ele termina, e uma linha final com o resumo do lote
+    """
+    max_items = get_settings().chat_batch_max_items
+    if len(request.requests) > max_items:
+        raise HTTPException(
+            status_code=413, detail=f"O lote aceita até {max_items} pedidos"
+        )
+
+    start_time = time.time()
+    items = [
+        BatchItem(
+            index=index,
+            phone=item.phone,
+            message=item.message,
+            message_id=item.message_id,
+            upstream=predict_upstream(item.message),
+        )
+        for index, item in enumerate(request.requests)
+    ]
+    logger.info(f"Lote recebido ({len(items)} pedidos)")
+
+    async def results():
+        succeeded = 0
+        async for result in chat_batch_runner.run(items, request.concurrency):
+            item = result.item
+            if result.error is None:
+                succeeded += 1
+            line = ChatBatchItemResult(
+                index=item.index,
+                phone=item.phone,
+                message_id=item.message_id,
+                status="ok" if result.error is None else "error",
+                message=ERROR_MESSAGE if result.error is not None else result.response,
+                error=type(result.error).__name__ if result.error is not None else None,
+                upstream=item.upstream,
+                execution_time=f"{result.seconds:.2f}s",
+            )
+            yield line.model_dump_json() + "\n"
+        summary = ChatBatchSummary(
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            execution_time=f"{time.time() - start_time:.2f}s",
+        )
+        logger.info(f"Lote concluído ({succeeded}/{len(items)} turnos sem erro)")
+        yield summary.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Contadores de acerto/falha dos caches de respostas das ferramentas
+    """
+    return get_cache_stats()
+
+
+@router.get("/fast-path/stats")
+async def fast_path_stats_endpoint():
+    """
+    Taxa de acerto do roteador determinístico (turnos resolvidos sem o LLM do supervisor)
+    """
+    return fast_path_stats.snapshot()
+
+
+@router.post("/cache/budget/invalidate")
+async def budget_cache_invalidate():
+    """
+    Invalida os orçamentos cacheados; chamar quando a tabela de preços mudar
+    """
+    await invalidate_budget_cache()
+    return {"status": "invalidated"}
@@ -0,0 +1,115 @@
+"""
+Avaliação offline do roteador determinístico (fast path) sobre as conversas de
+exemplo: reproduz cada turno do cliente com o histórico até ali e reporta a taxa
+de turnos resolvidos sem o LLM do supervisor, por regra.
+
+Uso:
+    python -m benchmarks.evaluate_fast_path --file exemplos_atedimento.md --coalesce -v
+"""
+
+import argparse
+import re
+from collections import Counter
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.application.agent.fast_path_router import FastPathDecision, classify
+
+_EXAMPLE_RE = re.compile(r"^##\s+Exemplo\s+(\S+)")
+_SPEAKER_RE = re.compile(r"^\*\*(?P<speaker>[^*]+)\*\*:\s?(?P<text>.*)$")
+_CLIENT = "Cliente"
+
+
+def parse_examples(path: Path) -> dict[str, list[BaseMessage]]:
+    """
+    Converte o markdown de exemplos em conversas (Cliente -> HumanMessage, demais -> AIMessage)
+    """
+    examples: dict[str, list[BaseMessage]] = {}
+    current: list[BaseMessage] | None = None
+    for line in path.read_text(encoding="utf-8").splitlines():
+        header = _EXAMPLE_RE.match(line)
+        if header:
+            current = examples.setdefault(header.group(1), [])
+            continue
+        if current is None:
+            continue
+        turn = _SPEAKER_RE.match(line)
+        if turn:
+            text = turn.group("text").strip()
+            if turn.group("speaker").strip() == _CLIENT:
+                current.append(HumanMessage(content=text))
+            else:
+                current.append(AIMessage(content=text))
+        elif current:
+            # Linha de continuação da última mensagem
+            current[-1].content = f"{current[-1].content}\n{line}"
+    return examples
+
+
+def _merge_client_bursts(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """
+    Une mensagens consecutivas do cliente, como faz o MessageCoalescer
+    """
+    merged: list[BaseMessage] = []
+    for message in messages:
+        if (
+            merged
+            and isinstance(message, HumanMessage)
+            and isinstance(merged[-1], HumanMessage)
+        ):
+            merged[-1] = HumanMessage(content=f"{merged[-1].content}\n{message.content}")
+        else:
+            merged.append(message)
+    return merged
+
+
+def evaluate(
+    examples: dict[str, list[BaseMessage]], coalesce: bool
+) -> list[tuple[str, str, FastPathDecision]]:
+    results = []
+    for name, messages in examples.items():
+        if coalesce:
+            messages = _merge_client_bursts(messages)
+        for index, message in enumerate(messages):
+            if isinstance(message, HumanMessage):
+                decision = classify(messages[: index + 1])
+                results.append((name, str(message.content), decision))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--file", default="exemplos_atedimento.md")
+    parser.add_argument(
+        "--coalesce", action="store_true", help="une mensagens consecutivas do cliente"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="lista as decisões do fast path"
+    )
+    args = parser.parse_args()
+
+    results = evaluate(parse_examples(Path(args.file)), args.coalesce)
+    rules = Counter(decision.rule for _, _, decision in results)
+    total = len(results)
+    hits = total - rules.get("llm_fallback", 0)
+
+    print(f"Turnos do cliente: {total}")
+    print(
+        f"Resolvidos pelo fast path: {hits} ({hits / total:.1%})"
+        if total
+        else "Nenhum turno"
+    )
+    for rule, count in rules.most_common():
+        print(f"  {rule:<25} {count}")
+
+    if args.verbose:
+        print()
+        for name, text, decision in results:
+            if decision.rule != "llm_fallback":
+                preview = text.replace("\n", " / ")[:70]
+                print(f"[{name}] {decision.rule:<24} -> {decision.goto:<30} {preview}")
+
+
+if __name__ == "__main__":
+    main()
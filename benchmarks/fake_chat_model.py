@@ -0,0 +1,32 @@
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Modelo de chat local que responde sempre o mesmo texto, sem chamadas de rede.
+    Permite medir o overhead do grafo isolado da latência do LLM.
+    """
+
+    reply: str = "Oi, eu sou a Yasmin, da Doutor Sofá. Em que posso ajudar?"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.reply))]
+        )
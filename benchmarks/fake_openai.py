@@ -0,0 +1,207 @@
+"""
+Servidor local compatível com a API de chat da OpenAI (POST /v1/chat/completions)
+que responde com as decisões do modelo roteirizado. Basta apontar OPENAI_BASE_URL
+(ou o base_url de um papel, MODEL_ROLES__<PAPEL>__BASE_URL) para ele.
+
+A latência depende do modelo pedido: um custo fixo por chamada mais um custo por
+token gerado. O uso de tokens é estimado (~4 caracteres por token) e max_tokens
+trunca o texto gerado, como na API real.
+
+Uso isolado:
+    python -m benchmarks.fake_openai --port 9200 --latency gpt-4o-mini=400:8 --latency gpt-4.1-nano=150:3
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_openai.chat_models.base import (
+    _convert_dict_to_message,
+    _convert_message_to_dict,
+)
+
+from benchmarks.scripted_chat_model import ScriptedChatModel
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class ModelLatency:
+    """
+    Latência de um modelo: custo fixo por chamada e custo por token gerado (ms)
+    """
+
+    base_ms: float = 300.0
+    per_token_ms: float = 5.0
+
+    @classmethod
+    def parse(cls, spec: str) -> tuple[str, "ModelLatency"]:
+        """
+        Formato 'modelo=base_ms[:ms_por_token]', ex.: 'gpt-4.1-nano=150:3'
+        """
+        model, _, values = spec.partition("=")
+        return model, cls(*[float(v) for v in values.split(":")])
+
+    def seconds(self, completion_tokens: int) -> float:
+        return (self.base_ms + self.per_token_ms * completion_tokens) / 1000
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def _to_messages(payload: list[dict]) -> list[BaseMessage]:
+    messages = []
+    tool_names: dict[str, str] = {}
+    for item in payload:
+        message = _convert_dict_to_message(item)
+        if isinstance(message, AIMessage):
+            tool_names.update({call["id"]: call["name"] for call in message.tool_calls})
+        elif isinstance(message, ToolMessage):
+            # O formato da API não traz o nome da ferramenta; o modelo roteirizado usa
+            message.name = tool_names.get(message.tool_call_id, "")
+        messages.append(message)
+    return messages
+
+
+def _complete(body: dict, scripted: ScriptedChatModel) -> tuple[dict, dict, str]:
+    """
+    Mensagem gerada (formato da API), uso de tokens e finish_reason
+    """
+    messages = _to_messages(body.get("messages", []))
+    reply = scripted.decide(messages)
+    finish_reason = "tool_calls" if reply.tool_calls else "stop"
+    max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+    content = str(reply.content)
+    if max_tokens and not reply.tool_calls and estimate_tokens(content) > max_tokens:
+        content = content[: max_tokens * CHARS_PER_TOKEN]
+        finish_reason = "length"
+    reply = AIMessage(content=content, tool_calls=reply.tool_calls)
+
+    prompt_tokens = sum(estimate_tokens(str(m.content)) + 4 for m in messages)
+    completion_tokens = estimate_tokens(
+        content
+        + "".join(json.dumps(call["args"]) + call["name"] for call in reply.tool_calls)
+    )
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    return _convert_message_to_dict(reply), usage, finish_reason
+
+
+def create_app(
+    latencies: dict[str, ModelLatency] | None = None,
+    default_latency: ModelLatency = ModelLatency(),
+) -> FastAPI:
+    app = FastAPI(title="OpenAI simulada")
+    scripted = ScriptedChatModel()
+    latencies = latencies or {}
+    app.state.calls = {}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "unknown")
+        app.state.calls[model] = app.state.calls.get(model, 0) + 1
+        message, usage, finish_reason = _complete(body, scripted)
+        latency = latencies.get(model, default_latency)
+        await asyncio.sleep(latency.seconds(usage["completion_tokens"]))
+
+        response_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if not body.get("stream"):
+            return {
+                "id": response_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": message, "finish_reason": finish_reason}
+                ],
+                "usage": usage,
+            }
+
+        def chunk(
+            delta: dict | None,
+            finish: str | None = None,
+            chunk_usage: dict | None = None,
+        ) -> str:
+            data = {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+            }
+            if delta is not None:
+                data["choices"] = [{"index": 0, "delta": delta, "finish_reason": finish}]
+            if chunk_usage is not None:
+                data["usage"] = chunk_usage
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        async def events():
+            delta = {"role": "assistant", "content": message.get("content") or ""}
+            if message.get("tool_calls"):
+                delta["tool_calls"] = [
+                    {"index": index, **call}
+                    for index, call in enumerate(message["tool_calls"])
+                ]
+            yield chunk(delta)
+            yield chunk({}, finish_reason)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/calls")
+    async def calls():
+        return app.state.calls
+
+    return app
+
+
+def add_latency_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency",
+        action="append",
+        type=ModelLatency.parse,
+        default=[],
+        metavar="MODELO=BASE_MS[:MS_POR_TOKEN]",
+        help="latência de um modelo (repetível); os demais usam --default-latency",
+    )
+    parser.add_argument(
+        "--default-latency",
+        type=lambda spec: ModelLatency.parse(f"*={spec}")[1],
+        default=ModelLatency(),
+        metavar="BASE_MS[:MS_POR_TOKEN]",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(dict(args.latency), args.default_latency),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Servidor local que substitui os três agentes remotos (empresa, orçamentos e coleta
+de dados) nos testes de carga, com latência e taxa de erro configuráveis por agente.
+
+Uso isolado:
+    python -m benchmarks.fake_upstreams --port 9100 --budget 800:0.5:0.02
+"""
+
+import argparse
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+COMPANY_PATH = "/api/gateway"
+BUDGET_PATH = "/chat"
+CUSTOMER_PATH = "/coleta/chat"
+
+HOW_IT_WORKS_REPLY = (
+    "A higienização da Doutor Sofá usa produtos registrados na ANVISA e estabilizador de pH, "
+    "com método semi-seco (extração até ~5cm). Secagem entre 8 e 12h, serviço no local."
+)
+BUDGET_REPLY = "Segue o orçamento para o item informado:"
+BUDGET_SERVICES = [
+    {"servico_nome": "Higienização sofá 3 lugares", "valor": 260.0},
+    {"servico_nome": "Impermeabilização sofá 3 lugares", "valor": 390.0},
+]
+CUSTOMER_REPLY = "Perfeito! Para seguir, preciso do seu nome completo, e-mail, CPF, CEP, número e complemento."
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """
+    Latência log-normal (mediana em ms e dispersão sigma) e fração de respostas 503
+    """
+
+    median_ms: float = 300.0
+    sigma: float = 0.4
+    error_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        """
+        Formato 'mediana_ms[:sigma[:taxa_de_erro]]', ex.: '800:0.5:0.02'
+        """
+        parts = [float(p) for p in spec.split(":")]
+        return cls(*parts)
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        return self.median_ms * math.exp(rng.gauss(0.0, self.sigma)) / 1000
+
+    def should_fail(self, rng: random.Random) -> bool:
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+
+@dataclass
+class UpstreamProfiles:
+    company: LatencyProfile = field(default_factory=LatencyProfile)
+    budget: LatencyProfile = field(
+        default_factory=lambda: LatencyProfile(median_ms=600.0)
+    )
+    customer: LatencyProfile = field(default_factory=LatencyProfile)
+
+
+def create_app(profiles: UpstreamProfiles, seed: int | None = None) -> FastAPI:
+    app = FastAPI(title="Agentes remotos simulados")
+    rng = random.Random(seed)
+    app.state.calls = {COMPANY_PATH: 0, BUDGET_PATH: 0, CUSTOMER_PATH: 0}
+
+    async def simulate(path: str, profile: LatencyProfile) -> JSONResponse | None:
+        app.state.calls[path] += 1
+        await asyncio.sleep(profile.sample_seconds(rng))
+        if profile.should_fail(rng):
+            return JSONResponse({"detail": "upstream indisponível"}, status_code=503)
+        return None
+
+    @app.post(COMPANY_PATH)
+    async def company():
+        error = await simulate(COMPANY_PATH, profiles.company)
+        return error or {"response": HOW_IT_WORKS_REPLY}
+
+    @app.post(BUDGET_PATH)
+    async def budget():
+        error = await simulate(BUDGET_PATH, profiles.budget)
+        return error or {"response": BUDGET_REPLY, "services": BUDGET_SERVICES}
+
+    @app.post(CUSTOMER_PATH)
+    async def customer():
+        error = await simulate(CUSTOMER_PATH, profiles.customer)
+        return error or {
+            "response": CUSTOMER_REPLY,
+            "data": {"cliente": {}, "endereco": {}},
+        }
+
+    @app.get("/calls")
+    async def calls():
+        return app.state.calls
+
+    return app
+
+
+def upstream_urls(host: str, port: int) -> dict[str, str]:
+    """
+    Variáveis de ambiente que apontam a aplicação para este servidor
+    """
+    base = f"http://{host}:{port}"
+    return {
+        "COMPANY_AGENT__URL": base + COMPANY_PATH,
+        "BUDGET_AGENT__URL": base + BUDGET_PATH,
+        "CUSTOMER_REGISTRATION_AGENT__URL": base + CUSTOMER_PATH,
+    }
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = UpstreamProfiles()
+    for name in ("company", "budget", "customer"):
+        profile = getattr(defaults, name)
+        parser.add_argument(
+            f"--{name}",
+            type=LatencyProfile.parse,
+            default=profile,
+            help=(
+                f"latência do agente '{name}' como mediana_ms[:sigma[:taxa_de_erro]] "
+                f"(padrão {profile.median_ms:g}:{profile.sigma:g}:{profile.error_rate:g})"
+            ),
+        )
+
+
+def profiles_from_args(args: argparse.Namespace) -> UpstreamProfiles:
+    return UpstreamProfiles(
+        company=args.company, budget=args.budget, customer=args.customer
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=None)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(profiles_from_args(args), seed=args.seed),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: custo de construir+compilar o grafo supervisor a cada requisição
+versus reutilizar o grafo compilado do ProxyAgentCache.
+
+Uso:
+    python -m benchmarks.graph_compile_benchmark --iterations 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from app.application.agent.proxy_agent_builder import ProxyAgentBuilder
+from app.application.agent.proxy_agent_cache import ProxyAgentCache
+from benchmarks.fake_chat_model import FakeChatModel
+
+
+def _summary(label: str, samples_ms: list[float]) -> str:
+    ordered = sorted(samples_ms)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return (
+        f"{label:<40} mean={statistics.mean(ordered):8.3f}ms "
+        f"p50={statistics.median(ordered):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+async def _invoke(graph, thread_id: str) -> None:
+    await graph.ainvoke(
+        {"messages": [HumanMessage(content="Boa tarde")]},
+        config={"configurable": {"thread_id": thread_id}},
+    )
+
+
+async def run(iterations: int) -> None:
+    checkpointer = InMemorySaver()
+    store = InMemoryStore()
+    model = FakeChatModel()
+
+    compile_ms: list[float] = []
+    compile_invoke_ms: list[float] = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        graph = ProxyAgentBuilder(model=model).compile(
+            checkpointer=checkpointer, store=store
+        )
+        compile_ms.append((time.perf_counter() - start) * 1000)
+        await _invoke(graph, f"compile-{i}")
+        compile_invoke_ms.append((time.perf_counter() - start) * 1000)
+
+    cache = ProxyAgentCache(checkpointer=checkpointer, store=store)
+    builder = ProxyAgentBuilder(model=model)
+    cache.put(builder)
+
+    lookup_ms: list[float] = []
+    cached_invoke_ms: list[float] = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        graph = cache.get(
+            model_name=builder.model_name,
+            temperature=builder.temperature,
+            prompts=builder.prompts,
+        )
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+        await _invoke(graph, f"cached-{i}")
+        cached_invoke_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"iterações: {iterations}")
+    print(_summary("build+compile", compile_ms))
+    print(_summary("build+compile+ainvoke", compile_invoke_ms))
+    print(_summary("cache lookup", lookup_ms))
+    print(_summary("cache lookup+ainvoke", cached_invoke_ms))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Teste de carga offline: sobe os agentes remotos simulados, a aplicação com o modelo
+roteirizado e persistência em memória, e reproduz em paralelo as conversas de
+exemplo, reportando vazão e latência (p50/p95/p99) por turno.
+
+Nada sai da máquina: sem OpenAI, sem Postgres e sem os agentes no Azure. Com --target
+a carga vai para uma instância já em execução (ex.: apontada para um Postgres local).
+
+Uso:
+    python -m benchmarks.load_test --conversations 200 --concurrency 50 --llm-latency-ms 400
+    python -m benchmarks.load_test --endpoint stream --budget 800:0.5:0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from benchmarks.fake_upstreams import (
+    add_profile_arguments,
+    create_app,
+    profiles_from_args,
+    upstream_urls,
+)
+
+HOST = "127.0.0.1"
+ENDPOINTS = {"chat": "/proxy/chat", "stream": "/proxy/chat/stream"}
+
+
+@dataclass
+class LoadTestResult:
+    latencies_ms: list[float] = field(default_factory=list)
+    first_event_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    rejected: int = 0
+    error_replies: int = 0
+    conversations: int = 0
+    duration_seconds: float = 0.0
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _latency_line(label: str, samples_ms: list[float]) -> str:
+    if not samples_ms:
+        return f"{label:<22} sem amostras"
+    ordered = sorted(samples_ms)
+    return (
+        f"{label:<22} p50={_percentile(ordered, 50):8.1f}ms p95={_percentile(ordered, 95):8.1f}ms "
+        f"p99={_percentile(ordered, 99):8.1f}ms mean={statistics.mean(ordered):8.1f}ms "
+        f"max={ordered[-1]:8.1f}ms"
+    )
+
+
+def load_conversations(path: Path, coalesce: bool) -> list[list[str]]:
+    """
+    Mensagens do cliente de cada exemplo, na ordem em que foram enviadas
+    """
+    from langchain_core.messages import HumanMessage
+
+    from benchmarks.evaluate_fast_path import _merge_client_bursts, parse_examples
+
+    conversations = []
+    for messages in parse_examples(path).values():
+        if coalesce:
+            messages = _merge_client_bursts(messages)
+        turns = [str(m.content) for m in messages if isinstance(m, HumanMessage)]
+        if turns:
+            conversations.append(turns)
+    return conversations
+
+
+async def _send_turn(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    phone: str,
+    text: str,
+    result: LoadTestResult,
+) -> None:
+    payload = {"message": text, "phone": phone}
+    start = time.perf_counter()
+    try:
+        if endpoint == "stream":
+            first_event = None
+            async with client.stream(
+                "POST", ENDPOINTS[endpoint], json=payload
+            ) as response:
+                if response.status_code == 429:
+                    result.rejected += 1
+                    return
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if first_event is None and line.startswith("event:"):
+                        first_event = time.perf_counter()
+                    if line.startswith("event: error"):
+                        result.error_replies += 1
+            if first_event is not None:
+                result.first_event_ms.append((first_event - start) * 1000)
+        else:
+            response = await client.post(ENDPOINTS[endpoint], json=payload)
+            if response.status_code == 429:
+                result.rejected += 1
+                return
+            response.raise_for_status()
+            if response.json().get("message") == "Desculpe, ocorreu um erro interno.":
+                result.error_replies += 1
+    except (httpx.HTTPError, json.JSONDecodeError):
+        result.errors += 1
+        return
+    result.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def run_load(
+    base_url: str,
+    conversations: list[list[str]],
+    total: int,
+    concurrency: int,
+    endpoint: str,
+    timeout: float,
+) -> LoadTestResult:
+    """
+    Executa `total` conversas (ciclando pelos exemplos) com até `concurrency` simultâneas;
+    os turnos de uma conversa são sequenciais, cada conversa com seu próprio telefone
+    """
+    result = LoadTestResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    run_id = int(time.time())
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits
+    ) as client:
+
+        async def conversation(index: int) -> None:
+            async with semaphore:
+                phone = f"load-{run_id}-{index}"
+                for text in conversations[index % len(conversations)]:
+                    await _send_turn(client, endpoint, phone, text, result)
+                result.conversations += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(i) for i in range(total)))
+        result.duration_seconds = time.perf_counter() - start
+    return result
+
+
+def print_report(result: LoadTestResult, concurrency: int, endpoint: str) -> None:
+    turns = len(result.latencies_ms) + result.errors + result.rejected
+    print(f"Endpoint: {ENDPOINTS[endpoint]}  concorrência: {concurrency}")
+    print(
+        f"Conversas: {result.conversations}  turnos: {turns}  duração: {result.duration_seconds:.1f}s"
+    )
+    if result.duration_seconds > 0:
+        print(
+            f"Vazão: {len(result.latencies_ms) / result.duration_seconds:.1f} turnos/s"
+        )
+    print(
+        f"Erros HTTP/rede: {result.errors}  recusadas (429): {result.rejected}  "
+        f"respostas de erro: {result.error_replies}"
+    )
+    print(_latency_line("Latência por turno", result.latencies_ms))
+    if result.first_event_ms:
+        print(_latency_line("Primeiro evento SSE", result.first_event_ms))
+
+
+async def _serve(app, port: int) -> tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=HOST, port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run(args: argparse.Namespace) -> None:
+    conversations = load_conversations(Path(args.file), args.coalesce)
+    servers: list[tuple[uvicorn.Server, asyncio.Task]] = []
+    try:
+        base_url = args.target
+        if base_url is None:
+            servers.append(
+                await _serve(
+                    create_app(profiles_from_args(args), seed=args.seed),
+                    args.upstream_port,
+                )
+            )
+            from benchmarks.scripted_chat_model import ScriptedChatModel
+            from main import app
+
+            # O logging por mensagem da aplicação domina o custo de CPU sob carga
+            logging.getLogger().setLevel(args.log_level)
+            app.state.chat_model = ScriptedChatModel(latency_ms=args.llm_latency_ms)
+            servers.append(await _serve(app, args.port))
+            base_url = f"http://{HOST}:{args.port}"
+
+        result = await run_load(
+            base_url,
+            conversations,
+            args.conversations,
+            args.concurrency,
+            args.endpoint,
+            args.timeout,
+        )
+        print_report(result, args.concurrency, args.endpoint)
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--file", default="exemplos_atedimento.md")
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument(
+        "--coalesce", action="store_true", help="une mensagens consecutivas do cliente"
+    )
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=300.0,
+        help="latência por chamada ao modelo",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream-port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--log-level", default="WARNING", help="nível de log da aplicação embutida"
+    )
+    parser.add_argument(
+        "--target", default=None, help="URL de uma instância já em execução"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.target is None:
+        # As configurações são lidas uma única vez (get_settings), já na importação dos
+        # módulos da aplicação: o ambiente precisa estar pronto antes de qualquer import de app.*
+        os.environ.update(upstream_urls(HOST, args.upstream_port))
+        os.environ.setdefault("PERSISTENCE_BACKEND", "memory")
+        os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+        # As conversas são reproduzidas sem pausas entre os turnos: sem limite por telefone
+        os.environ.setdefault("PHONE_RATE_LIMIT_PER_MINUTE", "0")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Relatório comparativo de configurações de modelo por papel (MODEL_ROLES): para cada
+configuração, sobe os agentes remotos simulados, a OpenAI simulada
+(benchmarks.fake_openai, ou --openai-url) e a aplicação, reproduz as conversas de
+exemplo e reporta a latência por turno e, por papel e modelo, chamadas, latência
+média e tokens (prompt/completion).
+
+As configurações vêm de um JSON {nome: {VARIÁVEL: valor}} com as variáveis de
+ambiente de cada uma, ex.:
+    {
+      "padrão": {},
+      "supervisor nano": {
+        "MODEL_ROLES__SUPERVISOR__MODEL": "gpt-4.1-nano",
+        "MODEL_ROLES__SUPERVISOR__MAX_TOKENS": "256"
+      }
+    }
+Cada configuração roda em um processo próprio (as configurações são lidas uma vez
+por processo). Com --openai-url as chamadas vão para um endpoint real compatível
+com a OpenAI (latência e tokens reais; requer OPENAI_API_KEY).
+
+Uso:
+    python -m benchmarks.model_tiering_report --conversations 40 --concurrency 10
+    python -m benchmarks.model_tiering_report --configs configs.json --output relatorio.md \\
+        --latency gpt-4o-mini=400:8 --latency gpt-4.1-nano=150:3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.fake_openai import ModelLatency, add_latency_arguments
+from benchmarks.fake_upstreams import (
+    add_profile_arguments,
+    create_app,
+    profiles_from_args,
+    upstream_urls,
+)
+from benchmarks.load_test import HOST, _percentile, _serve, load_conversations, run_load
+
+# Papéis que só delegam ou repassam o texto da ferramenta em um modelo menor, com
+# limite de tokens; respostas livres (empresa) seguem no modelo padrão
+DEFAULT_CONFIGS: dict[str, dict[str, str]] = {
+    "padrão": {},
+    "escalonado": {
+        "MODEL_ROLES__SUPERVISOR__MODEL": "gpt-4.1-nano",
+        "MODEL_ROLES__SUPERVISOR__MAX_TOKENS": "256",
+        "MODEL_ROLES__BUDGET_SPECIALIST__MODEL": "gpt-4.1-nano",
+        "MODEL_ROLES__BUDGET_SPECIALIST__MAX_TOKENS": "256",
+        "MODEL_ROLES__SERVICE_AND_BUDGET_SPECIALIST__MODEL": "gpt-4.1-nano",
+        "MODEL_ROLES__SERVICE_AND_BUDGET_SPECIALIST__MAX_TOKENS": "256",
+        "MODEL_ROLES__COLECT_CUSTOMER_DATA_SPECIALIST__MODEL": "gpt-4.1-nano",
+        "MODEL_ROLES__COLECT_CUSTOMER_DATA_SPECIALIST__MAX_TOKENS": "256",
+        "MODEL_ROLES__HISTORY_SUMMARY__MODEL": "gpt-4.1-nano",
+    },
+}
+DEFAULT_LATENCIES = ["gpt-4o-mini=400:8", "gpt-4.1-nano=150:3"]
+
+
+def collect_llm_usage(metrics_text: str) -> list[dict]:
+    """
+    Chamadas, latência média e tokens por (papel, modelo) a partir de /metrics
+    """
+    usage: dict[tuple[str, str], dict] = defaultdict(
+        lambda: {
+            "calls": 0,
+            "errors": 0,
+            "seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+    )
+    for family in text_string_to_metric_families(metrics_text):
+        for sample in family.samples:
+            labels = sample.labels
+            key = (labels.get("agent", ""), labels.get("model", ""))
+            if sample.name == "proxy_llm_call_seconds_count":
+                usage[key]["calls"] += int(sample.value)
+                if labels.get("outcome") == "error":
+                    usage[key]["errors"] += int(sample.value)
+            elif sample.name == "proxy_llm_call_seconds_sum":
+                usage[key]["seconds"] += sample.value
+            elif sample.name == "proxy_llm_tokens_sum":
+                usage[key][f"{labels['kind']}_tokens"] += int(sample.value)
+    return [
+        {"agent": agent, "model": model, **values}
+        for (agent, model), values in sorted(usage.items())
+        if values["calls"]
+    ]
+
+
+async def run_single(args: argparse.Namespace) -> dict:
+    """
+    Executa as conversas com a configuração do ambiente atual (processo filho)
+    """
+    from benchmarks.fake_openai import create_app as create_openai_app
+
+    conversations = load_conversations(Path(args.file), coalesce=False)
+    servers = [
+        await _serve(
+            create_app(profiles_from_args(args), seed=args.seed), args.upstream_port
+        )
+    ]
+    try:
+        if args.openai_url is None:
+            servers.append(
+                await _serve(
+                    create_openai_app(dict(args.latency), args.default_latency),
+                    args.openai_port,
+                )
+            )
+        from main import app
+
+        servers.append(await _serve(app, args.port))
+        base_url = f"http://{HOST}:{args.port}"
+        result = await run_load(
+            base_url,
+            conversations,
+            args.conversations,
+            args.concurrency,
+            "chat",
+            args.timeout,
+        )
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            metrics_text = (await client.get("/metrics")).text
+    finally:
+        for server, task in reversed(servers):
+            server.should_exit = True
+            await task
+
+    ordered = sorted(result.latencies_ms)
+    return {
+        "turns": len(ordered),
+        "errors": result.errors + result.rejected,
+        "error_replies": result.error_replies,
+        "duration_seconds": result.duration_seconds,
+        "p50_ms": _percentile(ordered, 50) if ordered else 0.0,
+        "p95_ms": _percentile(ordered, 95) if ordered else 0.0,
+        "mean_ms": statistics.mean(ordered) if ordered else 0.0,
+        "roles": collect_llm_usage(metrics_text),
+    }
+
+
+def _child_env(args: argparse.Namespace, overrides: dict[str, str]) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(upstream_urls(HOST, args.upstream_port))
+    env.update(
+        {
+            "PERSISTENCE_BACKEND": "memory",
+            "PHONE_RATE_LIMIT_PER_MINUTE": "0",
+            "LOG_LEVEL": "WARNING",
+            "OPENAI_BASE_URL": args.openai_url or f"http://{HOST}:{args.openai_port}/v1",
+        }
+    )
+    env.setdefault("OPENAI_API_KEY", "sk-model-tiering")
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def run_configuration(
+    args: argparse.Namespace, name: str, overrides: dict[str, str]
+) -> dict:
+    print(f"Executando configuração '{name}'...", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory) / "result.json"
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.model_tiering_report",
+            *sys.argv[1:],
+        ]
+        completed = subprocess.run(
+            [*command, "--single", str(output)],
+            env=_child_env(args, overrides),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if completed.returncode != 0 or not output.exists():
+            raise RuntimeError(
+                f"Configuração '{name}' falhou:\n{completed.stderr[-2000:]}"
+            )
+        return json.loads(output.read_text(encoding="utf-8"))
+
+
+def render_report(results: dict[str, dict], configs: dict[str, dict[str, str]]) -> str:
+    lines = [
+        "# Comparativo de modelos por papel",
+        "",
+        "| Configuração | Turnos | Erros | p50 (ms) | p95 (ms) | Média (ms) | Chamadas LLM "
+        "| Tokens prompt | Tokens completion | Tokens/turno |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for name, result in results.items():
+        roles = result["roles"]
+        prompt = sum(role["prompt_tokens"] for role in roles)
+        completion = sum(role["completion_tokens"] for role in roles)
+        turns = result["turns"] or 1
+        lines.append(
+            f"| {name} | {result['turns']} | {result['errors'] + result['error_replies']} "
+            f"| {result['p50_ms']:.0f} | {result['p95_ms']:.0f} | {result['mean_ms']:.0f} "
+            f"| {sum(role['calls'] for role in roles)} | {prompt} | {completion} "
+            f"| {(prompt + completion) / turns:.0f} |"
+        )
+
+    for name, result in results.items():
+        lines += ["", f"## {name}", ""]
+        overrides = configs[name]
+        if overrides:
+            lines += [
+                f"- `{key}={value}`" for key, value in sorted(overrides.items())
+            ] + [""]
+        lines += [
+            "| Papel | Modelo | Chamadas | Erros | Latência média (ms) | Tokens prompt "
+            "| Tokens completion |",
+            "|---|---|---:|---:|---:|---:|---:|",
+        ]
+        for role in result["roles"]:
+            lines.append(
+                f"| {role['agent']} | {role['model']} | {role['calls']} | {role['errors']} "
+                f"| {role['seconds'] / role['calls'] * 1000:.0f} | {role['prompt_tokens']} "
+                f"| {role['completion_tokens']} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--configs", default=None, help="JSON {nome: {VARIÁVEL: valor}}")
+    parser.add_argument("--output", default=None, help="arquivo Markdown do relatório")
+    parser.add_argument("--file", default="exemplos_atedimento.md")
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--upstream-port", type=int, default=9101)
+    parser.add_argument("--openai-port", type=int, default=9201)
+    parser.add_argument(
+        "--openai-url", default=None, help="endpoint compatível com a OpenAI"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    # Uso interno: executa uma configuração e grava o resultado (JSON) no arquivo
+    parser.add_argument("--single", default=None, help=argparse.SUPPRESS)
+    add_profile_arguments(parser)
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+    if not args.latency:
+        args.latency = [ModelLatency.parse(spec) for spec in DEFAULT_LATENCIES]
+
+    if args.single:
+        result = asyncio.run(run_single(args))
+        Path(args.single).write_text(
+            json.dumps(result, ensure_ascii=False), encoding="utf-8"
+        )
+        return
+
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        configs = json.loads(Path(args.configs).read_text(encoding="utf-8"))
+    results = {
+        name: run_configuration(args, name, overrides)
+        for name, overrides in configs.items()
+    }
+    report = render_report(results, configs)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.application.agent.history import SUMMARY_PROMPT
+from app.application.agent.proxy_agent_builder import DEFAULT_PROMPTS
+from app.application.tool.budget_query_normalizer import fold_text
+
+# Ferramenta chamada por cada especialista
+SPECIALIST_TOOLS = {
+    "company_specialist": "get_company_info",
+    "budget_specialist": "get_budget_info",
+    "colect_customer_data_specialist": "handle_customer_data",
+    "service_and_budget_specialist": "get_service_and_budget_info",
+}
+
+GREETING_REPLY = "Oi, eu sou a Yasmin, da Doutor Sofá. Em que posso ajudar?"
+
+_DATA_WORDS = ("cpf", "email", "e mail", "cep", "meu nome", "confirmo", "agendar")
+_COMPANY_WORDS = ("como funciona", "produto", "garantia", "seca", "secagem", "mancha")
+_PRICE_WORDS = ("valor", "preco", "quanto", "orcamento", "cotacao", "custa")
+_ITEM_WORDS = (
+    "sofa",
+    "cadeira",
+    "poltrona",
+    "colchao",
+    "tapete",
+    "puff",
+    "cabeceira",
+    "lugares",
+)
+
+
+def route(text: str) -> str | None:
+    """
+    Especialista escolhido pelo supervisor roteirizado (None = responde direto)
+    """
+    folded = fold_text(text)
+    if "@" in text or any(word in folded for word in _DATA_WORDS):
+        return "colect_customer_data_specialist"
+    if any(word in folded for word in _COMPANY_WORDS):
+        return "company_specialist"
+    if any(word in folded for word in _ITEM_WORDS):
+        return "service_and_budget_specialist"
+    if any(word in folded for word in _PRICE_WORDS):
+        return "budget_specialist"
+    return None
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Modelo de chat local que reproduz as decisões do supervisor e dos especialistas
+    com regras fixas (delegação, chamada da ferramenta e repasse do texto), com
+    latência simulada por chamada. Substitui o LLM nos testes de carga.
+    """
+
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _role(self, messages: list[BaseMessage]) -> str | None:
+        system = next((m for m in messages if isinstance(m, SystemMessage)), None)
+        if system is None:
+            return None
+        if system.content == SUMMARY_PROMPT:
+            return "summary"
+        for role, prompt in DEFAULT_PROMPTS.items():
+            if system.content == prompt:
+                return role
+        return None
+
+    def decide(self, messages: list[BaseMessage]) -> AIMessage:
+        """
+        Resposta do papel identificado pelo prompt de sistema, sem a latência simulada
+        """
+        role = self._role(messages)
+        last = messages[-1]
+        if role == "summary":
+            return AIMessage(content="Cliente pediu orçamento de higienização.")
+        if role in SPECIALIST_TOOLS:
+            # A última mensagem pode ser a da transferência, que não é o resultado da ferramenta
+            if isinstance(last, ToolMessage) and last.name == SPECIALIST_TOOLS[role]:
+                return AIMessage(content=str(last.content))
+            query = next(
+                (
+                    str(m.content)
+                    for m in reversed(messages)
+                    if isinstance(m, HumanMessage)
+                ),
+                "",
+            )
+            return self._tool_call(SPECIALIST_TOOLS[role], {"query": query})
+
+        # Supervisor: ao voltar de um especialista, repassa a última resposta dele
+        if isinstance(last, ToolMessage) and last.name.startswith("transfer_back"):
+            reply = next(
+                (
+                    str(m.content)
+                    for m in reversed(messages)
+                    if isinstance(m, AIMessage) and m.content and not m.tool_calls
+                ),
+                GREETING_REPLY,
+            )
+            return AIMessage(content=reply)
+        target = route(str(last.content)) if isinstance(last, HumanMessage) else None
+        if target is None:
+            return AIMessage(content=GREETING_REPLY)
+        return self._tool_call(f"transfer_to_{target}", {})
+
+    @staticmethod
+    def _tool_call(name: str, args: dict) -> AIMessage:
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex}"}],
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self.decide(messages))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self.decide(messages))])
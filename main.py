@@ -1,51 +1,308 @@
+import asyncio
 import logging
-from dotenv import load_dotenv
-from fastapi import FastAPI
-from pydantic import BaseModel
-from app.application.agent.proxy_agent_builder import ProxyAgentBuilder
-from langchain_core.messages import HumanMessage
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, Response
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+
+from app.application.agent.fast_path_router import fast_path_stats
+from app.application.agent.passthrough import TOOL_ERROR_REPLY
+from app.application.agent.proxy_agent_cache import ProxyAgentCache
+from app.application.memory.embeddings import build_memory_index
+from app.application.memory.memory_retriever import MemoryRetriever
+from app.application.service.admission_control import AdmissionController
+from app.application.service.chat_batch import ChatBatchRunner
+from app.application.service.chat_job_worker import ChatJobWorker
+from app.application.service.chat_service import DEADLINE_REPLY, ChatService
+from app.application.service.idempotency_store import IdempotencyStore
+from app.application.service.message_coalescer import MessageCoalescer
+from app.application.tool.http_client_registry import http_client_registry
+from app.application.tool.response_cache import attach_cache_persistence, get_cache_stats
+from app.config.settings import get_settings
+from app.infrastructure.database.chat_job_repository import (
+    InMemoryChatJobRepository,
+    PostgresChatJobRepository,
+)
+from app.infrastructure.database.checkpoint_compactor import CheckpointCompactor
+from app.infrastructure.database.idempotency_repository import (
+    PostgresIdempotencyRepository,
+)
+from app.infrastructure.database.postgres_pool import (
+    close_postgres_resources,
+    get_pool_metrics,
+    open_postgres_resources,
+)
+from app.infrastructure.database.response_cache_repository import (
+    PostgresResponseCacheRepository,
+)
+from app.infrastructure.observability.metrics import (
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    stats_collector,
+)
+from app.infrastructure.observability.structured_logging import (
+    configure_logging,
+    log_context,
+)
+from app.infrastructure.observability.tracing import (
+    configure_tracing,
+    server_span,
+    shutdown_tracing,
+)
 from app.presentation.proxy_router import router as proxy_router
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",    
-)
+# Logs estruturados escritos por uma thread em segundo plano (não bloqueiam o event loop)
+configure_logging(get_settings())
+configure_tracing(get_settings())
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Abre os recursos compartilhados na inicialização e os fecha no desligamento
+    """
+    settings = get_settings()
+    http_client_registry.open()
+    memory_index = build_memory_index(settings)
+    app.state.postgres = None
+    if settings.persistence_backend == "memory":
+        # Sem Postgres: estado perdido ao reiniciar (desenvolvimento local e benchmarks)
+        app.state.store = InMemoryStore(index=memory_index)
+        app.state.checkpointer = InMemorySaver()
+        logger.warning("Persistência em memória: conversas não sobrevivem a reinícios")
+    else:
+        app.state.postgres = await open_postgres_resources(settings, index=memory_index)
+        app.state.store = app.state.postgres.store
+        app.state.checkpointer = app.state.postgres.checkpointer
+        stats_collector.register("db_pool", app.state.postgres.pool.get_stats)
+    stats_collector.register("tool_cache", get_cache_stats)
+    stats_collector.register("fast_path", fast_path_stats.snapshot)
+    cache_repository = None
+    idempotency_repository = None
+    if app.state.postgres is not None:
+        cache_repository = PostgresResponseCacheRepository(app.state.postgres.pool)
+        await cache_repository.setup()
+        await cache_repository.purge_expired()
+        # Reservas dos turnos por message_id, compartilhadas entre as réplicas
+        idempotency_repository = PostgresIdempotencyRepository(app.state.postgres.pool)
+        await idempotency_repository.setup()
+        await idempotency_repository.purge_expired()
+    if settings.tool_cache_persistent and cache_repository is not None:
+        attach_cache_persistence(cache_repository)
+    app.state.idempotency_store = IdempotencyStore(
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        max_entries=settings.idempotency_max_entries,
+        persistence=idempotency_repository,
+        lease_seconds=settings.idempotency_lease_seconds,
+        poll_interval_seconds=settings.idempotency_poll_interval_seconds,
+        # Respostas padrão de prazo expirado e de erro: a reentrega executa o turno de novo
+        transient_replies={DEADLINE_REPLY, TOOL_ERROR_REPLY},
+    )
+    app.state.proxy_agent_cache = ProxyAgentCache(
+        checkpointer=app.state.checkpointer,
+        store=app.state.store,
+        # Modelo injetado antes da inicialização (ex.: modelo roteirizado dos benchmarks)
+        model=getattr(app.state, "chat_model", None),
+    )
+    if settings.agent_warmup:
+        app.state.proxy_agent_cache.warmup()
+    app.state.chat_service = ChatService(
+        proxy_agent_cache=app.state.proxy_agent_cache,
+        store=app.state.store,
+        memory_retriever=MemoryRetriever(
+            app.state.store,
+            top_k=settings.memory_top_k,
+            indexed=memory_index is not None,
+            scan_limit=settings.memory_lexical_scan_limit,
+        ),
+        deadline_seconds=settings.chat_deadline_seconds,
+        speculative_prefetch=settings.speculative_prefetch_enabled,
+    )
+    app.state.admission_controller = AdmissionController.from_settings(settings)
+    app.state.message_coalescer = MessageCoalescer(
+        # Admissão por turno agrupado (não por mensagem)
+        handler=app.state.admission_controller.wrap(app.state.chat_service.run),
+        window_seconds=settings.chat_coalesce_window_ms / 1000,
+        max_wait_seconds=settings.chat_coalesce_max_wait_ms / 1000,
+        max_messages=settings.chat_coalesce_max_messages,
+    )
+    app.state.chat_batch_runner = ChatBatchRunner(
+        # Turnos do lote disputam as vagas globais com o tráfego interativo; o limite
+        # por telefone não se aplica a reprocessamentos
+        handler=app.state.admission_controller.wrap(
+            app.state.chat_service.run, rate_limited=False
+        ),
+        max_concurrent=settings.chat_batch_max_concurrent,
+        max_per_upstream=settings.chat_batch_max_per_upstream,
+        idempotency_store=app.state.idempotency_store,
+    )
+    if app.state.postgres is not None:
+        job_repository = PostgresChatJobRepository(app.state.postgres.pool)
+        if settings.db_run_setup:
+            await job_repository.setup()
+    else:
+        job_repository = InMemoryChatJobRepository()
+    app.state.chat_job_worker = ChatJobWorker(
+        repository=job_repository,
+        handler=app.state.chat_service.run,
+        concurrency=settings.chat_job_workers,
+        poll_interval=settings.chat_job_poll_interval_seconds,
+        lease_seconds=settings.chat_job_lease_seconds,
+        max_attempts=settings.chat_job_max_attempts,
+        retry_backoff=settings.chat_job_retry_backoff_seconds,
+        default_callback_url=settings.chat_job_callback_url,
+        callback_timeout=settings.chat_job_callback_timeout,
+        callback_retries=settings.chat_job_callback_retries,
+        callback_hosts=settings.chat_job_callback_hosts,
+    )
+    app.state.chat_job_worker.start()
+    compaction_task = None
+    if (
+        settings.checkpoint_compaction_interval_minutes > 0
+        and app.state.postgres is not None
+    ):
+        compactor = CheckpointCompactor.from_settings(app.state.postgres.pool, settings)
+        compaction_task = asyncio.create_task(
+            compactor.run_periodically(
+                settings.checkpoint_compaction_interval_minutes * 60
+            )
+        )
+    try:
+        yield
+    finally:
+        await app.state.chat_job_worker.stop()
+        if compaction_task is not None:
+            compaction_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await compaction_task
+        if app.state.postgres is not None:
+            await close_postgres_resources(app.state.postgres)
+        await http_client_registry.aclose()
+        shutdown_tracing()
+
+
 app = FastAPI(
-    title="Proxy Agent", 
+    title="Proxy Agent",
     description="Proxy Agent Supervisor for company information orchestration",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 
 app.include_router(proxy_router, prefix="/proxy", tags=["proxy"])
 
 
+def _route_path(request: Request) -> str:
+    # Rota declarada (ex.: /proxy/chat) em vez do caminho bruto, para limitar as séries
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def measure_requests(request: Request, call_next):
+    """
+    Requisições em andamento e duração por rota (respostas em streaming: até o envio dos headers)
+    """
+    endpoint = _route_path(request)
+    start_time = time.perf_counter()
+    status = 500
+    HTTP_REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method, str(status)).observe(
+            time.perf_counter() - start_time
+        )
+
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Id da requisição (X-Request-ID recebido ou gerado) nos logs e no header da resposta
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    endpoint = _route_path(request)
+    with (
+        log_context(request_id=request_id),
+        server_span(
+            f"{request.method} {endpoint}",
+            dict(request.headers),
+            {
+                "http.request.method": request.method,
+                "http.route": endpoint,
+                "request_id": request_id,
+            },
+        ) as span,
+    ):
+        response = await call_next(request)
+        if span is not None:
+            span.set_attribute("http.response.status_code", response.status_code)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato Prometheus
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/", summary="Root endpoint", description="Root endpoint for the API")
 async def root():
     return {
         "message": "Proxy Agent Supervisor is running",
         "endpoints": {
             "POST /proxy/chat": "Chat com o agente supervisor",
+            "POST /proxy/chat/stream": "Chat com o agente supervisor via Server-Sent Events",
+            "POST /proxy/chat/async": "Chat assíncrono: enfileira o turno e entrega o resultado por callback",
+            "GET /proxy/jobs/{job_id}": "Situação e resposta de um turno assíncrono",
+            "POST /proxy/chat/batch": "Lote de turnos (reprocessamentos) com concorrência limitada, respondido em NDJSON",
+            "GET /metrics": "Métricas no formato Prometheus",
         },
         "status": "success",
         "version": "1.1.0",
-        "docs": "http://localhost:8000/docs",        
+        "docs": "http://localhost:8000/docs",
     }
 
+
 @app.get("/health")
 async def health_check():
     """
     Endpoint de health check
     """
-    return {"status": "healthy", "service": "proxy-agent-supervisor", "version": "1.1.0"}
+    return {
+        "status": "healthy",
+        "service": "proxy-agent-supervisor",
+        "version": "1.1.0",
+        "database": (
+            get_pool_metrics(app.state.postgres.pool)
+            if app.state.postgres is not None
+            else None
+        ),
+    }
+
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Sem a configuração de logging do uvicorn: os logs seguem pelo handler em fila
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.application.service.admission_control import (
+    OVERLOADED,
+    RATE_LIMITED,
+    AdmissionController,
+    AdmissionRejected,
+    PhoneRateLimiter,
+)
+
+
+def test_rate_limiter_allows_burst_then_refills(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        "app.application.service.admission_control.time.monotonic", lambda: now[0]
+    )
+    limiter = PhoneRateLimiter(rate_per_minute=60, burst=2)
+    limiter.check("5511")
+    limiter.check("5511")
+    with pytest.raises(AdmissionRejected) as error:
+        limiter.check("5511")
+    assert error.value.reason == RATE_LIMITED
+    assert error.value.retry_after_header == "1"
+    # Outros telefones têm o próprio limite
+    limiter.check("5522")
+
+    now[0] += 1
+    limiter.check("5511")
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1)
+        ticket = await controller.acquire("5511")
+        queued = asyncio.create_task(controller.acquire("5522"))
+        await asyncio.sleep(0)
+        assert controller.waiting == 1
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("5533")
+        assert error.value.reason == OVERLOADED
+
+        ticket.release()
+        ticket.release()
+        (await queued).release()
+
+    asyncio.run(scenario())
+
+
+def test_queue_wait_is_bounded_by_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=5)
+        ticket = await controller.acquire("5511")
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("5522", timeout=0.01)
+        assert controller.waiting == 0
+        ticket.release()
+
+    asyncio.run(scenario())
+
+
+def test_wrapped_handler_is_admitted_once_per_call():
+    calls = []
+
+    async def handler(message: str, phone: str) -> str:
+        calls.append(message)
+        return "ok"
+
+    async def scenario():
+        controller = AdmissionController(
+            rate_limiter=PhoneRateLimiter(rate_per_minute=1, burst=1)
+        )
+        wrapped = controller.wrap(handler)
+        assert await wrapped("a\nb", "5511") == "ok"
+        with pytest.raises(AdmissionRejected):
+            await wrapped("c", "5511")
+
+    asyncio.run(scenario())
+    assert calls == ["a\nb"]
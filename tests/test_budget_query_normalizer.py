@@ -0,0 +1,67 @@
+import pytest
+
+from app.application.tool.budget_query_normalizer import normalize_budget_query
+
+
+def key(query: str) -> str:
+    return normalize_budget_query(query).cache_key
+
+
+def test_same_request_with_different_wording_shares_key():
+    assert key("Quanto custa a higienização de um sofá de 3 lugares?") == key(
+        "qual o valor pra limpar 1 sofa 3 lugares"
+    )
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Um sofá retrátil", "quanto custa um sofá"),
+        ("cabeceira queen", "cabeceira solteiro"),
+        ("sofá de couro 3 lugares", "sofá 3 lugares"),
+        ("sofá de canto com chaise", "sofá de canto"),
+        ("colchão casal", "colchão king"),
+        ("higienização de tapete", "impermeabilização de tapete"),
+        ("2 cadeiras", "6 cadeiras"),
+    ],
+)
+def test_different_requests_do_not_share_key(first, second):
+    assert key(first) != key(second)
+
+
+def test_item_key_keeps_variant_quantity_and_qualifiers():
+    assert key("Um sofá retrátil") == "item:higienizacao|sofa||1|retratil"
+    assert key("2 colchões queen") == "item:higienizacao|colchao|queen|2|"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "não quero 3 lugares, quero sofá de 2 lugares",
+        "sofá e cadeira",
+        "sofá de 2 lugares ou 3 lugares",
+        "cabeceira queen ou king",
+        "2 ou 3 cadeiras",
+    ],
+)
+def test_ambiguous_requests_fall_back_to_text_key(query):
+    normalized = normalize_budget_query(query)
+    assert normalized.item is None
+    assert normalized.mentions_item
+    assert normalized.cache_key.startswith("text:")
+
+
+@pytest.mark.parametrize(
+    "query", ["quanto custa?", "qual o valor?", "preço", "boa tarde"]
+)
+def test_request_without_content_is_not_cached(query):
+    normalized = normalize_budget_query(query)
+    assert not normalized.mentions_item
+    assert normalized.cache_key is None
+
+
+def test_plural_item_without_quantity_is_not_one_item():
+    assert key("cadeiras") != key("uma cadeira")
+    assert key("cadeira") == key("uma cadeira")
+    assert key("2 cadeiras") == key("duas cadeiras")
+    assert key("cadeiras") == "item:higienizacao|cadeira|||"
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.application.service.admission_control import (
+    AdmissionController,
+    PhoneRateLimiter,
+)
+from app.application.service.chat_batch import BatchItem, ChatBatchRunner
+
+
+async def collect(runner: ChatBatchRunner, items: list[BatchItem]) -> list:
+    return [result async for result in runner.run(items)]
+
+
+def test_messages_of_same_phone_run_in_order():
+    order = []
+
+    async def handler(message: str, phone: str) -> str:
+        order.append(message)
+        await asyncio.sleep(0.01)
+        return message
+
+    items = [
+        BatchItem(index, phone, f"{phone}-{index}")
+        for index, phone in enumerate(["a", "b", "a", "a", "b"])
+    ]
+    results = asyncio.run(collect(ChatBatchRunner(handler, max_concurrent=4), items))
+    assert sorted(r.item.index for r in results) == list(range(5))
+    assert [m for m in order if m.startswith("a")] == ["a-0", "a-2", "a-3"]
+    assert [m for m in order if m.startswith("b")] == ["b-1", "b-4"]
+
+
+def test_upstream_slots_are_shared_round_robin():
+    running = {"budget": 0, "company": 0}
+    peak = {"budget": 0, "company": 0}
+
+    async def handler(message: str, phone: str) -> str:
+        upstream = message
+        running[upstream] += 1
+        peak[upstream] = max(peak[upstream], running[upstream])
+        await asyncio.sleep(0.01)
+        running[upstream] -= 1
+        return "ok"
+
+    items = [BatchItem(i, f"p{i}", "budget", upstream="budget") for i in range(6)]
+    items += [BatchItem(6 + i, f"q{i}", "company", upstream="company") for i in range(2)]
+    runner = ChatBatchRunner(handler, max_concurrent=4, max_per_upstream=2)
+    asyncio.run(collect(runner, items))
+    assert peak == {"budget": 2, "company": 2}
+
+
+def test_batch_turns_take_global_admission_slots_without_phone_limit():
+    in_flight = 0
+    peak = 0
+
+    async def handler(message: str, phone: str) -> str:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ok"
+
+    async def scenario():
+        controller = AdmissionController(
+            max_concurrent=2,
+            max_queue=10,
+            queue_timeout=5,
+            rate_limiter=PhoneRateLimiter(rate_per_minute=1, burst=1),
+        )
+        runner = ChatBatchRunner(
+            controller.wrap(handler, rate_limited=False), max_concurrent=8
+        )
+        # Um turno interativo ocupa uma das duas vagas durante o lote
+        interactive = await controller.acquire("interativo")
+        items = [BatchItem(i, f"p{i % 3}", "oi") for i in range(9)]
+        results = await collect(runner, items)
+        interactive.release()
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(r.error is None for r in results)
+    assert peak == 1
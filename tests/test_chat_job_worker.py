@@ -0,0 +1,147 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.application.service.chat_job_worker import ChatJobWorker
+from app.infrastructure.database.chat_job_repository import (
+    DONE,
+    FAILED,
+    LEASE_EXPIRED_ERROR,
+    QUEUED,
+    RUNNING,
+    InMemoryChatJobRepository,
+)
+
+CALLBACK_URL = "https://callbacks.example.com/jobs"
+
+
+def create_worker(repository, handler, callbacks: list | None = None, **kwargs):
+    worker = ChatJobWorker(
+        repository,
+        handler,
+        default_callback_url=CALLBACK_URL,
+        callback_retries=0,
+        **kwargs,
+    )
+
+    def receive(request: httpx.Request) -> httpx.Response:
+        callbacks.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(204)
+
+    worker._client = httpx.AsyncClient(transport=httpx.MockTransport(receive))
+    return worker
+
+
+def test_callback_url_allowlist():
+    worker = ChatJobWorker(
+        InMemoryChatJobRepository(),
+        handler=None,
+        default_callback_url=CALLBACK_URL,
+        callback_hosts=["hooks.example.com"],
+    )
+    assert worker.callback_allowed(CALLBACK_URL)
+    assert worker.callback_allowed("https://HOOKS.example.com/x")
+    assert not worker.callback_allowed("http://169.254.169.254/latest")
+    assert not worker.callback_allowed("file://hooks.example.com/etc/passwd")
+
+    with pytest.raises(ValueError):
+        asyncio.run(worker.enqueue("5511", "oi", "http://localhost:8080/admin"))
+
+
+def test_completed_job_is_delivered_to_callback():
+    repository = InMemoryChatJobRepository()
+    callbacks = []
+
+    async def handler(message: str, phone: str) -> str:
+        return f"resposta: {message}"
+
+    async def scenario():
+        worker = create_worker(repository, handler, callbacks)
+        job = await worker.enqueue("5511", "oi")
+        (claimed,) = await repository.claim(1, lease_seconds=60, max_attempts=3)
+        await worker._process(claimed)
+        return await repository.get(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == DONE
+    assert job.response == "resposta: oi"
+    assert job.callback_status == "delivered"
+    assert callbacks == [
+        (
+            CALLBACK_URL,
+            {
+                "job_id": job.id,
+                "phone": "5511",
+                "status": DONE,
+                "message": "resposta: oi",
+                "error": None,
+            },
+        )
+    ]
+
+
+def test_failed_job_waits_for_backoff_before_retry():
+    repository = InMemoryChatJobRepository()
+    callbacks = []
+
+    async def handler(message: str, phone: str) -> str:
+        raise RuntimeError("agente indisponível")
+
+    async def scenario():
+        worker = create_worker(
+            repository, handler, callbacks, max_attempts=2, retry_backoff=30
+        )
+        job = await worker.enqueue("5511", "oi")
+        (claimed,) = await repository.claim(1, lease_seconds=60, max_attempts=2)
+        await worker._process(claimed)
+
+        stored = await repository.get(job.id)
+        assert stored.status == QUEUED
+        assert stored.available_at > datetime.now(timezone.utc) + timedelta(seconds=25)
+        assert await repository.claim(1, lease_seconds=60, max_attempts=2) == []
+        assert callbacks == []
+
+        # Passada a espera, a última tentativa falha e o callback é entregue
+        repository._jobs[job.id].available_at = datetime.now(timezone.utc)
+        (claimed,) = await repository.claim(1, lease_seconds=60, max_attempts=2)
+        await worker._process(claimed)
+        return await repository.get(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == FAILED
+    assert job.attempts == 2
+    assert [payload["status"] for _, payload in callbacks] == [FAILED]
+
+
+def test_retry_delay_doubles_per_attempt():
+    worker = ChatJobWorker(InMemoryChatJobRepository(), handler=None, retry_backoff=5)
+    assert [worker.retry_delay(attempts) for attempts in (1, 2, 3)] == [5, 10, 20]
+
+
+def test_claim_keeps_phone_order_and_fails_exhausted_leases():
+    repository = InMemoryChatJobRepository()
+
+    async def scenario():
+        first = await repository.enqueue("5511", "primeira")
+        await repository.enqueue("5511", "segunda")
+        other = await repository.enqueue("5522", "outra")
+
+        claimed = await repository.claim(10, lease_seconds=60, max_attempts=1)
+        assert sorted(job.id for job in claimed) == sorted([first.id, other.id])
+        assert all(job.status == RUNNING for job in claimed)
+
+        # Worker encerrado no meio da única tentativa
+        repository._jobs[first.id].locked_until = datetime.now(timezone.utc) - timedelta(
+            seconds=1
+        )
+        claimed = await repository.claim(10, lease_seconds=60, max_attempts=1)
+        statuses = {job.message: (job.status, job.error) for job in claimed}
+        assert statuses == {
+            "primeira": (FAILED, LEASE_EXPIRED_ERROR),
+            "segunda": (RUNNING, None),
+        }
+
+    asyncio.run(scenario())
@@ -0,0 +1,86 @@
+import pytest
+
+from app.application.tool.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.application.tool.resilience.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(30)
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_probe_and_closes_on_success(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 31
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 31
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_probe_can_be_retried(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 31
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_disabled_breaker_never_opens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=0)
+    for _ in range(10):
+        breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == CLOSED
@@ -0,0 +1,169 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.application.deadline import Deadline, DeadlineExceeded, deadline_scope
+from app.application.service.idempotency_store import IdempotencyStore
+from app.infrastructure.database.idempotency_repository import IdempotencyClaim
+
+
+class FakeIdempotencyRepository:
+    """
+    Tabela compartilhada em memória, com a mesma semântica de reserva do Postgres
+    """
+
+    def __init__(self):
+        # chave -> (status, resposta, dono)
+        self.rows: dict[str, tuple[str, str | None, str | None]] = {}
+        self.expired_leases: set[str] = set()
+
+    async def claim(self, key, lease_seconds, ttl_seconds):
+        row = self.rows.get(key)
+        if row is None or (row[0] == "pending" and key in self.expired_leases):
+            self.expired_leases.discard(key)
+            owner = uuid.uuid4().hex
+            self.rows[key] = ("pending", None, owner)
+            return IdempotencyClaim(acquired=True, owner=owner)
+        status, response, _ = row
+        return IdempotencyClaim(
+            acquired=False, response=response if status == "done" else None
+        )
+
+    async def complete(self, key, owner, response, ttl_seconds):
+        if self.rows.get(key, (None, None, None))[::2] == ("pending", owner):
+            self.rows[key] = ("done", response, owner)
+
+    async def release(self, key, owner):
+        if self.rows.get(key, (None, None, None))[::2] == ("pending", owner):
+            del self.rows[key]
+
+
+def test_redelivery_on_same_replica_runs_handler_once():
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "resposta"
+
+    async def scenario():
+        store = IdempotencyStore(ttl_seconds=60)
+        return await asyncio.gather(*(store.run("k", handler) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["resposta"] * 3
+    assert calls == 1
+
+
+def test_redelivery_on_other_replica_waits_for_result():
+    repository = FakeIdempotencyRepository()
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    async def scenario():
+        replicas = [
+            IdempotencyStore(
+                ttl_seconds=60, persistence=repository, poll_interval_seconds=0.01
+            )
+            for _ in range(2)
+        ]
+        return await asyncio.gather(*(replica.run("k", handler) for replica in replicas))
+
+    assert asyncio.run(scenario()) == ["resposta"] * 2
+    assert calls == 1
+    assert repository.rows["k"][:2] == ("done", "resposta")
+
+
+def test_wait_for_other_replica_stops_at_turn_deadline():
+    repository = FakeIdempotencyRepository()
+
+    async def scenario():
+        running = asyncio.Event()
+
+        async def slow():
+            running.set()
+            await asyncio.sleep(10)
+            return "lento"
+
+        owner = IdempotencyStore(ttl_seconds=60, persistence=repository)
+        redelivery = IdempotencyStore(
+            ttl_seconds=60, persistence=repository, poll_interval_seconds=5
+        )
+        original = asyncio.create_task(owner.run("k", slow))
+        await running.wait()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with deadline_scope(Deadline.after(0.05)):
+            with pytest.raises(DeadlineExceeded):
+                await redelivery.run("k", slow)
+        elapsed = loop.time() - start
+        original.cancel()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_stale_owner_does_not_touch_taken_over_claim():
+    repository = FakeIdempotencyRepository()
+
+    async def scenario():
+        first_running = asyncio.Event()
+        finish_first = asyncio.Event()
+
+        async def stale():
+            first_running.set()
+            await finish_first.wait()
+            raise RuntimeError("réplica lenta")
+
+        async def fresh():
+            return "nova"
+
+        first = IdempotencyStore(ttl_seconds=60, persistence=repository)
+        second = IdempotencyStore(ttl_seconds=60, persistence=repository)
+        stale_run = asyncio.create_task(first.run("k", stale))
+        await first_running.wait()
+
+        # O lease da primeira réplica vence e a segunda retoma a chave
+        repository.expired_leases.add("k")
+        taken = await repository.claim("k", 60, 60)
+        owner = taken.owner
+        finish_first.set()
+        with pytest.raises(RuntimeError):
+            await stale_run
+        assert repository.rows["k"] == ("pending", None, owner)
+
+        await repository.complete("k", owner, "nova", 60)
+        return await second.run("k", fresh)
+
+    assert asyncio.run(scenario()) == "nova"
+
+
+def test_transient_reply_and_errors_release_the_key():
+    repository = FakeIdempotencyRepository()
+    replies = iter(["Tempo esgotado", "resposta"])
+
+    async def handler():
+        return next(replies)
+
+    async def failing():
+        raise RuntimeError("falha")
+
+    async def scenario():
+        store = IdempotencyStore(
+            ttl_seconds=60, persistence=repository, transient_replies={"Tempo esgotado"}
+        )
+        assert await store.run("k", handler) == "Tempo esgotado"
+        assert "k" not in repository.rows
+        with pytest.raises(RuntimeError):
+            await store.run("k", failing)
+        assert "k" not in repository.rows
+        assert await store.run("k", handler) == "resposta"
+        assert await store.run("k", handler) == "resposta"
+
+    asyncio.run(scenario())
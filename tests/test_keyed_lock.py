@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.application.service.keyed_lock import KeyedLock
+
+
+def test_keyed_lock_serializes_same_key_and_cleans_up():
+    async def scenario():
+        locks = KeyedLock()
+        order = []
+
+        async def run(key: str, name: str):
+            async with locks.hold(key):
+                order.append(f"{name}:start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name}:end")
+
+        tasks = [
+            asyncio.create_task(run("t1", "a")),
+            asyncio.create_task(run("t1", "b")),
+        ]
+        await asyncio.sleep(0)
+        assert locks.waiting("t1") == 2
+        await asyncio.gather(*tasks)
+        assert order == ["a:start", "a:end", "b:start", "b:end"]
+        assert locks.waiting("t1") == 0
+        assert not locks._locks
+
+        async with locks.hold("t1"):
+            with pytest.raises(TimeoutError):
+                async with locks.hold("t1", timeout=0.01):
+                    pass
+        assert not locks._locks
+
+    asyncio.run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.application.service.message_coalescer import MessageCoalescer
+
+
+class RecordingHandler:
+    def __init__(self, fail: bool = False):
+        self.calls: list[tuple[str, str]] = []
+        self.fail = fail
+
+    async def __call__(self, message: str, phone: str) -> str:
+        self.calls.append((message, phone))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("falha no turno")
+        return f"resposta: {message}"
+
+
+def test_burst_is_merged_into_one_turn():
+    handler = RecordingHandler()
+
+    async def scenario():
+        coalescer = MessageCoalescer(handler, window_seconds=0.05, max_wait_seconds=1)
+        return await asyncio.gather(
+            coalescer.submit("5511", "oi"),
+            coalescer.submit("5511", " quero um orçamento "),
+            coalescer.submit("5522", "bom dia"),
+        )
+
+    results = asyncio.run(scenario())
+    assert sorted(handler.calls) == [
+        ("bom dia", "5522"),
+        ("oi\nquero um orçamento", "5511"),
+    ]
+    assert results[0] == results[1] == "resposta: oi\nquero um orçamento"
+    assert results[2] == "resposta: bom dia"
+
+
+def test_max_messages_flushes_immediately():
+    handler = RecordingHandler()
+
+    async def scenario():
+        coalescer = MessageCoalescer(
+            handler, window_seconds=10, max_wait_seconds=10, max_messages=2
+        )
+        return await asyncio.wait_for(
+            asyncio.gather(coalescer.submit("5511", "a"), coalescer.submit("5511", "b")),
+            timeout=1,
+        )
+
+    assert asyncio.run(scenario()) == ["resposta: a\nb"] * 2
+    assert len(handler.calls) == 1
+
+
+def test_cancelled_request_does_not_cancel_turn():
+    handler = RecordingHandler()
+
+    async def scenario():
+        coalescer = MessageCoalescer(handler, window_seconds=0.05, max_wait_seconds=1)
+        first = asyncio.create_task(coalescer.submit("5511", "a"))
+        second = asyncio.create_task(coalescer.submit("5511", "b"))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "resposta: a\nb"
+    assert handler.calls == [("a\nb", "5511")]
+
+
+def test_handler_error_reaches_all_requests():
+    handler = RecordingHandler(fail=True)
+
+    async def scenario():
+        coalescer = MessageCoalescer(handler, window_seconds=0.05, max_wait_seconds=1)
+        return await asyncio.gather(
+            coalescer.submit("5511", "a"),
+            coalescer.submit("5511", "b"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(handler.calls) == 1
+
+
+def test_disabled_coalescer_calls_handler_directly():
+    handler = RecordingHandler()
+
+    async def scenario():
+        coalescer = MessageCoalescer(handler, window_seconds=0, max_wait_seconds=0)
+        return await asyncio.gather(
+            coalescer.submit("5511", "a"), coalescer.submit("5511", "b")
+        )
+
+    assert asyncio.run(scenario()) == ["resposta: a", "resposta: b"]
+    assert len(handler.calls) == 2
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.application.tool.response_cache import ResponseCache
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache("test", ttl_seconds=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "valor"
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("k", loader) for _ in range(5))
+        )
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["valor"] * 5
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 4
+
+
+def test_load_error_reaches_waiters_and_is_not_cached():
+    async def scenario():
+        cache = ResponseCache("test", ttl_seconds=60)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream indisponível")
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("k", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get("k") is None
+        assert cache.stats.load_errors == 1
+
+        async def loader():
+            return "valor"
+
+        # A próxima chamada carrega de novo
+        return await cache.get_or_load("k", loader)
+
+    assert asyncio.run(scenario()) == "valor"
+
+
+def test_cancelled_loader_lets_waiter_retry():
+    async def scenario():
+        cache = ResponseCache("test", ttl_seconds=60)
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return "lento"
+
+        async def fast():
+            return "rápido"
+
+        first = asyncio.create_task(cache.get_or_load("k", slow))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load("k", fast))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await waiter
+
+    assert asyncio.run(scenario()) == "rápido"
+
+
+def test_expired_and_evicted_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(
+        "app.application.tool.response_cache.time.monotonic", lambda: now[0]
+    )
+    cache = ResponseCache("test", ttl_seconds=10, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.set("c", "3")
+    assert cache.get("a") is None
+    assert cache.stats.evictions == 1
+
+    now[0] += 11
+    assert cache.get("b") is None
+    assert cache.stats.expirations == 1
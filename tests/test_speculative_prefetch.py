@@ -0,0 +1,68 @@
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from app.application.tool.speculative_prefetch import SpeculativePrefetcher
+
+
+def outcome(name: str, value: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "proxy_speculative_prefetches_total", {"tool": name, "outcome": value}
+        )
+        or 0.0
+    )
+
+
+def test_prefetch_counts_hit_only_when_results_are_used():
+    async def scenario():
+        prefetcher = SpeculativePrefetcher("test_used")
+
+        async def fetch():
+            return ["ok"]
+
+        prefetcher.start("t1", "k", fetch)
+        assert prefetcher.take("t1", "outra") is None
+        task = prefetcher.take("t1", "k")
+        assert await task == ["ok"]
+        assert outcome("test_used", "hit") == 0
+        prefetcher.record_use(True)
+        prefetcher.finish("t1")
+
+    asyncio.run(scenario())
+    assert outcome("test_used", "hit") == 1
+    assert outcome("test_used", "wasted") == 0
+
+
+def test_failed_prefetch_is_not_a_hit():
+    async def scenario():
+        prefetcher = SpeculativePrefetcher("test_failed")
+
+        async def fetch():
+            return [RuntimeError("falha")]
+
+        prefetcher.start("t1", "k", fetch)
+        await prefetcher.take("t1", "k")
+        prefetcher.record_use(False)
+        prefetcher.finish("t1")
+
+    asyncio.run(scenario())
+    assert outcome("test_failed", "hit") == 0
+    assert outcome("test_failed", "failed") == 1
+
+
+def test_unconsumed_prefetch_is_cancelled_and_wasted():
+    async def scenario():
+        prefetcher = SpeculativePrefetcher("test_wasted")
+
+        async def fetch():
+            await asyncio.sleep(10)
+
+        prefetcher.start("t1", "k", fetch)
+        task = prefetcher._pending["t1"].task
+        prefetcher.finish("t1")
+        await asyncio.sleep(0)
+        return task.cancelled()
+
+    assert asyncio.run(scenario())
+    assert outcome("test_wasted", "wasted") == 1
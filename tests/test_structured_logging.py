@@ -0,0 +1,51 @@
+import pytest
+
+from app.infrastructure.observability.structured_logging import redact
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "+55 11 98765-4321",
+        "5511987654321",
+        "11987654321",
+        "(11) 98765-4321",
+        "(11) 3456-7890",
+        "11 3456-7890",
+        "551134567890",
+    ],
+)
+def test_phone_numbers_are_pseudonymized(text):
+    redacted = redact(f"telefone {text} recebido")
+    assert redacted.startswith("telefone <phone:")
+    assert redacted.endswith("> recebido")
+
+
+def test_same_phone_with_and_without_country_code_shares_pseudonym():
+    assert redact("5511987654321") == redact("(11) 98765-4321")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "ts=1792300000",
+        "ts=1799999999",
+        "ts_ms=1792300000123",
+        "pedido 20261018000123",
+        "job 1234567 tentativa 3",
+        "id=1234567890",
+        "versão 1.1987654321",
+    ],
+)
+def test_other_long_numbers_are_kept(text):
+    assert redact(text) == text
+
+
+def test_cpf_email_and_credentials_are_masked():
+    assert redact("CPF: 12345678901") == "CPF: <cpf>"
+    assert redact("cpf 123.456.789-01") == "cpf <cpf>"
+    assert redact("contato fulano@example.com") == "contato <email>"
+    assert (
+        redact("postgresql://app:segredo@db:5432/app password=segredo")
+        == "postgresql://***@db:5432/app password=***"
+    )